@@ -0,0 +1,5 @@
+"""
+Benchmarks for solar utilities.
+
+2019 SunPower Corp.
+"""
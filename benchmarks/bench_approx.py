@@ -0,0 +1,69 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark approximate, interpolated solar position of dense datetimes.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_approx [days]
+
+2019 SunPower Corp.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from solar_utils import datetime_range, get_solposAM, get_solposAM_approx
+
+DAYS = 30
+LOCATION = [35.56836, -119.2022, -8.0]
+WEATHER = [1015.62055, 40.0]
+FREQS = ('1min', '10s', '1s')
+REPEAT = 3
+
+
+def _time(func, *args, **kwargs):
+    """
+    Time a call and return the best seconds of :data:`REPEAT` and its result.
+    """
+    best = None
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_approx(days=DAYS):
+    """
+    Time exact and approximate solar position at several resolutions.
+
+    :returns: list of (frequency, rows, exact seconds, approximate seconds,
+        maximum zenith error, maximum airmass relative error)
+    """
+    timings = []
+    for freq in FREQS:
+        datetimes = datetime_range(
+            '2017-06-01', np.datetime64('2017-06-01') + days, freq)
+        exact, (angles, airmass) = _time(
+            get_solposAM, LOCATION, datetimes, WEATHER)
+        approx, (x, y) = _time(
+            get_solposAM_approx, LOCATION, datetimes, WEATHER)
+        day = airmass[:, 0] > 0
+        timings.append((
+            freq, datetimes.shape[0], exact, approx,
+            np.abs(x[:, 0] - angles[:, 0]).max(),
+            (np.abs(y[day] - airmass[day]) / airmass[day]).max()))
+    return timings
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    for freq, rows, exact, approx, zenith, airmass in bench_approx(*args):
+        print('%-5s %9d rows exact %8.3f s, approximate %8.3f s, speedup '
+              '%5.2f, max error %.4f deg zenith, %.3f%% airmass' % (
+                  freq, rows, exact, approx, exact / approx, zenith,
+                  airmass * 100))
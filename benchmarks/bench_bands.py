@@ -0,0 +1,88 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark native band integration against integrating returned spectra.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_bands [days]
+
+2019 SunPower Corp.
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from solar_utils import (
+    datetime_range, get_spectrl2, get_spectrl2_bands, get_specx
+)
+
+DAYS = 30
+LOCATION = [33.65, -84.43, -5.0]
+WEATHER = [1006.0, 27.0]
+ORIENTATION = [33.65, 135.0]
+ATMOSPHERIC_CONDITIONS = [1.14, 0.65, -1.0, 0.2, 1.36]
+ALBEDO = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+SILICON = ([0.3, 0.9, 1.2], [0.0, 1.0, 0.0])
+
+
+def _measure(func, *args):
+    """
+    Time a call and trace its peak memory.
+
+    :returns: seconds, peak memory [bytes]
+    """
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def integrate_spectra(datetimes, reference):
+    """
+    Integrate spectra returned by :func:`get_spectrl2` with NumPy.
+    """
+    specglo, specx = get_spectrl2(
+        1, LOCATION, datetimes, WEATHER, ORIENTATION, ATMOSPHERIC_CONDITIONS,
+        ALBEDO)[3:]
+    response = np.interp(specx, *SILICON, left=0.0, right=0.0)
+    broadband = np.trapezoid(specglo, specx, axis=1)
+    inband = np.trapezoid(specglo * response, specx, axis=1)
+    return broadband, inband, (inband / broadband) / (
+        np.trapezoid(reference * response, specx)
+        / np.trapezoid(reference, specx))
+
+
+def integrate_bands(datetimes, reference):
+    """
+    Integrate spectra natively with :func:`get_spectrl2_bands`.
+    """
+    return get_spectrl2_bands(
+        1, LOCATION, datetimes, WEATHER, ORIENTATION, ATMOSPHERIC_CONDITIONS,
+        ALBEDO, [SILICON], reference)
+
+
+def bench_bands(days=DAYS):
+    """
+    Time and trace both ways of integrating spectra every 10 minutes.
+
+    :returns: list of (name, seconds, peak memory [bytes])
+    """
+    datetimes = datetime_range(
+        '1999-07-01', np.datetime64('1999-07-01') + days, '10min')
+    reference = np.ones_like(get_specx(1))
+    return [(func.__name__,) + _measure(func, datetimes, reference)
+            for func in (integrate_spectra, integrate_bands)]
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    for name, elapsed, peak in bench_bands(*args):
+        print('%-18s %8.3f s, peak memory %8.1f MiB' % (
+            name, elapsed, peak / 2.0 ** 20))
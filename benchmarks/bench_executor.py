@@ -0,0 +1,61 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark scaling of the multi-process executor from 1 to N cores.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_executor [sites] [max-workers]
+
+2019 SunPower Corp.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from solar_utils.executor import SolarExecutor
+
+SITES = 100
+
+
+def make_fleet(sites=SITES, seed=0):
+    """
+    Random fleet of sites in the continental US.
+    """
+    rng = np.random.RandomState(seed)
+    locations = np.column_stack([
+        rng.uniform(25.0, 49.0, sites), rng.uniform(-124.0, -67.0, sites),
+        rng.choice([-8.0, -7.0, -6.0, -5.0], sites)])
+    weathers = np.column_stack([
+        rng.uniform(900.0, 1020.0, sites), rng.uniform(0.0, 40.0, sites)])
+    return locations, weathers
+
+
+def bench_scaling(sites=SITES, max_workers=None):
+    """
+    Time a fleet year of hourly solar position with 1 to N workers.
+
+    :returns: list of (workers, seconds)
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    locations, weathers = make_fleet(sites)
+    timings = []
+    for workers in range(1, max_workers + 1):
+        with SolarExecutor(max_workers=workers) as executor:
+            executor.get_solpos8760(locations[:1], 2017, weathers[:1])  # warm
+            t0 = time.perf_counter()
+            executor.get_solpos8760(locations, 2017, weathers)
+            timings.append((workers, time.perf_counter() - t0))
+    return timings
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    timings = bench_scaling(*args)
+    serial = timings[0][1]
+    for workers, elapsed in timings:
+        print('%2d workers: %8.3f s, speedup %5.2f' % (
+            workers, elapsed, serial / elapsed))
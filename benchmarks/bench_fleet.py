@@ -0,0 +1,74 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark sharing the ephemeris between sites as the number of sites grows.
+
+Compares :func:`~solar_utils.core.get_solposAM_rows` with every site and hour
+flattened into rows, which calculates the full ephemeris for each row, with
+:func:`~solar_utils.core.get_solposAM_fleet`, which calculates it once per
+hour and time zone.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_fleet [max-sites]
+
+2019 SunPower Corp.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_executor import make_fleet
+from solar_utils import get_solposAM_fleet, get_solposAM_rows
+
+MAX_SITES = 1000
+
+
+def _hours(year=2017):
+    """
+    Datetimes of every hour of a non-leap year.
+    """
+    hours = np.arange(8760)
+    day = np.datetime64('%04d-01-01' % year) + hours // 24
+    months = day.astype('datetime64[M]')
+    return np.column_stack([
+        np.full(8760, year), months.astype(int) % 12 + 1,
+        (day - months).astype(int) + 1, hours % 24, np.zeros(8760),
+        np.zeros(8760)]).astype(np.int32)
+
+
+def bench_fleet(max_sites=MAX_SITES):
+    """
+    Time a year of hourly solar position for 1 to ``max_sites`` sites.
+
+    :returns: list of (sites, rows seconds, fleet seconds)
+    """
+    datetimes = _hours()
+    timings = []
+    sites = 1
+    while sites <= max_sites:
+        locations, weathers = make_fleet(sites)
+        rows = np.repeat(np.arange(sites), datetimes.shape[0])
+        columns = [np.ascontiguousarray(values[rows, n], dtype=np.float32)
+                   for values, n in ((locations, 0), (locations, 1),
+                                     (locations, 2), (weathers, 0),
+                                     (weathers, 1))]
+        flat = np.tile(datetimes, (sites, 1))
+        t0 = time.perf_counter()
+        get_solposAM_rows(columns[0], columns[1], columns[2], flat,
+                          columns[3], columns[4])
+        t1 = time.perf_counter()
+        get_solposAM_fleet(locations, datetimes, weathers)
+        t2 = time.perf_counter()
+        timings.append((sites, t1 - t0, t2 - t1))
+        sites *= 10
+    return timings
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    for sites, rows, fleet in bench_fleet(*args):
+        print('%5d sites: rows %8.3f s, fleet %8.3f s, speedup %5.2f' % (
+            sites, rows, fleet, rows / fleet))
@@ -0,0 +1,73 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark the pandas front-end against the raw batch call and against
+splitting timestamps into fields one at a time in Python. Requires pandas.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_frames [days]
+
+2019 SunPower Corp.
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from solar_utils import get_solposAM
+from solar_utils.frames import get_solposAM_frame, index_datetimes
+
+DAYS = 365
+LOCATION = [35.56836, -119.2022, -8.0]
+WEATHER = [1015.62055, 40.0]
+REPEAT = 3
+
+
+def _time(func, *args):
+    """
+    Time a call and return the best seconds of :data:`REPEAT`.
+    """
+    best = None
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def per_timestamp(index):
+    """
+    Convert to standard time and split each timestamp in Python.
+    """
+    standard = index.tz_convert('Etc/GMT+8')
+    datetimes = np.array([ts.timetuple()[:6] for ts in standard],
+                         dtype=np.intc)
+    return get_solposAM(LOCATION, datetimes, WEATHER)
+
+
+def bench_frames(days=DAYS):
+    """
+    Time solar position every minute in each way.
+
+    :returns: list of (name, rows, seconds)
+    """
+    index = pd.date_range('2017-01-01', periods=days * 1440, freq='min',
+                          tz='US/Pacific')
+    datetimes = index_datetimes(index)[0]
+    count = datetimes.shape[0]
+    return [
+        ('get_solposAM', count, _time(
+            get_solposAM, LOCATION, datetimes, WEATHER)),
+        ('get_solposAM_frame', count, _time(
+            get_solposAM_frame, LOCATION, index, WEATHER)),
+        ('per_timestamp', count, _time(per_timestamp, index))]
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    for name, rows, elapsed in bench_frames(*args):
+        print('%-18s %8d rows: %7.3f s' % (name, rows, elapsed))
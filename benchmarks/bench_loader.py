@@ -0,0 +1,91 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark start-up and per-call overhead of the SOLPOS and SPECTRL2 wrappers.
+
+Compares the cached loader with opening the library on every call, which is
+what the wrappers used to do. Run from the repository root::
+
+    $ python -m benchmarks.bench_loader
+
+2019 SunPower Corp.
+"""
+
+import ctypes
+import subprocess
+import sys
+import timeit
+
+from solar_utils import solposAM, spectrl2
+from solar_utils.loader import SOLPOSAMDLL
+
+LOCATION = [35.56836, -119.2022, -8.0]
+DATETIME = [2013, 6, 5, 12, 31, 0]
+WEATHER = [1015.62055, 40.0]
+NUMBER = 20000
+
+
+def bench_import(repeat=5):
+    """
+    Time ``import solar_utils`` in a fresh interpreter, best of ``repeat``.
+    """
+    code = ('import time; t0 = time.perf_counter(); import solar_utils; '
+            'print(time.perf_counter() - t0)')
+    return min(
+        float(subprocess.check_output([sys.executable, '-c', code]))
+        for _ in range(repeat))
+
+
+def bench_first_call():
+    """
+    Time the first call in a fresh interpreter, which opens the library.
+    """
+    code = ('import time; from solar_utils import solposAM; '
+            't0 = time.perf_counter(); '
+            'solposAM(%r, %r, %r); '
+            'print(time.perf_counter() - t0)' % (LOCATION, DATETIME, WEATHER))
+    return float(subprocess.check_output([sys.executable, '-c', code]))
+
+
+def _solposAM_reload():
+    """
+    Call ``solposAM`` the old way, loading the library without prototypes.
+    """
+    dll = ctypes.cdll.LoadLibrary(SOLPOSAMDLL)
+    angles = (ctypes.c_float * 2)()
+    airmass = (ctypes.c_float * 2)()
+    dll.solposAM(
+        (ctypes.c_float * 3)(*LOCATION), (ctypes.c_int * 6)(*DATETIME),
+        (ctypes.c_float * 2)(*WEATHER), angles, airmass,
+        (ctypes.c_int * 2)(), (ctypes.c_float * 2)(), (ctypes.c_float * 3)())
+    return angles, airmass
+
+
+def bench_per_call(number=NUMBER):
+    """
+    Time per call of ``solposAM`` with the cached loader and with reloading.
+    """
+    cached = timeit.timeit(
+        lambda: solposAM(LOCATION, DATETIME, WEATHER), number=number)
+    reload = timeit.timeit(_solposAM_reload, number=number)
+    return cached / number, reload / number
+
+
+def bench_spectrl2(number=NUMBER // 10):
+    """
+    Time per call of ``spectrl2``.
+    """
+    args = (1, [33.65, -84.43, -5.0], [1999, 7, 22, 9, 45, 37],
+            [1006.0, 27.0], [33.65, 135.0], [1.14, 0.65, -1.0, 0.2, 1.36],
+            [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6))
+    return timeit.timeit(lambda: spectrl2(*args), number=number) / number
+
+
+if __name__ == '__main__':
+    print('import solar_utils: %.2f ms' % (bench_import() * 1e3))
+    print('first solposAM call: %.2f ms' % (bench_first_call() * 1e3))
+    cached, reload = bench_per_call()
+    print('solposAM per call, cached loader: %.2f us' % (cached * 1e6))
+    print('solposAM per call, reload library: %.2f us' % (reload * 1e6))
+    print('spectrl2 per call, cached loader: %.2f us' % (
+        bench_spectrl2() * 1e6))
@@ -0,0 +1,81 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark skipping night rows in long multi-year runs.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_night [years]
+
+2019 SunPower Corp.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from solar_utils import get_solposAM, get_spectrl2
+
+YEARS = 10
+LOCATION = [33.65, -84.43, -5.0]
+WEATHER = [1006.0, 27.0]
+ORIENTATION = [33.65, 135.0]
+ATMOSPHERIC_CONDITIONS = [1.14, 0.65, -1.0, 0.2, 1.36]
+ALBEDO = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+
+
+def make_datetimes(years=YEARS, start=2001):
+    """
+    Hourly datetimes for several years, including leap years.
+    """
+    stamps = np.arange(
+        np.datetime64('%04d-01-01T00' % start),
+        np.datetime64('%04d-01-01T00' % (start + years)))
+    days = stamps.astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    hours = (stamps - days).astype(int)
+    return np.column_stack([
+        months.astype('datetime64[Y]').astype(int) + 1970,
+        months.astype(int) % 12 + 1, (days - months).astype(int) + 1, hours,
+        np.zeros_like(hours), np.zeros_like(hours)]).astype(np.int32)
+
+
+def _time(func, *args, **kwargs):
+    """
+    Time a call and return the seconds and its result.
+    """
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - t0, result
+
+
+def bench_night(years=YEARS):
+    """
+    Time position and spectra with and without skipping night rows.
+
+    :returns: list of (name, all rows seconds, skip night seconds, fraction
+        of rows calculated)
+    """
+    datetimes = make_datetimes(years)
+    timings = []
+    full, _ = _time(get_solposAM, LOCATION, datetimes, WEATHER)
+    skip, (angles, _) = _time(get_solposAM, LOCATION, datetimes, WEATHER,
+                              skip_night=True)
+    timings.append(('get_solposAM', full, skip,
+                    1.0 - np.isnan(angles[:, 0]).mean()))
+    spectra = (1, LOCATION, datetimes, WEATHER, ORIENTATION,
+               ATMOSPHERIC_CONDITIONS, ALBEDO)
+    full, _ = _time(get_spectrl2, *spectra)
+    skip, result = _time(get_spectrl2, *spectra, skip_night=True)
+    timings.append(('get_spectrl2', full, skip,
+                    result[2].any(axis=1).mean()))
+    return timings
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    for name, full, skip, rows in bench_night(*args):
+        print('%-14s all rows %8.3f s, skip night %8.3f s, speedup %5.2f, '
+              '%.0f%% of rows calculated' % (
+                  name, full, skip, full / skip, rows * 100))
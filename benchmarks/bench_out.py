@@ -0,0 +1,80 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark repeated batch calls writing into caller-supplied buffers against
+allocating new outputs every call.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_out [rows]
+
+2019 SunPower Corp.
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from solar_utils import datetime_range, get_solposAM, get_spectrl2
+
+ROWS = 1440
+CALLS = 200
+LOCATION = [33.65, -84.43, -5.0]
+WEATHER = [1013.0, 15.0]
+ORIENTATION = [33.65, 135.0]
+ATMOSPHERIC_CONDITIONS = [1.14, 0.65, -1.0, 0.2, 1.36]
+ALBEDO = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+START = np.datetime64('1999-07-01T00:00')
+
+
+def _measure(func, *args, **kwargs):
+    """
+    Time :data:`CALLS` calls after a warm-up call and trace the memory
+    allocated by all of them.
+
+    :returns: seconds per call, peak memory [bytes]
+    """
+    func(*args, **kwargs)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for _ in range(CALLS):
+        func(*args, **kwargs)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed / CALLS, peak
+
+
+def bench_out(rows=ROWS):
+    """
+    Time batches of 1-minute solar position and 10-minute spectra.
+
+    :returns: list of (name, rows, seconds per call, peak memory [bytes])
+    """
+    datetimes = datetime_range(START, START + rows, '1min')
+    solpos_out = (np.empty((rows, 2), dtype=np.float32),
+                  np.empty((rows, 2), dtype=np.float32))
+    spectra = np.ascontiguousarray(datetimes[::10])
+    count = spectra.shape[0]
+    spectrl2_out = tuple(
+        np.empty((count, 122), dtype=np.float32) for _ in range(4))
+    spectrl2_out += (np.empty(122, dtype=np.float32),)
+    spectrl2_args = (1, LOCATION, spectra, WEATHER, ORIENTATION,
+                     ATMOSPHERIC_CONDITIONS, ALBEDO)
+    return [
+        ('get_solposAM', rows) + _measure(
+            get_solposAM, LOCATION, datetimes, WEATHER),
+        ('get_solposAM out', rows) + _measure(
+            get_solposAM, LOCATION, datetimes, WEATHER, out=solpos_out),
+        ('get_spectrl2', count) + _measure(get_spectrl2, *spectrl2_args),
+        ('get_spectrl2 out', count) + _measure(
+            get_spectrl2, *spectrl2_args, out=spectrl2_out)]
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    for name, rows, elapsed, peak in bench_out(*args):
+        print('%-16s %6d rows: %9.1f us per call, peak memory %8.1f KiB' % (
+            name, rows, elapsed * 1e6, peak / 1024.0))
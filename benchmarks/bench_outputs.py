@@ -0,0 +1,81 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark a zenith-only SOLPOS run against the full run of ``get_solposAM``.
+
+The full run calculates azimuth, refraction and air mass and allocates the
+angles, airmass, settings, orientation and shadowband arrays, while
+``outputs=['zenref']`` uses the smallest SOLPOS function mask and only
+allocates the zenith.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_outputs [rows] [repeat]
+
+2019 SunPower Corp.
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from solar_utils import get_solposAM
+
+ROWS = 1000000
+REPEAT = 3
+LOCATION = [35.56836, -119.2022, -8.0]
+WEATHER = [1015.62055, 40.0]
+
+
+def make_datetimes(rows=ROWS):
+    """
+    Datetimes every minute starting on 2017-01-01.
+    """
+    minutes = np.arange(rows)
+    stamps = np.datetime64('2017-01-01T00:00') + minutes
+    days = stamps.astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+    return np.column_stack([
+        years.astype(int) + 1970, months.astype(int) % 12 + 1,
+        (days - months).astype(int) + 1, minutes // 60 % 24, minutes % 60,
+        np.zeros(rows, dtype=int)]).astype(np.int32)
+
+
+def _run(datetimes, outputs, repeat):
+    """
+    Best time [s] and peak memory allocated [bytes] of ``get_solposAM``.
+    """
+    elapsed = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        get_solposAM(LOCATION, datetimes, WEATHER, outputs=outputs)
+        elapsed.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    get_solposAM(LOCATION, datetimes, WEATHER, outputs=outputs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(elapsed), peak
+
+
+def bench_outputs(rows=ROWS, repeat=REPEAT):
+    """
+    Compare the full run with a zenith-only run.
+
+    :returns: (seconds, bytes) of the full run and of the zenith-only run
+    """
+    datetimes = make_datetimes(rows)
+    get_solposAM(LOCATION, datetimes[:1], WEATHER)  # load the library
+    return (_run(datetimes, None, repeat),
+            _run(datetimes, ['zenref'], repeat))
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    (full, full_bytes), (zenith, zenith_bytes) = bench_outputs(*args)
+    print('full run:    %8.3f s, %10d bytes' % (full, full_bytes))
+    print('zenith only: %8.3f s, %10d bytes' % (zenith, zenith_bytes))
+    print('%.2f times faster, %.2f times less memory' % (
+        full / zenith, float(full_bytes) / zenith_bytes))
@@ -0,0 +1,69 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark SPECTRL2 spectra of precomputed solar positions against
+calculating the solar position for the spectra.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_position [days]
+
+2019 SunPower Corp.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from solar_utils import (
+    datetime_range, get_solposAM, get_spectrl2, get_spectrl2_position
+)
+
+DAYS = 30
+LOCATION = [33.65, -84.43, -5.0]
+WEATHER = [1013.0, 15.0]
+ORIENTATION = [33.65, 135.0]
+ATMOSPHERIC_CONDITIONS = [1.14, 0.65, -1.0, 0.2, 1.36]
+ALBEDO = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+REPEAT = 3
+
+
+def _time(func, *args, **kwargs):
+    """
+    Time a call and return the best seconds of :data:`REPEAT`.
+    """
+    best = None
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        func(*args, **kwargs)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_position(days=DAYS):
+    """
+    Time spectra every 10 minutes with and without precomputed positions.
+
+    :returns: list of (name, rows, seconds)
+    """
+    datetimes = datetime_range(
+        '1999-07-01', np.datetime64('1999-07-01') + days, '10min')
+    angles, airmass = get_solposAM(LOCATION, datetimes, WEATHER)
+    count = datetimes.shape[0]
+    return [
+        ('get_spectrl2', count, _time(
+            get_spectrl2, 1, LOCATION, datetimes, WEATHER, ORIENTATION,
+            ATMOSPHERIC_CONDITIONS, ALBEDO)),
+        ('get_solposAM', count, _time(
+            get_solposAM, LOCATION, datetimes, WEATHER)),
+        ('get_spectrl2_position', count, _time(
+            get_spectrl2_position, 1, LOCATION, datetimes, angles, airmass,
+            ORIENTATION, ATMOSPHERIC_CONDITIONS, ALBEDO))]
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    for name, rows, elapsed in bench_position(*args):
+        print('%-22s %6d rows: %7.3f s' % (name, rows, elapsed))
@@ -0,0 +1,76 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark peak memory of streaming solar position against calculating a
+whole range at once.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_stream [days]
+
+2019 SunPower Corp.
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from solar_utils import get_solpos_range
+from solar_utils.stream import stream_solpos_range
+
+DAYS = (1, 10, 30)
+LOCATION = [35.56836, -119.2022, -8.0]
+WEATHER = [1015.62055, 40.0]
+START = np.datetime64('2017-01-01')
+
+
+def _measure(func, *args):
+    """
+    Time a call and trace its peak memory.
+
+    :returns: seconds, peak memory [bytes]
+    """
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def whole_range(days):
+    """
+    Calculate every second of ``days`` at once.
+    """
+    return get_solpos_range(LOCATION, START, START + days, '1s', WEATHER)[0]
+
+
+def streamed(days):
+    """
+    Calculate every second of ``days`` a chunk at a time.
+    """
+    daylight = 0
+    for _, angles, _ in stream_solpos_range(
+            LOCATION, START, START + days, '1s', WEATHER):
+        daylight += np.count_nonzero(angles[:, 0] < 90.0)
+    return daylight
+
+
+def bench_stream(*days):
+    """
+    Time and trace both ways for 1-second data over several days.
+
+    :returns: list of (name, days, seconds, peak memory [bytes])
+    """
+    return [(func.__name__, n) + _measure(func, n)
+            for n in (days or DAYS) for func in (whole_range, streamed)]
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    for name, days, elapsed, peak in bench_stream(*args):
+        print('%-11s %3d days: %7.3f s, peak memory %8.1f MiB' % (
+            name, days, elapsed, peak / 2.0 ** 20))
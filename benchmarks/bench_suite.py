@@ -0,0 +1,245 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite of ``solposAM``, ``get_solposAM``, ``get_solpos8760`` and
+``spectrl2`` across input sizes, saved as JSON to catch regressions between
+releases.
+
+Each benchmark is timed through the public function and again calling only
+the native function, with its inputs and outputs already converted, so the
+marshalling time is the difference. The scalar functions are called once per
+row in a Python loop, so they stop at :data:`SCALAR_MAX` rows. The time of
+``import solar_utils`` in a fresh interpreter is also saved.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_suite --output bench-0.3.json
+    $ python -m benchmarks.bench_suite --max-rows 100000 \\
+    >     --compare bench-0.3.json
+
+With ``--compare``, every benchmark slower than the baseline by more than
+:data:`THRESHOLD` is listed and the exit status is 1.
+
+2019 SunPower Corp.
+"""
+
+import argparse
+import ctypes
+import datetime as pydatetime
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+import solar_utils
+from solar_utils import (
+    datetime_range, get_solpos8760, get_solposAM, solposAM, spectrl2
+)
+from solar_utils.core import NSPEC, _solposAM_buffers
+from solar_utils.loader import (
+    FLOAT2_P, FLOAT3_P, INT2_P, INT6_P, LONG_P, load_solposAM, load_spectrl2
+)
+
+from benchmarks.bench_loader import bench_import
+
+#: row counts, 1 to 10 million
+SIZES = tuple(10 ** n for n in range(8))
+#: most rows of the scalar functions called once per row
+SCALAR_MAX = 10 ** 4
+#: best of this many repeats, once for more than a million rows
+REPEAT = 3
+#: ratio of the new to the baseline time reported as a regression
+THRESHOLD = 1.2
+LOCATION = [35.56836, -119.2022, -8.0]
+DATETIME = [2013, 6, 5, 12, 31, 0]
+WEATHER = [1015.62055, 40.0]
+START = np.datetime64('2013-01-01T00:00:00')
+SPECTRL2_ARGS = (
+    1, [33.65, -84.43, -5.0], [1999, 7, 22, 9, 45, 37], [1006.0, 27.0],
+    [33.65, 135.0], [1.14, 0.65, -1.0, 0.2, 1.36],
+    [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6))
+
+
+def _time(func, rows):
+    """
+    Time a call and return the best seconds of :data:`REPEAT`.
+    """
+    best = None
+    for _ in range(REPEAT if rows <= 10 ** 6 else 1):
+        t0 = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _loop(func, args, rows):
+    """
+    Get a function that calls ``func(*args)`` once per row.
+    """
+    def _call():
+        for _ in range(rows):
+            func(*args)
+    return _call
+
+
+def bench_solposAM(rows):
+    """
+    Time ``solposAM`` once per row and the native ``solposAM``.
+    """
+    outputs = ((ctypes.c_float * 2)(), (ctypes.c_float * 2)(),
+               (ctypes.c_int * 2)(), (ctypes.c_float * 2)(),
+               (ctypes.c_float * 3)())
+    native = ((ctypes.c_float * 3)(*LOCATION), (ctypes.c_int * 6)(*DATETIME),
+              (ctypes.c_float * 2)(*WEATHER)) + outputs
+    return (_time(_loop(solposAM, (LOCATION, DATETIME, WEATHER), rows), rows),
+            _time(_loop(load_solposAM().solposAM, native, rows), rows))
+
+
+def _native_get_solposAM(datetimes):
+    """
+    Get a function that calls the native ``get_solposAM`` with the inputs and
+    outputs already converted.
+    """
+    count = datetimes.shape[0]
+    angles, airmass, settings, orientation, shadowband, err_code = (
+        _solposAM_buffers(count))
+    args = ((ctypes.c_float * 3)(*LOCATION), datetimes.ctypes.data_as(INT6_P),
+            (ctypes.c_float * 2)(*WEATHER), count,
+            angles.ctypes.data_as(FLOAT2_P), airmass.ctypes.data_as(FLOAT2_P),
+            settings.ctypes.data_as(INT2_P),
+            orientation.ctypes.data_as(FLOAT2_P),
+            shadowband.ctypes.data_as(FLOAT3_P),
+            err_code.ctypes.data_as(LONG_P), 1)
+    return lambda: load_solposAM().get_solposAM(*args)
+
+
+def bench_get_solposAM(rows):
+    """
+    Time ``get_solposAM`` of ``rows`` seconds and the native
+    ``get_solposAM``.
+    """
+    datetimes = datetime_range(START, START + rows, '1s')
+    return (_time(lambda: get_solposAM(LOCATION, datetimes, WEATHER), rows),
+            _time(_native_get_solposAM(datetimes), rows))
+
+
+def bench_get_solpos8760(rows):
+    """
+    Time ``get_solpos8760`` of a year and the native ``get_solposAM`` of its
+    hours.
+    """
+    datetimes = datetime_range('2013-01-01', '2014-01-01', '1h')
+    return (_time(lambda: get_solpos8760(LOCATION, 2013, WEATHER), rows),
+            _time(_native_get_solposAM(datetimes), rows))
+
+
+def bench_spectrl2(rows):
+    """
+    Time ``spectrl2`` once per row and the native ``spectrl2``.
+    """
+    units, location, datetime, weather, orientation, atm, albedo = (
+        SPECTRL2_ARGS)
+    native = (
+        units, (ctypes.c_float * 3)(*location),
+        (ctypes.c_int * 6)(*datetime), (ctypes.c_float * 2)(*weather),
+        (ctypes.c_float * 2)(*orientation), (ctypes.c_float * 5)(*atm),
+        (ctypes.c_float * 12)(*albedo), 0, NSPEC)
+    native += tuple((ctypes.c_float * NSPEC)() for _ in range(5))
+    native += ((ctypes.c_float * 2)(), (ctypes.c_float * 2)(),
+               (ctypes.c_int * 2)(), (ctypes.c_float * 3)())
+    return (_time(_loop(spectrl2, SPECTRL2_ARGS, rows), rows),
+            _time(_loop(load_spectrl2().spectrl2_window, native, rows), rows))
+
+
+#: benchmarks by name and their row counts
+BENCHMARKS = (
+    ('solposAM', bench_solposAM,
+     tuple(rows for rows in SIZES if rows <= SCALAR_MAX)),
+    ('get_solposAM', bench_get_solposAM, SIZES),
+    ('get_solpos8760', bench_get_solpos8760, (8760,)),
+    ('spectrl2', bench_spectrl2,
+     tuple(rows for rows in SIZES if rows <= SCALAR_MAX)))
+
+
+def bench_suite(max_rows=SIZES[-1]):
+    """
+    Run every benchmark.
+
+    :param max_rows: most rows of any benchmark
+    :type max_rows: int
+    :returns: versions, machine, import time and a result per benchmark and
+        row count, all times in seconds
+    :rtype: dict
+    """
+    results = []
+    for name, func, sizes in BENCHMARKS:
+        for rows in sizes:
+            if rows > max_rows:
+                continue
+            total, native = func(rows)
+            results.append({
+                'name': name, 'rows': rows, 'total': total, 'native': native,
+                'marshalling': max(0.0, total - native),
+                'per_row': total / rows})
+    return {
+        'version': solar_utils.__version__,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'date': pydatetime.datetime.now().isoformat(),
+        'import': bench_import(),
+        'results': results}
+
+
+def compare(baseline, suite, threshold=THRESHOLD):
+    """
+    Find benchmarks slower than a baseline.
+
+    :param baseline: saved output of :func:`bench_suite`
+    :type baseline: dict
+    :param suite: output of :func:`bench_suite`
+    :type suite: dict
+    :param threshold: ratio of the new to the baseline time of a regression
+    :type threshold: float
+    :returns: list of (name, rows, baseline seconds, seconds) of regressions,
+        import is named ``'import'``
+    :rtype: list
+    """
+    old = dict(((result['name'], result['rows']), result['total'])
+               for result in baseline['results'])
+    old[('import', 0)] = baseline['import']
+    new = [((result['name'], result['rows']), result['total'])
+           for result in suite['results']]
+    new.append((('import', 0), suite['import']))
+    return [key + (old[key], elapsed) for key, elapsed in new
+            if key in old and elapsed > threshold * old[key]]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--max-rows', type=int, default=SIZES[-1],
+                        help='most rows of any benchmark')
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--compare', help='JSON of a baseline')
+    args = parser.parse_args()
+    suite = bench_suite(args.max_rows)
+    print('import solar_utils: %.2f ms' % (suite['import'] * 1e3))
+    for result in suite['results']:
+        print('%-14s %8d rows: %10.6f s, native %10.6f s, marshalling '
+              '%10.6f s' % (result['name'], result['rows'], result['total'],
+                            result['native'], result['marshalling']))
+    if args.output:
+        with open(args.output, 'w') as fileobj:
+            json.dump(suite, fileobj, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as fileobj:
+            regressions = compare(json.load(fileobj), suite)
+        for name, rows, old, elapsed in regressions:
+            print('REGRESSION %-14s %8d rows: %10.6f s -> %10.6f s' % (
+                name, rows, old, elapsed))
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,74 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark SPECTRL2 spectra in a wavelength window against whole spectra.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_window [days]
+
+2019 SunPower Corp.
+"""
+
+import sys
+import timeit
+
+import numpy as np
+
+from solar_utils import datetime_range, get_spectrl2, spectrl2
+
+DAYS = 30
+NUMBER = 2000
+LOCATION = [33.65, -84.43, -5.0]
+DATETIME = [1999, 7, 22, 9, 45, 37]
+WEATHER = [1006.0, 27.0]
+ORIENTATION = [33.65, 135.0]
+ATMOSPHERIC_CONDITIONS = [1.14, 0.65, -1.0, 0.2, 1.36]
+ALBEDO = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+#: wavelength windows [microns], whole spectra, silicon and visible
+WINDOWS = (None, (0.3, 1.2), (0.4, 0.7))
+
+
+def bench_per_call(number=NUMBER):
+    """
+    Time per call of ``spectrl2`` in each of :data:`WINDOWS`.
+
+    :returns: list of (window, wavelengths, seconds per call)
+    """
+    timings = []
+    for window in WINDOWS:
+        def _call():
+            return spectrl2(1, LOCATION, DATETIME, WEATHER, ORIENTATION,
+                            ATMOSPHERIC_CONDITIONS, ALBEDO, window=window)
+        nspec = len(_call()[4])
+        timings.append(
+            (window, nspec, timeit.timeit(_call, number=number) / number))
+    return timings
+
+
+def bench_batch(days=DAYS):
+    """
+    Time ``get_spectrl2`` every 10 minutes in each of :data:`WINDOWS`.
+
+    :returns: list of (window, rows, seconds)
+    """
+    datetimes = datetime_range(
+        '1999-07-01', np.datetime64('1999-07-01') + days, '10min')
+    timings = []
+    for window in WINDOWS:
+        elapsed = timeit.timeit(
+            lambda: get_spectrl2(1, LOCATION, datetimes, WEATHER, ORIENTATION,
+                                 ATMOSPHERIC_CONDITIONS, ALBEDO,
+                                 window=window), number=1)
+        timings.append((window, datetimes.shape[0], elapsed))
+    return timings
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    for window, nspec, elapsed in bench_per_call():
+        print('spectrl2 window %-12s %3d wavelengths: %7.2f us per call' % (
+            window, nspec, elapsed * 1e6))
+    for window, rows, elapsed in bench_batch(*args):
+        print('get_spectrl2 window %-12s %6d rows: %7.3f s' % (
+            window, rows, elapsed))
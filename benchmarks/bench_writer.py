@@ -0,0 +1,93 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark writing solar position to disk a chunk at a time on a background
+thread against calculating a whole range at once and saving it.
+
+Run from the repository root::
+
+    $ python -m benchmarks.bench_writer [days]
+
+2019 SunPower Corp.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from solar_utils import get_solpos_range
+from solar_utils.writer import write_solpos_range
+
+DAYS = (1, 10, 30)
+LOCATION = [35.56836, -119.2022, -8.0]
+WEATHER = [1015.62055, 40.0]
+START = np.datetime64('2017-01-01')
+
+
+def _measure(func, *args):
+    """
+    Time a call and trace its peak memory.
+
+    :returns: seconds, peak memory [bytes]
+    """
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def in_memory(path, days):
+    """
+    Calculate every second of ``days`` at once and save it.
+    """
+    angles, airmass = get_solpos_range(
+        LOCATION, START, START + days, '1s', WEATHER)
+    np.save(os.path.join(path, 'angles.npy'), angles)
+    np.save(os.path.join(path, 'airmass.npy'), airmass)
+
+
+def chunked(path, days):
+    """
+    Write every second of ``days`` a chunk at a time.
+    """
+    write_solpos_range(path, LOCATION, START, START + days, '1s', WEATHER)
+
+
+def chunked_compressed(path, days):
+    """
+    Write every second of ``days`` a compressed chunk at a time.
+    """
+    write_solpos_range(path, LOCATION, START, START + days, '1s', WEATHER,
+                       compress=True)
+
+
+def bench_writer(*days):
+    """
+    Time and trace each way for 1-second data over several days.
+
+    :returns: list of (name, days, seconds, peak memory [bytes])
+    """
+    result = []
+    for n in (days or DAYS):
+        for func in (in_memory, chunked, chunked_compressed):
+            path = tempfile.mkdtemp()
+            try:
+                result.append((func.__name__, n) + _measure(func, path, n))
+            finally:
+                shutil.rmtree(path)
+    return result
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    for name, days, elapsed, peak in bench_writer(*args):
+        print('%-18s %3d days: %7.3f s, peak memory %8.1f MiB' % (
+            name, days, elapsed, peak / 2.0 ** 20))
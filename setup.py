@@ -42,12 +42,12 @@ elif PLATFORM == 'darwin':
     LIB_FILE = 'lib%s.dylib'
     RPATH = "-Wl,-rpath,@loader_path/"
     INSTALL_NAME = "@rpath/" + LIB_FILE
-    CCFLAGS = LDFLAGS = ['-fPIC']
+    CCFLAGS = LDFLAGS = ['-fPIC', '-pthread']
 elif PLATFORM in ['linux', 'linux2']:
     PLATFORM = 'linux'
     LIB_FILE = 'lib%s.so'
     RPATH = "-Wl,-rpath,${ORIGIN}"
-    CCFLAGS = LDFLAGS = ['-fPIC']
+    CCFLAGS = LDFLAGS = ['-fPIC', '-pthread']
 else:
     sys.exit('Platform "%s" is unknown or unsupported.' % PLATFORM)
 
@@ -188,5 +188,7 @@ setup(
     packages=[NAME, TESTS],
     package_data={NAME: PKG_DATA, TESTS: TEST_DATA},
     ext_modules=[DUMMY],
-    extras_require={'testing': test_requires}
+    python_requires='>=3.8',
+    install_requires=['numpy'],
+    extras_require={'testing': test_requires, 'pandas': ['pandas']}
 )
@@ -5,11 +5,22 @@ This is the solar utilities package.
 2013, 2019 SunPower Corp.
 """
 
-from solar_utils.core import solposAM, spectrl2, get_solpos8760, get_solposAM
+from solar_utils.core import (
+    solposAM, spectrl2, get_solpos8760, get_solposAM, get_solposAM_rows,
+    get_solposAM_approx, get_solposAM_fleet, get_solpos_outputs,
+    get_solpos_range, get_spectrl2, get_spectrl2_bands, get_specx,
+    get_sunrise_sunset, datetime_range, decode_solpos_errors,
+    spectrl2_position, get_spectrl2_position
+)
 
 __version__ = '0.3'
 __release__ = 'Carpenters'
 __author__ = 'Mark Mikofski'
 __email__ = 'mark.mikofski@sunpowercorp.com'
 __url__ = 'https://github.com/SunPower/SolarUtils'
-__all__ = ['solposAM', 'spectrl2', 'get_solpos8760', 'get_solposAM']
+__all__ = ['solposAM', 'spectrl2', 'get_solpos8760', 'get_solposAM',
+           'get_solposAM_rows', 'get_solposAM_approx', 'get_solposAM_fleet',
+           'get_solpos_outputs', 'get_solpos_range', 'get_spectrl2',
+           'get_spectrl2_bands', 'get_specx', 'get_sunrise_sunset',
+           'datetime_range', 'decode_solpos_errors', 'spectrl2_position',
+           'get_spectrl2_position']
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded, thread-safe LRU memoization of SOLPOS and SPECTRL2 calls.
+
+Inputs are quantized to a number of decimals and the quantized inputs are
+both the key of the cache and the values passed to the library, so a cached
+result only depends on its key. The least recently used results are evicted
+when there are more than ``maxsize`` entries or they take more than
+``maxbytes`` bytes.
+
+2019 SunPower Corp.
+"""
+
+from collections import OrderedDict, namedtuple
+import threading
+
+import numpy as np
+
+from solar_utils import core
+
+#: default number of decimals float inputs are rounded to
+DECIMALS = 4
+#: default maximum number of cached results
+MAXSIZE = 4096
+
+#: statistics of a :class:`SolarCache`
+CacheInfo = namedtuple('CacheInfo', [
+    'hits', 'misses', 'evictions', 'entries', 'nbytes', 'maxsize', 'maxbytes'
+])
+
+
+class SolarCache(object):
+    """
+    Memoize :func:`~solar_utils.core.solposAM` and
+    :func:`~solar_utils.core.spectrl2` with a bounded LRU cache.
+
+    :param maxsize: maximum number of cached results, ``None`` for no limit
+    :type maxsize: int
+    :param maxbytes: maximum size of the cached results [bytes], ``None`` for
+        no limit
+    :type maxbytes: int
+    :param decimals: number of decimals float inputs are rounded to
+    :type decimals: int
+
+    Results are returned as read-only ``float32`` NumPy arrays, which are
+    shared by every caller that gets the same entry. Errors aren't cached.
+    The cache can be used from many threads at once, the library is called
+    without holding the lock, so a result missing from the cache may be
+    calculated by more than one thread.
+
+    **Example:**
+
+    >>> cache = SolarCache(maxsize=1000)
+    >>> angles, airmass = cache.solposAM(
+    ...     [35.56836, -119.2022, -8.0], [2013, 6, 5, 12, 31, 0],
+    ...     [1015.62055, 40.0])
+    >>> cache.cache_info().misses
+    1
+    """
+    def __init__(self, maxsize=MAXSIZE, maxbytes=None, decimals=DECIMALS):
+        if maxsize is not None and maxsize < 0:
+            raise ValueError('maxsize must not be negative')
+        if maxbytes is not None and maxbytes < 0:
+            raise ValueError('maxbytes must not be negative')
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.decimals = decimals
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._hits = self._misses = self._evictions = 0
+
+    def _quantize(self, values):
+        """
+        Round a sequence of floats to a hashable tuple.
+        """
+        return tuple(round(float(value), self.decimals) for value in values)
+
+    def _get(self, key, func, args):
+        """
+        Get a cached result or call ``func(*args)`` and cache it.
+
+        :param key: hashable key of the result
+        :param func: function that calculates the result
+        :param args: quantized arguments of ``func``
+        :returns: tuple of read-only arrays
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return result
+            self._misses += 1
+        result = tuple(np.array(value, dtype=np.float32)
+                       for value in func(*args))
+        for value in result:
+            value.flags.writeable = False
+        nbytes = sum(value.nbytes for value in result)
+        with self._lock:
+            if key in self._entries:
+                # another thread cached it first
+                return self._entries[key]
+            self._entries[key] = result
+            self._nbytes += nbytes
+            self._evict()
+        return result
+
+    def _evict(self):
+        """
+        Remove the least recently used entries until the cache fits.
+        """
+        while self._entries and (
+                (self.maxsize is not None
+                 and len(self._entries) > self.maxsize)
+                or (self.maxbytes is not None
+                    and self._nbytes > self.maxbytes)):
+            _, result = self._entries.popitem(last=False)
+            self._nbytes -= sum(value.nbytes for value in result)
+            self._evictions += 1
+
+    def solposAM(self, location, datetime, weather):
+        """
+        Cached :func:`~solar_utils.core.solposAM`.
+
+        :param location: [latitude, longitude, UTC-timezone]
+        :type location: float
+        :param datetime: [year, month, day, hour, minute, second]
+        :type datetime: int
+        :param weather: [ambient-pressure (mB), ambient-temperature (C)]
+        :type weather: float
+        :returns: angles [degrees], airmass [atm]
+        :rtype: :class:`numpy.ndarray`
+        :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+        """
+        location = self._quantize(location)
+        datetime = tuple(int(value) for value in datetime)
+        weather = self._quantize(weather)
+        key = ('solposAM', location, datetime, weather)
+        return self._get(key, core.solposAM, (location, datetime, weather))
+
+    def spectrl2(self, units, location, datetime, weather, orientation,
+                 atmospheric_conditions, albedo, window=None):
+        """
+        Cached :func:`~solar_utils.core.spectrl2`.
+
+        :param units: set ``units`` = 1 for W/m\\ :sup:`2`/micron
+        :type units: int
+        :param location: latitude, longitude and UTC-timezone
+        :type location: float
+        :param datetime: year, month, day, hour, minute and second
+        :type datetime: int
+        :param weather: ambient-pressure [mB] and ambient-temperature [C]
+        :type weather: float
+        :param orientation: tilt and aspect [degrees]
+        :type orientation: float
+        :param atmospheric_conditions: alpha, assym, ozone, tau500 and watvap
+        :type atmospheric_conditions: float
+        :param albedo: 6 wavelengths and 6 reflectivities
+        :type albedo: float
+        :param window: minimum and maximum wavelength [microns] calculated,
+            ``None`` for all 122
+        :type window: float
+        :returns: diffuse, direct, extraterrestrial and global spectra and
+            x-coordinate
+        :rtype: :class:`numpy.ndarray`
+        :raises: :exc:`~solar_utils.exceptions.SPECTRL2_Error`,
+            :exc:`~solar_utils.exceptions.SOLPOS_Error`
+        """
+        args = (int(units), self._quantize(location),
+                tuple(int(value) for value in datetime),
+                self._quantize(weather), self._quantize(orientation),
+                self._quantize(atmospheric_conditions),
+                self._quantize(albedo),
+                None if window is None else self._quantize(window))
+        return self._get(('spectrl2',) + args, core.spectrl2, args)
+
+    def cache_info(self):
+        """
+        Get the statistics of the cache.
+
+        :rtype: :class:`CacheInfo`
+        """
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self._evictions,
+                len(self._entries), self._nbytes, self.maxsize,
+                self.maxbytes)
+
+    def cache_clear(self):
+        """
+        Remove every entry and reset the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self._hits = self._misses = self._evictions = 0
@@ -11,27 +11,99 @@ Solar utilities based on `SOLPOS
 
 import ctypes
 import datetime as pydatetime
+import functools
 import math
 import os
-import sys
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from solar_utils.exceptions import SOLPOS_Error, SPECTRL2_Error
+from solar_utils.metrics import instrument, native
+from solar_utils.loader import (
+    PLATFORM, SOLPOSAM, SPECTRL2, SOLPOSAMDLL, SPECTRL2DLL, load_solposAM,
+    load_spectrl2
+)
+from solar_utils.loader import (
+    FLOAT_P, FLOAT2_P, FLOAT3_P, FLOAT5_P, FLOAT12_P, FLOAT122_P, INT2_P,
+    INT_P, INT6_P, LONG_P
+)
 
-_DIRNAME = os.path.dirname(__file__)
-PLATFORM = sys.platform
-if PLATFORM == 'win32':
-    SOLPOSAM = 'solposAM.dll'
-    SPECTRL2 = 'spectrl2.dll'
-elif PLATFORM in ['linux2', 'linux']:
-    PLATFORM = 'linux'
-    SOLPOSAM = 'libsolposAM.so'
-    SPECTRL2 = 'libspectrl2.so'
-elif PLATFORM == 'darwin':
-    SOLPOSAM = 'libsolposAM.dylib'
-    SPECTRL2 = 'libspectrl2.dylib'
-else:
-    raise OSError('Platform "%s" is unknown or unsupported.' % PLATFORM)
-SOLPOSAMDLL = os.path.join(_DIRNAME, SOLPOSAM)
-SPECTRL2DLL = os.path.join(_DIRNAME, SPECTRL2)
+#: NumPy dtype of C ``long`` used for SOLPOS error codes
+C_LONG = np.dtype('i%d' % ctypes.sizeof(ctypes.c_long))
+#: number of wavelengths in SPECTRL2 spectra
+NSPEC = 122
+#: names of the SOLPOS ``posdata`` fields returned by
+#: :func:`get_solpos_outputs`, in the order of the native field codes
+SOLPOS_OUTPUTS = (
+    'daynum', 'amass', 'ampress', 'azim', 'cosinc', 'coszen', 'dayang',
+    'declin', 'elevetr', 'elevref', 'eqntim', 'erv', 'etr', 'etrn', 'etrtilt',
+    'hrang', 'prime', 'sbcf', 'sretr', 'ssetr', 'ssha', 'tst', 'tstfix',
+    'unprime', 'zenetr', 'zenref'
+)
+#: number of datetimes generated and calculated at a time by
+#: :func:`get_solpos_range`
+RANGE_CHUNK = 1 << 20
+#: units of frequency strings like ``'15min'``
+FREQ_UNITS = {'D': 'D', 'H': 'h', 'h': 'h', 'T': 'm', 'min': 'm', 'S': 's',
+              's': 's'}
+#: default seconds between the knots of :func:`get_solposAM_approx`
+KNOT_INTERVAL = 600
+#: bands of zenith [degrees] around the branches of the SOLPOS refraction at
+#: 5 and -0.575 degrees of elevation, the end of airmass at 93 degrees and the
+#: limit of zenith to 99 degrees at night, that :func:`get_solposAM_approx`
+#: doesn't interpolate across
+APPROX_BANDS = ((84.5, 85.0), (89.5, 90.6), (92.9, 93.1), (98.0, 99.0))
+#: change of azimuth [degrees] between knots above which
+#: :func:`get_solposAM_approx` doesn't interpolate
+APPROX_MAX_TURN = 5.0
+#: factor :func:`get_solposAM_approx` divides the knot interval by to
+#: recalculate rows that can't be interpolated
+APPROX_REFINE = 10
+#: zenith [degrees] beyond which rows are skipped as night, the end of airmass
+#: at 93 degrees plus a margin for the declination and equation of time that
+#: are only calculated once per day
+NIGHT_ZENITH = 94.0
+# SOLPOS function codes and masks from solpos00.h
+L_DOY = 0x0001
+L_GEOM = 0x0002
+L_ZENETR = 0x0004
+L_SSHA = 0x0008
+L_SBCF = 0x0010
+L_TST = 0x0020
+L_SRSS = 0x0040
+L_SOLAZM = 0x0080
+L_REFRAC = 0x0100
+L_AMASS = 0x0200
+L_PRIME = 0x0400
+L_TILT = 0x0800
+L_ETR = 0x1000
+L_ALL = 0xFFFF
+S_DOY = L_DOY
+S_GEOM = L_GEOM | S_DOY
+S_ZENETR = L_ZENETR | S_GEOM
+S_SSHA = L_SSHA | S_GEOM
+S_SBCF = L_SBCF | S_SSHA
+S_TST = L_TST | S_GEOM
+S_SRSS = L_SRSS | S_SSHA | S_TST
+S_SOLAZM = L_SOLAZM | S_ZENETR
+S_REFRAC = L_REFRAC | S_ZENETR
+S_AMASS = L_AMASS | S_REFRAC
+S_PRIME = L_PRIME | S_AMASS
+S_TILT = L_TILT | S_SOLAZM | S_REFRAC
+S_ETR = L_ETR | S_REFRAC
+S_ALL = L_ALL
+#: SOLPOS function mask that calculates each of :data:`SOLPOS_OUTPUTS`
+SOLPOS_MASKS = {
+    'daynum': S_DOY, 'amass': S_AMASS, 'ampress': S_AMASS,
+    'azim': S_SOLAZM, 'cosinc': S_TILT, 'coszen': S_REFRAC,
+    'dayang': S_GEOM, 'declin': S_GEOM, 'elevetr': S_ZENETR,
+    'elevref': S_REFRAC, 'eqntim': S_TST, 'erv': S_GEOM, 'etr': S_ETR,
+    'etrn': S_ETR, 'etrtilt': S_TILT | S_ETR, 'hrang': S_GEOM,
+    'prime': S_PRIME, 'sbcf': S_SBCF, 'sretr': S_SRSS, 'ssetr': S_SRSS,
+    'ssha': S_SSHA, 'tst': S_TST, 'tstfix': S_TST, 'unprime': S_PRIME,
+    'zenetr': S_ZENETR, 'zenref': S_REFRAC
+}
 
 
 def _int2bits(err_code):
@@ -44,7 +116,506 @@ def _int2bits(err_code):
     return int(math.log(err_code, 2))
 
 
-def get_solpos8760(location, year, weather):
+def _check_errors(errors):
+    """
+    Check the ``errors`` argument of batch functions.
+
+    :param errors: ``'raise'`` or ``'mask'``
+    :type errors: str
+    :raises: :exc:`ValueError` if ``errors`` is unknown
+    """
+    if errors not in ('raise', 'mask'):
+        raise ValueError("errors must be 'raise' or 'mask', not %r" % errors)
+
+
+def solpos_error_bits(err_code):
+    """
+    Decode SOLPOS error codes into a boolean array of error bits.
+
+    :param err_code: SOLPOS error codes, one per row
+    :type err_code: int
+    :returns: (N, 18) array, ``True`` if the row has the error in the
+        corresponding column of :attr:`SOLPOS_Error.S_CODE`
+    :rtype: :class:`numpy.ndarray`
+    """
+    err_code = np.asarray(err_code).reshape(-1, 1)
+    bits = np.arange(len(SOLPOS_Error.S_CODE))
+    return ((err_code >> bits) & 1).astype(bool)
+
+
+def decode_solpos_errors(err_code):
+    """
+    Decode every error bit of SOLPOS error codes into error names.
+
+    Unlike :func:`_int2bits`, which keeps only the highest error bit, every
+    error in each row is decoded.
+
+    :param err_code: SOLPOS error codes, one per row
+    :type err_code: int
+    :returns: index of each row with errors, and a list of the names from
+        :attr:`SOLPOS_Error.S_CODE` of the errors in each of those rows
+    :rtype: tuple
+
+    **Example:**
+
+    >>> angles, airmass, err_code = get_solposAM(
+    ...     location, datetimes, weather, errors='mask')
+    >>> rows, names = decode_solpos_errors(err_code)
+    >>> dict(zip(rows, names))
+    {10: ['S_SECOND_ERROR']}
+    """
+    bits = solpos_error_bits(err_code)
+    rows = np.flatnonzero(bits.any(axis=1))
+    s_code = np.array(SOLPOS_Error.S_CODE)
+    names = [s_code[row].tolist() for row in bits[rows]]
+    return rows, names
+
+
+def solpos_function_mask(outputs):
+    """
+    Get the smallest SOLPOS function mask that calculates the outputs.
+
+    :param outputs: names of the outputs from
+        :data:`~solar_utils.core.SOLPOS_OUTPUTS`
+    :type outputs: list
+    :returns: ``pdat->function`` bitmask, with month and day input
+    :rtype: int
+    :raises: :exc:`ValueError` if an output is unknown
+
+    ``S_solpos`` skips every calculation that isn't in the mask, so only the
+    sub-functions needed by the outputs, and their dependencies, are done.
+
+    **Example:**
+
+    >>> hex(solpos_function_mask(['zenref']))
+    '0x106'
+    """
+    unknown = [name for name in outputs if name not in SOLPOS_MASKS]
+    if unknown:
+        raise ValueError('unknown SOLPOS outputs: %s' % ', '.join(unknown))
+    function = 0
+    for name in outputs:
+        function |= SOLPOS_MASKS[name]
+    return function & ~L_DOY
+
+
+def _as_datetimes(datetimes):
+    """
+    View datetimes as a C-contiguous (N, 6) array of C ``int``.
+
+    :param datetimes: sequence of [year, month, day, hour, minute, second]
+        or any array or buffer-protocol object with 6 ints per row
+    :returns: datetimes, without a copy if already C-contiguous ``int32``
+    :rtype: :class:`numpy.ndarray`
+    """
+    datetimes = np.ascontiguousarray(datetimes, dtype=np.intc)
+    if datetimes.size % 6:
+        raise ValueError('datetimes must have 6 fields per row')
+    return datetimes.reshape(-1, 6)
+
+
+def _as_column(values, count, name):
+    """
+    View a scalar or per-row input as a C ``float`` column and its step.
+
+    :param values: scalar or sequence of ``count`` values
+    :param count: number of rows
+    :type count: int
+    :param name: name of the input used in error messages
+    :type name: str
+    :returns: column and step, 0 to broadcast a scalar or 1 for per-row values
+    :rtype: tuple
+    """
+    column = np.ascontiguousarray(values, dtype=np.float32).reshape(-1)
+    if column.size == 1:
+        return column, 0
+    if column.size == count:
+        return column, 1
+    raise ValueError('%s must be a scalar or have %d rows, not %d'
+                     % (name, count, column.size))
+
+
+def _as_rows(values, width, count, name):
+    """
+    View a single row or per-row input as C ``float`` rows and their step.
+
+    :param values: one row or ``count`` rows of ``width`` values
+    :param width: number of values per row
+    :type width: int
+    :param count: number of rows
+    :type count: int
+    :param name: name of the input used in error messages
+    :type name: str
+    :returns: rows and step, 0 to broadcast one row or 1 for per-row values
+    :rtype: tuple
+    """
+    rows = np.ascontiguousarray(values, dtype=np.float32)
+    if rows.size % width:
+        raise ValueError('%s must have %d values per row' % (name, width))
+    rows = rows.reshape(-1, width)
+    if rows.shape[0] == 1:
+        return rows, 0
+    if rows.shape[0] == count:
+        return rows, 1
+    raise ValueError('%s must be one row or have %d rows, not %d'
+                     % (name, count, rows.shape[0]))
+
+
+def _per_site_rows(values, width, sites, times, name):
+    """
+    View an input given for all sites, per site or per site and datetime as
+    an array of shape (sites or 1, datetimes or 1, width).
+
+    :param values: one row, one row per site or one row per site & datetime
+    :param width: number of values per row
+    :type width: int
+    :param sites: number of sites
+    :type sites: int
+    :param times: number of datetimes
+    :type times: int
+    :param name: name of the input used in error messages
+    :type name: str
+    :rtype: :class:`numpy.ndarray`
+    """
+    values = np.asarray(values, dtype=np.float32)
+    if values.ndim == 1:
+        values = values.reshape(1, 1, width)
+    elif values.ndim == 2:
+        values = values.reshape(-1, 1, width)
+    if (values.ndim != 3 or values.shape[2] != width
+            or values.shape[0] not in (1, sites)
+            or values.shape[1] not in (1, times)):
+        raise ValueError(
+            '%s must be one row, one row per site or one row per site and '
+            'datetime of %d values' % (name, width))
+    return values
+
+
+def _as_out(values, shape, dtype, name):
+    """
+    View a caller-supplied output buffer as a C-contiguous array.
+
+    :param values: NumPy array or writable buffer-protocol object of
+        ``dtype`` with as many items as ``shape``
+    :param shape: shape of the output
+    :type shape: tuple
+    :param dtype: NumPy dtype of the output
+    :param name: name of the output used in error messages
+    :type name: str
+    :returns: array sharing memory with ``values``, ``values`` itself if it's
+        already an array of ``shape``
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`ValueError` if the buffer doesn't fit
+    """
+    out = np.asarray(values)
+    size = int(np.prod(shape))
+    if (out.dtype != dtype or out.size != size or not out.flags.c_contiguous
+            or not out.flags.writeable):
+        raise ValueError('out %s must be a writable C-contiguous buffer of '
+                         '%d %s' % (name, size, np.dtype(dtype).name))
+    if out.shape != shape:
+        out = out.reshape(shape)
+    return out
+
+
+#: per-thread scratch outputs of the native calls reused by calls with ``out``
+_SCRATCH = threading.local()
+
+
+def _scratch(name, shape, dtype):
+    """
+    Get a scratch output of the native calls that isn't returned, reused by
+    every call of the same thread.
+
+    The buffer grows to the most rows asked for and is never shrunk.
+
+    :param name: name of the output
+    :type name: str
+    :param shape: shape of the output
+    :type shape: tuple
+    :param dtype: NumPy dtype of the output
+    :returns: first ``shape[0]`` rows of the buffer
+    :rtype: :class:`numpy.ndarray`
+    """
+    buffers = _SCRATCH.__dict__
+    values = buffers.get(name)
+    if values is None or values.shape[0] < shape[0]:
+        values = buffers[name] = np.empty(shape, dtype=dtype)
+    return values[:shape[0]]
+
+
+def _take_rows(values, index, width=None):
+    """
+    Take rows of a per-row input, but not a single value or row that is
+    broadcast.
+
+    :param values: a scalar or single row, or an input per row
+    :param index: rows to get
+    :type index: :class:`numpy.ndarray`
+    :param width: number of values per row, ``None`` for a column
+    :type width: int
+    """
+    values = np.asarray(values)
+    if values.size == (width or 1):
+        return values
+    return values.reshape((-1, width) if width else -1)[index]
+
+
+def _scatter(result, index, count, fill):
+    """
+    Put the results for some rows back in arrays with a row per datetime.
+
+    :param result: array, dictionary or tuple of arrays of results
+    :param index: rows of the results
+    :type index: :class:`numpy.ndarray`
+    :param count: number of rows
+    :type count: int
+    :param fill: value of every other float row, integer rows are 0
+    :returns: results with ``count`` rows
+    """
+    if isinstance(result, dict):
+        return dict((name, _scatter(values, index, count, fill))
+                    for name, values in result.items())
+    if isinstance(result, tuple):
+        return tuple(_scatter(values, index, count, fill)
+                     for values in result)
+    output = np.full((count,) + result.shape[1:],
+                     fill if result.dtype.kind == 'f' else 0,
+                     dtype=result.dtype)
+    output[index] = result
+    return output
+
+
+def _daylight(latitude, longitude, timezone, datetimes, zenith=NIGHT_ZENITH):
+    """
+    Find the rows that aren't at night using a table of the declination and
+    time correction calculated once per site and day.
+
+    :param latitude: latitude [degrees], scalar or one per row
+    :param longitude: longitude [degrees], scalar or one per row
+    :param timezone: UTC-timezone [hours], scalar or one per row
+    :param datetimes: (N, 6) array from :func:`_as_datetimes`
+    :param zenith: zenith [degrees] beyond which rows are at night
+    :type zenith: float
+    :returns: indices of the rows in daylight
+    :rtype: :class:`numpy.ndarray`
+
+    The zenith of each row is estimated from the hour angle as in SOLPOS,
+    without refraction, which SOLPOS doesn't apply below -0.56 degrees of
+    elevation anyway. The declination and equation of time change by a few
+    tenths of a degree in half a day at most, so a row is skipped only if
+    its exact zenith is beyond ``zenith`` less that. Unlike sunrise and
+    sunset this still holds near the poles, where the sun stays close to the
+    horizon for days.
+    """
+    count = datetimes.shape[0]
+    lat, lon, tz = (_as_column(values, count, name)[0] for values, name in (
+        (latitude, 'latitude'), (longitude, 'longitude'),
+        (timezone, 'timezone')))
+    date = (datetimes[:, 0].astype(np.int64) * 100
+            + datetimes[:, 1]) * 100 + datetimes[:, 2]
+    if lat.size == lon.size == tz.size == 1:
+        # one site, a day is just the date
+        dates, days = np.unique(date, return_inverse=True)
+        sites = np.zeros((dates.size, 3), dtype=np.float32)
+        sites[:] = lat[0], lon[0], tz[0]
+    else:
+        keys = np.empty((count, 4), dtype=np.float64)
+        keys[:, 0], keys[:, 1], keys[:, 2], keys[:, 3] = lat, lon, tz, date
+        keys, days = np.unique(keys, axis=0, return_inverse=True)
+        sites, dates = keys[:, :3], keys[:, 3].astype(np.int64)
+    days = days.ravel()
+    noon = np.zeros((dates.size, 6), dtype=np.intc)
+    noon[:, 0], noon[:, 1], noon[:, 2] = (
+        dates // 10000, dates // 100 % 100, dates % 100)
+    noon[:, 3] = 12
+    # refraction isn't used, so the default SOLPOS weather is fine, and
+    # invalid days are NaN, so their rows are calculated and raise errors
+    table = get_solpos_outputs(
+        sites[:, 0], sites[:, 1], sites[:, 2], noon, 1013.0, 10.0,
+        outputs=['declin', 'tstfix'], errors='mask')[0]
+    declin = np.radians(table['declin'].astype(np.float64))[days]
+    minutes = (datetimes[:, 3] * 60.0 + datetimes[:, 4]
+               + datetimes[:, 5] / 60.0)
+    hrang = np.radians((minutes + table['tstfix'][days] - 720.0) / 4.0)
+    phi = np.radians(np.asarray(sites[:, 0], dtype=np.float64))[days]
+    coszen = (np.sin(phi) * np.sin(declin)
+              + np.cos(phi) * np.cos(declin) * np.cos(hrang))
+    # invalid times are never night, so these rows are calculated and raise
+    # errors
+    valid = ((datetimes[:, 3] >= 0) & (datetimes[:, 3] <= 24)
+             & (datetimes[:, 4] >= 0) & (datetimes[:, 4] <= 59)
+             & (datetimes[:, 5] >= 0) & (datetimes[:, 5] <= 59))
+    night = valid & (coszen < np.cos(np.radians(zenith)))
+    return np.flatnonzero(~night)
+
+
+def _chunk(rows, step, index):
+    """
+    Slice per-row inputs, but not a single row that is broadcast.
+
+    :param rows: rows of inputs
+    :type rows: :class:`numpy.ndarray`
+    :param step: 0 if ``rows`` is broadcast, otherwise 1
+    :type step: int
+    :param index: rows to get
+    :type index: slice
+    :returns: rows in ``index`` or all ``rows`` if broadcast
+    """
+    return rows[index] if step else rows
+
+
+def _num_threads(num_threads):
+    """
+    Get the number of threads to use.
+
+    :param num_threads: number of threads, ``None`` to use every CPU
+    :type num_threads: int
+    :rtype: int
+    """
+    if num_threads is None:
+        return os.cpu_count() or 1
+    return max(1, int(num_threads))
+
+
+def _map_chunks(func, count, num_threads=1):
+    """
+    Call ``func(start, stop)`` for contiguous chunks of ``count`` rows.
+
+    :param func: callback that computes rows in [start, stop)
+    :param count: number of rows
+    :type count: int
+    :param num_threads: number of threads, ``None`` to use every CPU
+    :type num_threads: int
+    :returns: list of the values returned by ``func`` in order of the chunks
+    """
+    num_threads = max(1, min(_num_threads(num_threads), count))
+    if num_threads == 1:
+        return [func(0, count)]
+    bounds = np.linspace(0, count, num_threads + 1).astype(int)
+    with ThreadPoolExecutor(num_threads) as pool:
+        return list(pool.map(func, bounds[:-1], bounds[1:]))
+
+
+def _as_datetime64(value):
+    """
+    Convert a datetime to a NumPy ``datetime64`` in seconds.
+
+    :param value: a :class:`datetime.datetime`, :class:`numpy.datetime64`,
+        ISO 8601 string or [year, month, day, hour, minute, second]
+    :rtype: :class:`numpy.datetime64`
+    """
+    if isinstance(value, (tuple, list)):
+        value = pydatetime.datetime(*value)
+    return np.datetime64(value, 's')
+
+
+def _as_timedelta64(freq):
+    """
+    Convert a frequency to a NumPy ``timedelta64`` in seconds.
+
+    :param freq: a :class:`datetime.timedelta`, :class:`numpy.timedelta64`,
+        number of seconds or string like ``'1h'``, ``'15min'`` or ``'30s'``
+    :rtype: :class:`numpy.timedelta64`
+    :raises: :exc:`ValueError` if ``freq`` isn't a positive whole number of
+        seconds
+    """
+    if isinstance(freq, str):
+        match = re.match(r'^\s*(\d*)\s*([A-Za-z]+)\s*$', freq)
+        if not match or match.group(2) not in FREQ_UNITS:
+            raise ValueError('unknown frequency "%s"' % freq)
+        freq = np.timedelta64(int(match.group(1) or 1),
+                              FREQ_UNITS[match.group(2)])
+    elif isinstance(freq, (pydatetime.timedelta, np.timedelta64)):
+        freq = np.timedelta64(freq)
+    else:
+        if freq != int(freq):
+            raise ValueError('freq must be a whole number of seconds')
+        freq = np.timedelta64(int(freq), 's')
+    if freq % np.timedelta64(1, 's') or freq < np.timedelta64(1, 's'):
+        raise ValueError('freq must be a positive whole number of seconds')
+    return freq.astype('m8[s]')
+
+
+def _datetime_fields(stamps, out):
+    """
+    Split ``datetime64`` stamps into year, month, day, hour, minute and
+    second without creating a Python object per stamp.
+
+    :param stamps: datetimes in seconds
+    :type stamps: :class:`numpy.ndarray`
+    :param out: (N, 6) C ``int`` array to write the fields into
+    :type out: :class:`numpy.ndarray`
+    :returns: ``out``
+    """
+    days = stamps.astype('M8[D]')
+    months = days.astype('M8[M]')
+    seconds = (stamps - days).astype(np.int64)
+    out[:, 0] = months.astype('M8[Y]').astype(np.int64) + 1970
+    out[:, 1] = months.astype(np.int64) % 12 + 1
+    out[:, 2] = (days - months).astype(np.int64) + 1
+    out[:, 3] = seconds // 3600
+    out[:, 4] = seconds // 60 % 60
+    out[:, 5] = seconds % 60
+    return out
+
+
+def _datetime_stamps(datetimes):
+    """
+    Join rows of year, month, day, hour, minute and second into
+    ``datetime64`` stamps, the inverse of :func:`_datetime_fields`.
+
+    :param datetimes: (N, 6) array from :func:`_as_datetimes`
+    :returns: datetimes in seconds, fields out of range carry over
+    :rtype: :class:`numpy.ndarray`
+    """
+    fields = datetimes.astype(np.int64)
+    months = (fields[:, 0] - 1970) * 12 + fields[:, 1] - 1
+    days = months.astype('M8[M]').astype('M8[D]').astype(np.int64)
+    seconds = ((days + fields[:, 2] - 1) * 86400 + fields[:, 3] * 3600
+               + fields[:, 4] * 60 + fields[:, 5])
+    return seconds.astype('M8[s]')
+
+
+def datetime_range(start, end, freq='1h'):
+    """
+    Get a range of datetimes as rows of [year, month, day, hour, minute,
+    second].
+
+    :param start: first datetime
+    :type start: :class:`datetime.datetime`
+    :param end: end of the range, not included
+    :type end: :class:`datetime.datetime`
+    :param freq: step between datetimes, a whole number of seconds
+    :type freq: :class:`datetime.timedelta`
+    :returns: (N, 6) array of C ``int``
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`ValueError` if ``freq`` isn't a positive whole number of
+        seconds
+
+    The ``start`` and ``end`` can also be :class:`numpy.datetime64`, ISO 8601
+    strings or [year, month, day, hour, minute, second]. The ``freq`` can also
+    be a :class:`numpy.timedelta64`, a number of seconds or a string with a
+    count and one of the units in :data:`FREQ_UNITS` like ``'15min'``. The
+    fields are calculated with NumPy ``datetime64`` arithmetic, so leap years
+    are included and no Python object is created per datetime. The result can
+    be passed to any function that takes ``datetimes`` without a copy.
+
+    **Example:**
+
+    >>> datetimes = datetime_range('2016-01-01', '2017-01-01', '1h')
+    >>> datetimes.shape
+    (8784, 6)
+    """
+    start, end = _as_datetime64(start), _as_datetime64(end)
+    freq = _as_timedelta64(freq)
+    stamps = np.arange(start, end, freq)
+    return _datetime_fields(stamps, np.empty((stamps.size, 6), dtype=np.intc))
+
+
+@instrument
+def get_solpos8760(location, year, weather, num_threads=1, errors='raise',
+                   skip_night=False):
     """
     Get SOLPOS hourly calculation for specified non-leap year.
 
@@ -54,8 +625,16 @@ def get_solpos8760(location, year, weather):
     :type year: int
     :param weather: [ambient-pressure (mB), ambient-temperature (C)]
     :type weather: float
-    :returns: angles [degrees], airmass [atm]
-    :rtype: float
+    :param num_threads: number of native threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param errors: ``'raise'`` or ``'mask'`` rows with SOLPOS errors
+    :type errors: str
+    :param skip_night: don't calculate rows at night, see
+        :func:`get_solposAM`
+    :type skip_night: bool
+    :returns: angles [degrees], airmass [atm] and, if ``errors='mask'``,
+        err_code
+    :rtype: :class:`numpy.ndarray`
     :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
 
     **Example:**
@@ -64,14 +643,77 @@ def get_solpos8760(location, year, weather):
     >>> weather = [1015.62055, 40.0]
     >>> angles, airmass = get_solpos8760(location, 2013, weather)
     """
-    datetimes = [
-        (pydatetime.datetime(year, 1, 1, 0, 0, 0)
-         + pydatetime.timedelta(hours=h)).timetuple()[:6]
-        for h in range(8760)]
-    return get_solposAM(location, datetimes, weather)
+    datetimes = datetime_range(
+        (year, 1, 1), np.datetime64('%04d-01-01' % year) + 365, '1h')
+    return get_solposAM(location, datetimes, weather, num_threads, errors,
+                        skip_night=skip_night)
+
+
+@instrument
+def get_solpos_range(location, start, end, freq, weather, num_threads=1,
+                     errors='raise'):
+    """
+    Get SOLPOS calculation for a range of datetimes.
+
+    :param location: [latitude, longitude, UTC-timezone]
+    :type location: float
+    :param start: first datetime
+    :type start: :class:`datetime.datetime`
+    :param end: end of the range, not included
+    :type end: :class:`datetime.datetime`
+    :param freq: step between datetimes, a whole number of seconds
+    :type freq: :class:`datetime.timedelta`
+    :param weather: [ambient-pressure (mB), ambient-temperature (C)]
+    :type weather: float
+    :param num_threads: number of native threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param errors: ``'raise'`` or ``'mask'`` rows with SOLPOS errors
+    :type errors: str
+    :returns: angles [degrees], airmass [atm] and, if ``errors='mask'``,
+        err_code
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    The ``start``, ``end`` and ``freq`` are the same as in
+    :func:`datetime_range`, so ranges can span leap years and several years
+    with steps of a day down to a second. The datetimes are generated and
+    calculated :data:`RANGE_CHUNK` rows at a time, so a year of 1-second data
+    only needs memory for the results.
+
+    **Example:**
+
+    >>> location = [35.56836, -119.2022, -8.0]
+    >>> weather = [1015.62055, 40.0]
+    >>> angles, airmass = get_solpos_range(
+    ...     location, '2016-01-01', '2017-01-01', '1min', weather)
+    >>> angles.shape
+    (527040, 2)
+    """
+    _check_errors(errors)
+    start, end = _as_datetime64(start), _as_datetime64(end)
+    freq = _as_timedelta64(freq)
+    count = max(0, -(-(end - start) // freq))
+    angles = np.empty((count, 2), dtype=np.float32)
+    airmass = np.empty((count, 2), dtype=np.float32)
+    err_code = np.empty(count, dtype=C_LONG)
+    datetimes = np.empty((min(count, RANGE_CHUNK), 6), dtype=np.intc)
+    for first in range(0, count, RANGE_CHUNK):
+        rows = slice(first, min(first + RANGE_CHUNK, count))
+        stamps = start + np.arange(rows.start, rows.stop) * freq
+        _datetimes = _datetime_fields(stamps, datetimes[:stamps.size])
+        result = get_solposAM(location, _datetimes, weather, num_threads,
+                              errors)
+        angles[rows], airmass[rows] = result[:2]
+        if errors == 'mask':
+            err_code[rows] = result[2]
+    if errors == 'mask':
+        return angles, airmass, err_code
+    return angles, airmass
 
 
-def get_solposAM(location, datetimes, weather):
+@instrument
+def get_solposAM(location, datetimes, weather, num_threads=1,
+                 errors='raise', outputs=None, skip_night=False, out=None):
     """
     Get SOLPOS hourly calculation for sequence of datetimes.
 
@@ -81,10 +723,60 @@ def get_solposAM(location, datetimes, weather):
     :type datetimes: int
     :param weather: [ambient-pressure (mB), ambient-temperature (C)]
     :type weather: float
-    :returns: angles [degrees], airmass [atm]
-    :rtype: float
+    :param num_threads: number of native threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param errors: ``'raise'`` or ``'mask'`` rows with SOLPOS errors
+    :type errors: str
+    :param outputs: names of the outputs to get from
+        :data:`SOLPOS_OUTPUTS`, ``None`` for angles and airmass
+    :type outputs: list
+    :param skip_night: don't calculate rows at night
+    :type skip_night: bool
+    :param out: buffers for the angles, airmass and, if ``errors='mask'``,
+        err_code the library writes into
+    :type out: tuple
+    :returns: angles [degrees], airmass [atm] and, if ``errors='mask'``,
+        err_code
+    :rtype: :class:`numpy.ndarray`
     :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
 
+    The ``datetimes`` can be a sequence of tuples, or an (N, 6) array or any
+    buffer-protocol object of C ``int``. A C-contiguous ``int32`` array is
+    passed straight to the library without a copy. The angles and air mass
+    are (N, 2) arrays of ``float32`` filled in place by the library.
+
+    The rows are independent, so with ``num_threads`` greater than one the
+    library splits them across OS threads, without holding the GIL, and the
+    results are identical to the serial loop.
+
+    By default the first row with an error raises
+    :exc:`~solar_utils.exceptions.SOLPOS_Error`. With ``errors='mask'``
+    nothing is raised, rows with errors are filled with NaN and the SOLPOS
+    error code bitmask of every row is also returned. Use
+    :func:`decode_solpos_errors` to get the names of the errors.
+
+    With ``outputs``, only the requested outputs are calculated and allocated
+    and a dictionary of them is returned instead, as in
+    :func:`get_solpos_outputs`. For example, ``outputs=['zenref']`` skips the
+    azimuth and air mass calculations and doesn't allocate the angles,
+    airmass, settings, orientation and shadowband arrays.
+
+    With ``skip_night=True``, a table of the declination and equation of
+    time is calculated once per day, the zenith of each row is estimated from
+    it, and only rows up to :data:`NIGHT_ZENITH` are calculated, which is
+    about half of the rows of a long run. The other rows are filled with NaN,
+    and their err_code is 0. Every row with air mass is still calculated,
+    even near the poles.
+
+    With ``out``, the library writes straight into the caller's buffers
+    instead of new arrays, and the other outputs of the library go to scratch
+    buffers kept per thread, so a loop over batches of the same size doesn't
+    allocate any arrays after the first call. There is one buffer per result,
+    NumPy arrays or writable buffer-protocol objects of the same dtype and
+    size, and views of them are returned, or the same arrays if they already
+    have the right shape. ``out`` can't be used with ``outputs`` or
+    ``skip_night``.
+
     **Example:**
 
     >>> location = [35.56836, -119.2022, -8.0]
@@ -94,45 +786,688 @@ def get_solposAM(location, datetimes, weather):
     ...     for h in range(1000)]
     >>> weather = [1015.62055, 40.0]
     >>> angles, airmass = get_solposAM(location, datetimes, weather)
+    >>> datetimes = np.array(datetimes, dtype=np.int32)  # no copy
+    >>> angles, airmass = get_solposAM(location, datetimes, weather)
+    >>> zenith = get_solposAM(
+    ...     location, datetimes, weather, outputs=['zenref'])['zenref']
+    >>> out = (np.empty((1000, 2), dtype=np.float32),
+    ...        np.empty((1000, 2), dtype=np.float32))
+    >>> angles, airmass = get_solposAM(location, datetimes, weather, out=out)
+    >>> angles is out[0]
+    True
+    """
+    if out is not None and (outputs is not None or skip_night):
+        raise ValueError("out can't be used with outputs or skip_night")
+    if outputs is not None or skip_night:
+        return get_solposAM_rows(
+            location[0], location[1], location[2], datetimes, weather[0],
+            weather[1], num_threads=num_threads, errors=errors,
+            outputs=outputs, skip_night=skip_night)
+    _check_errors(errors)
+    _datetimes = _as_datetimes(datetimes)
+    count = _datetimes.shape[0]
+    if out is None:
+        buffers = _solposAM_buffers(count)
+    else:
+        buffers = _solposAM_out(out, count, errors)
+    return _solposAM_into(location, _datetimes, weather, num_threads, errors,
+                          buffers)
+
+
+def _solposAM_buffers(count):
+    """
+    Allocate the outputs of the native ``get_solposAM`` for ``count`` rows.
+
+    :returns: angles, airmass, settings, orientation, shadowband and err_code
+    :rtype: tuple
+    """
+    return (np.empty((count, 2), dtype=np.float32),
+            np.empty((count, 2), dtype=np.float32),
+            np.empty((count, 2), dtype=np.intc),
+            np.empty((count, 2), dtype=np.float32),
+            np.empty((count, 3), dtype=np.float32),
+            np.empty(count, dtype=C_LONG))
+
+
+def _solposAM_out(out, count, errors):
+    """
+    Get the outputs of the native ``get_solposAM`` for ``count`` rows from
+    caller-supplied buffers and per-thread scratch buffers.
+
+    :param out: angles, airmass and, if ``errors='mask'``, err_code
+    :returns: the same as :func:`_solposAM_buffers`
+    :raises: :exc:`ValueError` if the buffers don't match the results
+    """
+    names = ('angles', 'airmass', 'err_code')[:3 if errors == 'mask' else 2]
+    if len(out) != len(names):
+        raise ValueError('out must be (%s)' % ', '.join(names))
+    angles = _as_out(out[0], (count, 2), np.float32, 'angles')
+    airmass = _as_out(out[1], (count, 2), np.float32, 'airmass')
+    if errors == 'mask':
+        err_code = _as_out(out[2], (count,), C_LONG, 'err_code')
+    else:
+        err_code = _scratch('err_code', (count,), C_LONG)
+    return (angles, airmass, _scratch('settings', (count, 2), np.intc),
+            _scratch('orientation', (count, 2), np.float32),
+            _scratch('shadowband', (count, 3), np.float32), err_code)
+
+
+def _solposAM_into(location, datetimes, weather, num_threads, errors,
+                   buffers):
     """
-    count = len(datetimes)
-    # load the DLL
-    solposAM_dll = ctypes.cdll.LoadLibrary(SOLPOSAMDLL)
-    _get_solposAM = solposAM_dll.get_solposAM
+    Call the native ``get_solposAM`` writing into existing buffers.
+
+    :param datetimes: (N, 6) array from :func:`_as_datetimes`
+    :param buffers: outputs from :func:`_solposAM_buffers` with N rows
+    :returns: angles, airmass and, if ``errors='mask'``, err_code, the same
+        as :func:`get_solposAM`
+    :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+    """
+    count = datetimes.shape[0]
+    angles, airmass, settings, orientation, shadowband, err_code = buffers
+    # get the DLL, loaded once per process
+    _get_solposAM = load_solposAM().get_solposAM
     # cast Python types as ctypes
     _location = (ctypes.c_float * 3)(*location)
-    _datetime = ((ctypes.c_int * 6) * count)(*datetimes)
     _weather = (ctypes.c_float * 2)(*weather)
+    # call, passing pointers to the NumPy buffers
+    retval = native(
+        count, _get_solposAM,
+        _location, datetimes.ctypes.data_as(INT6_P), _weather, count,
+        angles.ctypes.data_as(FLOAT2_P), airmass.ctypes.data_as(FLOAT2_P),
+        settings.ctypes.data_as(INT2_P), orientation.ctypes.data_as(FLOAT2_P),
+        shadowband.ctypes.data_as(FLOAT3_P), err_code.ctypes.data_as(LONG_P),
+        _num_threads(num_threads))
+    if (retval != 0): raise RuntimeError('solposAM did not execute')
+    bad_rows = np.flatnonzero(err_code)
+    if errors == 'mask':
+        angles[bad_rows] = np.nan
+        airmass[bad_rows] = np.nan
+        return angles, airmass, err_code
+    if not bad_rows.size:
+        return angles, airmass
+    n = bad_rows[0]
+    # convert err_code to bits
+    _code = _int2bits(err_code[n])
+    # copy rows of buffers that can be reused
+    data = {'location': location,
+            'datetime': datetimes[n].tolist(),
+            'weather': weather,
+            'angles': angles[n].copy(),
+            'airmass': airmass[n].copy(),
+            'settings': settings[n].copy(),
+            'orientation': orientation[n].copy(),
+            'shadowband': shadowband[n].copy()}
+    raise SOLPOS_Error(_code, data)
+
+
+@instrument
+def get_solposAM_rows(latitude, longitude, timezone, datetimes, pressure,
+                      temperature, num_threads=1, errors='raise',
+                      outputs=None, skip_night=False):
+    """
+    Get SOLPOS calculation for a sequence of datetimes with location and
+    weather given per row.
+
+    :param latitude: latitude [degrees], scalar or one per row
+    :type latitude: float
+    :param longitude: longitude [degrees], scalar or one per row
+    :type longitude: float
+    :param timezone: UTC-timezone [hours], scalar or one per row
+    :type timezone: float
+    :param datetimes: [year, month, day, hour, minute, second]
+    :type datetimes: int
+    :param pressure: ambient-pressure [mB], scalar or one per row
+    :type pressure: float
+    :param temperature: ambient-temperature [C], scalar or one per row
+    :type temperature: float
+    :param num_threads: number of native threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param errors: ``'raise'`` or ``'mask'`` rows with SOLPOS errors
+    :type errors: str
+    :param outputs: names of the outputs to get from
+        :data:`SOLPOS_OUTPUTS`, ``None`` for angles and airmass
+    :type outputs: list
+    :param skip_night: don't calculate rows at night
+    :type skip_night: bool
+    :returns: angles [degrees], airmass [atm] and, if ``errors='mask'``,
+        err_code
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    Scalars are broadcast to every row without being copied, so a whole fleet
+    of sites with measured weather is computed in a single call to the
+    library. The ``datetimes``, ``errors``, ``outputs`` and ``skip_night`` are
+    handled as in :func:`get_solposAM`, with the table of night rows
+    calculated once per site and day.
+
+    **Example:**
+
+    >>> latitude = [35.56836, 33.65]
+    >>> longitude = [-119.2022, -84.43]
+    >>> timezone = [-8.0, -5.0]
+    >>> datetimes = [[2013, 6, 5, 12, 31, 0]] * 2
+    >>> pressure = [1015.62055, 1006.0]
+    >>> angles, airmass = get_solposAM_rows(
+    ...     latitude, longitude, timezone, datetimes, pressure, 40.0)
+    """
+    if skip_night:
+        _check_errors(errors)
+        _datetimes = _as_datetimes(datetimes)
+        day = _daylight(latitude, longitude, timezone, _datetimes)
+        result = get_solposAM_rows(
+            _take_rows(latitude, day), _take_rows(longitude, day),
+            _take_rows(timezone, day), _datetimes[day],
+            _take_rows(pressure, day), _take_rows(temperature, day),
+            num_threads=num_threads, errors=errors, outputs=outputs)
+        return _scatter(result, day, _datetimes.shape[0], np.nan)
+    if outputs is not None:
+        return get_solpos_outputs(
+            latitude, longitude, timezone, datetimes, pressure, temperature,
+            outputs=outputs, num_threads=num_threads, errors=errors)
+    _check_errors(errors)
+    _datetimes = _as_datetimes(datetimes)
+    count = _datetimes.shape[0]
+    # get the DLL, loaded once per process
+    _get_solposAM_rows = load_solposAM().get_solposAM_rows
+    # broadcast scalars with a step of zero
+    columns = [
+        _as_column(latitude, count, 'latitude'),
+        _as_column(longitude, count, 'longitude'),
+        _as_column(timezone, count, 'timezone'),
+        _as_column(pressure, count, 'pressure'),
+        _as_column(temperature, count, 'temperature')]
+    (lat, lon, tz, press, temp), steps = zip(*columns)
+    _steps = (ctypes.c_int * 5)(*steps)
     # allocate space for results
-    angles = ((ctypes.c_float * 2) * count)()
-    airmass = ((ctypes.c_float * 2) * count)()
-    settings = ((ctypes.c_int * 2) * count)()
-    orientation = ((ctypes.c_float * 2) * count)()
-    shadowband = ((ctypes.c_float * 3) * count)()
-    err_code = (ctypes.c_long * count)()
-    # call
-    retval = _get_solposAM(
-        _location, _datetime, _weather, count, angles, airmass, settings,
-        orientation, shadowband, err_code)
+    angles = np.empty((count, 2), dtype=np.float32)
+    airmass = np.empty((count, 2), dtype=np.float32)
+    settings = np.empty((count, 2), dtype=np.intc)
+    orientation = np.empty((count, 2), dtype=np.float32)
+    shadowband = np.empty((count, 3), dtype=np.float32)
+    err_code = np.empty(count, dtype=C_LONG)
+    # call, passing pointers to the NumPy buffers
+    retval = native(
+        count, _get_solposAM_rows,
+        lat.ctypes.data_as(FLOAT_P), lon.ctypes.data_as(FLOAT_P),
+        tz.ctypes.data_as(FLOAT_P), _datetimes.ctypes.data_as(INT6_P),
+        press.ctypes.data_as(FLOAT_P), temp.ctypes.data_as(FLOAT_P), _steps,
+        count, angles.ctypes.data_as(FLOAT2_P),
+        airmass.ctypes.data_as(FLOAT2_P), settings.ctypes.data_as(INT2_P),
+        orientation.ctypes.data_as(FLOAT2_P),
+        shadowband.ctypes.data_as(FLOAT3_P), err_code.ctypes.data_as(LONG_P),
+        _num_threads(num_threads))
     if (retval != 0): raise RuntimeError('solposAM did not execute')
-    if all(ec == 0 for ec in err_code):
+    bad_rows = np.flatnonzero(err_code)
+    if errors == 'mask':
+        angles[bad_rows] = np.nan
+        airmass[bad_rows] = np.nan
+        return angles, airmass, err_code
+    if not bad_rows.size:
         return angles, airmass
+    n = bad_rows[0]
+    # convert err_code to bits
+    _code = _int2bits(err_code[n])
+    data = {'location': [lat[n * steps[0]], lon[n * steps[1]],
+                         tz[n * steps[2]]],
+            'datetime': _datetimes[n].tolist(),
+            'weather': [press[n * steps[3]], temp[n * steps[4]]],
+            'angles': angles[n],
+            'airmass': airmass[n],
+            'settings': settings[n],
+            'orientation': orientation[n],
+            'shadowband': shadowband[n]}
+    raise SOLPOS_Error(_code, data)
+
+
+def _catmull_rom(values):
+    """
+    Get the coefficients of Catmull-Rom splines between each of the middle
+    two of four evenly spaced knots.
+
+    :param values: values at the knots with shape (4, N)
+    :returns: coefficients of :math:`t^0` to :math:`t^3` with shape (N, 4),
+        where :math:`t` is the fraction of the interval between the middle
+        knots
+    """
+    p0, p1, p2, p3 = values
+    return np.column_stack([
+        p1, 0.5 * (p2 - p0), p0 - 2.5 * p1 + 2.0 * p2 - 0.5 * p3,
+        0.5 * (p3 - p0) + 1.5 * (p1 - p2)])
+
+
+def _out_of_range(datetimes, stamps):
+    """
+    Find rows of datetimes with fields out of range, that SOLPOS either
+    rejects or carries over differently than :func:`_datetime_stamps`.
+
+    :param datetimes: (N, 6) array from :func:`_as_datetimes`
+    :param stamps: datetimes in seconds from :func:`_datetime_stamps`
+    :returns: mask of rows with fields out of range
+    :rtype: :class:`numpy.ndarray`
+    """
+    # fields below their minimum wrap around to large unsigned values
+    fields = (datetimes[:, 1:] - np.array([1, 1, 0, 0, 0], dtype=np.intc))
+    bad = np.any(fields.view(np.uintc)
+                 > np.array([11, 30, 23, 59, 59], dtype=np.uintc), axis=1)
+    # only days at the end of months can be past the end of the month
+    rows = np.flatnonzero(datetimes[:, 2] > 28)
+    bad[rows] |= np.any(_datetime_fields(
+        stamps[rows], np.empty((rows.size, 6), dtype=np.intc))
+        != datetimes[rows], axis=1)
+    return bad
+
+
+@instrument
+def get_solposAM_approx(location, datetimes, weather,
+                        knot_interval=KNOT_INTERVAL, num_threads=1,
+                        errors='raise'):
+    """
+    Get an approximate SOLPOS calculation for a dense sequence of datetimes
+    by interpolating between knots.
+
+    :param location: [latitude, longitude, UTC-timezone]
+    :type location: float
+    :param datetimes: [year, month, day, hour, minute, second]
+    :type datetimes: int
+    :param weather: [ambient-pressure (mB), ambient-temperature (C)]
+    :type weather: float
+    :param knot_interval: seconds between knots, see
+        :func:`datetime_range` for other types
+    :type knot_interval: int
+    :param num_threads: number of native threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param errors: ``'raise'`` or ``'mask'`` rows with SOLPOS errors
+    :type errors: str
+    :returns: angles [degrees], airmass [atm] and, if ``errors='mask'``,
+        err_code
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    SOLPOS is calculated exactly at knots every ``knot_interval`` seconds
+    around the datetimes, and zenith and azimuth are interpolated between
+    the four knots around each datetime with a cubic Catmull-Rom spline.
+    Azimuth is interpolated the short way around north and airmass is
+    calculated from the interpolated zenith like SOLPOS does. Rows are
+    recalculated with knots :data:`APPROX_REFINE` times closer instead if
+    their knots are on both sides of one of the :data:`APPROX_BANDS`, where
+    SOLPOS branches, if azimuth turns more than :data:`APPROX_MAX_TURN`
+    between knots, which it does when the sun passes near the zenith, or if
+    the row or its knots have SOLPOS errors. Rows are calculated exactly
+    once there would be as many knots as rows, and SOLPOS errors are handled
+    as in :func:`get_solposAM`.
+
+    With the default 10 minute knots the maximum error relative to
+    :func:`get_solposAM` is less than 0.005 degrees of zenith, 0.5 degrees
+    of azimuth and 0.2% of airmass. Deep in the night SOLPOS limits zenith
+    to 99 degrees and azimuth is calculated from the limited zenith, so at
+    night azimuth is only within 3 degrees. SOLPOS is called for about a
+    quarter as many rows as there are of 1-minute data and for less than a
+    tenth of 10-second or 1-second data.
+
+    **Example:**
+
+    >>> location = [35.56836, -119.2022, -8.0]
+    >>> weather = [1015.62055, 40.0]
+    >>> datetimes = datetime_range('2017-06-05', '2017-06-06', '1s')
+    >>> angles, airmass = get_solposAM_approx(location, datetimes, weather)
+    """
+    _check_errors(errors)
+    _datetimes = _as_datetimes(datetimes)
+    count = _datetimes.shape[0]
+    if not count:
+        return get_solposAM(location, _datetimes, weather, num_threads,
+                            errors)
+    interval = int(_as_timedelta64(knot_interval).astype(np.int64))
+    stamps = _datetime_stamps(_datetimes)
+    seconds = stamps.astype(np.int64)
+    # calculate SOLPOS once at each knot around the datetimes
+    lower = seconds // interval
+    if np.all(lower[1:] >= lower[:-1]):
+        # datetimes are usually in order, so don't sort them
+        lower_knots = lower[np.diff(lower, prepend=lower[0] - 1) != 0]
     else:
-        for n, ec in enumerate(err_code):
-            if ec == 0: continue
-            # convert err_code to bits
-            _code = _int2bits(ec)
-            data = {'location': location,
-                    'datetime': datetimes[n],
-                    'weather': weather,
-                    'angles': angles[n],
-                    'airmass': airmass[n],
-                    'settings': settings[n],
-                    'orientation': orientation[n],
-                    'shadowband': shadowband[n]}
-            raise SOLPOS_Error(_code, data)
+        lower_knots = np.unique(lower)
+    knots = np.unique(lower_knots + np.arange(-1, 3)[:, None])
+    if knots.size >= count:
+        # no faster than calculating every row
+        return get_solposAM(location, _datetimes, weather, num_threads,
+                            errors)
+    knot_datetimes = _datetime_fields(
+        (knots * interval).astype('M8[s]'),
+        np.empty((knots.size, 6), dtype=np.intc))
+    knot_angles, _, knot_errors = get_solposAM(
+        location, knot_datetimes, weather, num_threads, errors='mask')
+    segment = np.searchsorted(knots, lower) - 1
+    # splines between every pair of consecutive knots, from the knots before
+    # and after them, with azimuth unwrapped the short way around north
+    zenith = knot_angles[:, 0].astype(np.float64)
+    azimuth = knot_angles[:, 1].astype(np.float64)
+    turns = (np.diff(azimuth) + 180.0) % 360.0 - 180.0
+    zeniths = np.stack([zenith[:-3], zenith[1:-2], zenith[2:-1], zenith[3:]])
+    azimuths = azimuth[1:-2] + np.stack([
+        -turns[:-2], np.zeros(turns.size - 2), turns[1:-1],
+        turns[1:-1] + turns[2:]])
+    # recalculate rows across branches of SOLPOS, near the zenith or with
+    # errors, deep in the night SOLPOS limits zenith so the knots are the same
+    lowest, highest = zeniths.min(axis=0), zeniths.max(axis=0)
+    approx = ~((np.any([(lowest < top) & (highest > bottom)
+                        for bottom, top in APPROX_BANDS], axis=0)
+                & (lowest != highest))
+               | (np.abs(np.stack([turns[:-2], turns[1:-1], turns[2:]]))
+                  .max(axis=0) > APPROX_MAX_TURN)
+               | (np.stack([knot_errors[:-3], knot_errors[1:-2],
+                            knot_errors[2:-1], knot_errors[3:]]) != 0)
+               .any(axis=0))
+    # interpolate
+    weight = ((seconds - lower * interval) * (1.0 / interval)).astype(
+        np.float32)
+    angles = np.empty((count, 2), dtype=np.float32)
+    for column, values in enumerate((zeniths, azimuths)):
+        coefficients = _catmull_rom(values).astype(np.float32).take(
+            segment, axis=0)
+        angles[:, column] = coefficients[:, 0] + weight * (
+            coefficients[:, 1] + weight * (
+                coefficients[:, 2] + weight * coefficients[:, 3]))
+    # azimuth is within a few degrees of 0 to 360 degrees
+    azimuth = angles[:, 1]
+    azimuth[azimuth < 0.0] += 360.0
+    azimuth[azimuth >= 360.0] -= 360.0
+    # airmass from the interpolated zenith, like SOLPOS amass()
+    zenith = angles[:, 0]
+    night = zenith > 93.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        amass = 1.0 / (np.cos(np.radians(zenith)) + np.float32(0.50572)
+                       * (np.float32(96.07995) - zenith)
+                       ** np.float32(-1.6364))
+    amass[night] = -1.0
+    airmass = np.empty((count, 2), dtype=np.float32)
+    airmass[:, 0] = amass
+    amass *= np.float32(weather[0]) / np.float32(1013.0)
+    amass[night] = -1.0
+    airmass[:, 1] = amass
+    exact = ~approx[segment] | _out_of_range(_datetimes, stamps)
+    rows = np.flatnonzero(exact)
+    interval //= APPROX_REFINE
+    if interval:
+        result = get_solposAM_approx(location, _datetimes[rows], weather,
+                                     interval, num_threads, errors)
+    else:
+        result = get_solposAM(location, _datetimes[rows], weather,
+                              num_threads, errors)
+    angles[rows], airmass[rows] = result[:2]
+    if errors == 'mask':
+        err_code = np.zeros(count, dtype=C_LONG)
+        err_code[rows] = result[2]
+        return angles, airmass, err_code
+    return angles, airmass
+
+
+@instrument
+def get_solposAM_fleet(locations, datetimes, weathers, num_threads=1,
+                       errors='raise'):
+    """
+    Get SOLPOS calculation for each site for a sequence of datetimes, sharing
+    the ephemeris between sites.
+
+    :param locations: [latitude, longitude, UTC-timezone] per site
+    :type locations: float
+    :param datetimes: [year, month, day, hour, minute, second]
+    :type datetimes: int
+    :param weathers: [ambient-pressure (mB), ambient-temperature (C)] for all
+        sites, per site or per site and datetime
+    :type weathers: float
+    :param num_threads: number of native threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param errors: ``'raise'`` or ``'mask'`` rows with SOLPOS errors
+    :type errors: str
+    :returns: angles [degrees], airmass [atm] with shape (sites, datetimes, 2)
+        and, if ``errors='mask'``, err_code with shape (sites, datetimes)
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    The time-only part of SOLPOS (day angle, earth radius vector, Julian day,
+    ecliptic coordinates, declination, right ascension and Greenwich sidereal
+    time) is the same for every site, so the library calculates it once per
+    datetime and only does the site-specific steps (local hour angle, zenith,
+    azimuth, refraction and airmass) for each site. SOLPOS converts local
+    standard time to UTC with the time zone, so the ephemeris is shared by all
+    of the sites in the same time zone. The results are identical to calling
+    :func:`get_solposAM` for each site.
+
+    The datetimes are split across ``num_threads`` OS threads.
+
+    **Example:**
+
+    >>> locations = [[35.56836, -119.2022, -8.0], [37.77, -122.42, -8.0]]
+    >>> datetimes = [(2013, 1, 1, h, 0, 0) for h in range(24)]
+    >>> weathers = [1015.62055, 40.0]
+    >>> angles, airmass = get_solposAM_fleet(locations, datetimes, weathers)
+    >>> angles.shape
+    (2, 24, 2)
+    """
+    _check_errors(errors)
+    _locations = np.ascontiguousarray(locations, dtype=np.float32)
+    _locations = _locations.reshape(-1, 3)
+    _datetimes = _as_datetimes(datetimes)
+    sites, times = _locations.shape[0], _datetimes.shape[0]
+    _weathers = np.ascontiguousarray(
+        _per_site_rows(weathers, 2, sites, times, 'weathers'))
+    # get the DLL, loaded once per process
+    _get_solposAM_fleet = load_solposAM().get_solposAM_fleet
+    # sort sites by time zone so sites in the same time zone are consecutive
+    order = np.argsort(_locations[:, 2], kind='stable').astype(np.intc)
+    steps = [
+        _weathers.shape[1] if _weathers.shape[0] > 1 else 0,
+        1 if _weathers.shape[1] > 1 else 0]
+    _steps = (ctypes.c_int * 2)(*steps)
+    # allocate space for results
+    angles = np.empty((sites, times, 2), dtype=np.float32)
+    airmass = np.empty((sites, times, 2), dtype=np.float32)
+    settings = np.empty((sites, times, 2), dtype=np.intc)
+    orientation = np.empty((sites, times, 2), dtype=np.float32)
+    shadowband = np.empty((sites, times, 3), dtype=np.float32)
+    err_code = np.empty((sites, times), dtype=C_LONG)
+    # call, passing pointers to the NumPy buffers
+    retval = native(
+        sites * times, _get_solposAM_fleet,
+        _locations.ctypes.data_as(FLOAT3_P), sites,
+        order.ctypes.data_as(INT_P), _datetimes.ctypes.data_as(INT6_P),
+        times, _weathers.ctypes.data_as(FLOAT2_P), _steps,
+        angles.ctypes.data_as(FLOAT2_P), airmass.ctypes.data_as(FLOAT2_P),
+        settings.ctypes.data_as(INT2_P), orientation.ctypes.data_as(FLOAT2_P),
+        shadowband.ctypes.data_as(FLOAT3_P), err_code.ctypes.data_as(LONG_P),
+        _num_threads(num_threads))
+    if (retval != 0): raise RuntimeError('solposAM did not execute')
+    bad_rows = np.nonzero(err_code)
+    if errors == 'mask':
+        angles[bad_rows] = np.nan
+        airmass[bad_rows] = np.nan
+        return angles, airmass, err_code
+    if not bad_rows[0].size:
+        return angles, airmass
+    s, n = bad_rows[0][0], bad_rows[1][0]
+    # convert err_code to bits
+    _code = _int2bits(err_code[s, n])
+    data = {'location': _locations[s].tolist(),
+            'datetime': _datetimes[n].tolist(),
+            'weather': _weathers[s % _weathers.shape[0],
+                                 n % _weathers.shape[1]].tolist(),
+            'angles': angles[s, n],
+            'airmass': airmass[s, n],
+            'settings': settings[s, n],
+            'orientation': orientation[s, n],
+            'shadowband': shadowband[s, n]}
+    raise SOLPOS_Error(_code, data)
+
+
+@instrument
+def get_solpos_outputs(latitude, longitude, timezone, datetimes, pressure,
+                       temperature, tilt=0.0, aspect=180.0, outputs=None,
+                       num_threads=1, errors='raise'):
+    """
+    Get any of the SOLPOS outputs for a sequence of rows in a single pass.
+
+    :param latitude: latitude [degrees] for all or each row
+    :type latitude: float
+    :param longitude: longitude [degrees] for all or each row
+    :type longitude: float
+    :param timezone: UTC-timezone for all or each row
+    :type timezone: float
+    :param datetimes: [year, month, day, hour, minute, second]
+    :type datetimes: int
+    :param pressure: ambient-pressure [mB] for all or each row
+    :type pressure: float
+    :param temperature: ambient-temperature [C] for all or each row
+    :type temperature: float
+    :param tilt: tilt of the surface from horizontal [degrees]
+    :type tilt: float
+    :param aspect: azimuth of the surface, N=0, E=90, S=180, W=270 [degrees]
+    :type aspect: float
+    :param outputs: names of the fields to get from :data:`SOLPOS_OUTPUTS`,
+        ``None`` for all of them
+    :type outputs: list
+    :param num_threads: number of native threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param errors: ``'raise'`` or ``'mask'`` rows with SOLPOS errors
+    :type errors: str
+    :returns: a dictionary of (N,) ``float32`` arrays keyed by name and, if
+        ``errors='mask'``, err_code
+    :rtype: dict
+    :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    Unlike :func:`solposAM`, which only returns zenith, azimuth and air mass
+    for a horizontal surface, any of the SOLPOS outputs can be requested so
+    that, for example, extraterrestrial irradiance (``etr``, ``etrn``,
+    ``etrtilt``), cosine of incidence (``cosinc``), sunrise and sunset
+    (``sretr``, ``ssetr``), true solar time (``tst``) and Kt-prime factors
+    (``prime``, ``unprime``) come from the same call. Every input except
+    ``datetimes`` is a scalar broadcast to every row or has one value per
+    row. Sunrise, sunset and true solar time are minutes from local midnight.
+
+    Only the requested outputs are allocated, and ``S_solpos`` is called with
+    the smallest function mask that calculates them, see
+    :func:`solpos_function_mask`, so asking for fewer outputs is faster.
+
+    **Example:**
+
+    >>> datetimes = [(2013, 6, 5, h, 0, 0) for h in range(24)]
+    >>> solpos = get_solpos_outputs(
+    ...     35.56836, -119.2022, -8.0, datetimes, 1015.62055, 40.0,
+    ...     tilt=30.0, outputs=['zenref', 'azim', 'etrn', 'cosinc'])
+    >>> sorted(solpos)
+    ['azim', 'cosinc', 'etrn', 'zenref']
+    """
+    _check_errors(errors)
+    if outputs is None:
+        outputs = SOLPOS_OUTPUTS
+    outputs = list(outputs)
+    function = solpos_function_mask(outputs)
+    _datetimes = _as_datetimes(datetimes)
+    count = _datetimes.shape[0]
+    # get the DLL, loaded once per process
+    _get_solpos_outputs = load_solposAM().get_solpos_outputs
+    # broadcast scalars with a step of zero
+    columns = [
+        _as_column(latitude, count, 'latitude'),
+        _as_column(longitude, count, 'longitude'),
+        _as_column(timezone, count, 'timezone'),
+        _as_column(pressure, count, 'pressure'),
+        _as_column(temperature, count, 'temperature'),
+        _as_column(tilt, count, 'tilt'),
+        _as_column(aspect, count, 'aspect')]
+    (lat, lon, tz, press, temp, _tilt, _aspect), steps = zip(*columns)
+    _steps = (ctypes.c_int * 7)(*steps)
+    fields = np.array([SOLPOS_OUTPUTS.index(name) for name in outputs],
+                      dtype=np.intc)
+    # allocate space for results, one contiguous row per field
+    results = np.empty((len(outputs), count), dtype=np.float32)
+    err_code = np.empty(count, dtype=C_LONG)
+    # call, passing pointers to the NumPy buffers
+    retval = native(
+        count, _get_solpos_outputs,
+        lat.ctypes.data_as(FLOAT_P), lon.ctypes.data_as(FLOAT_P),
+        tz.ctypes.data_as(FLOAT_P), _datetimes.ctypes.data_as(INT6_P),
+        press.ctypes.data_as(FLOAT_P), temp.ctypes.data_as(FLOAT_P),
+        _tilt.ctypes.data_as(FLOAT_P), _aspect.ctypes.data_as(FLOAT_P),
+        _steps, count, function, fields.ctypes.data_as(INT_P),
+        len(outputs), results.ctypes.data_as(FLOAT_P),
+        err_code.ctypes.data_as(LONG_P), _num_threads(num_threads))
+    if (retval != 0): raise RuntimeError('solposAM did not execute')
+    solpos = dict(zip(outputs, results))
+    bad_rows = np.flatnonzero(err_code)
+    if errors == 'mask':
+        results[:, bad_rows] = np.nan
+        return solpos, err_code
+    if not bad_rows.size:
+        return solpos
+    n = bad_rows[0]
+    # convert err_code to bits
+    _code = _int2bits(err_code[n])
+    data = {'location': [lat[n * steps[0]], lon[n * steps[1]],
+                         tz[n * steps[2]]],
+            'datetime': _datetimes[n].tolist(),
+            'weather': [press[n * steps[3]], temp[n * steps[4]]],
+            'orientation': [_tilt[n * steps[5]], _aspect[n * steps[6]]],
+            'outputs': dict((name, values[n])
+                            for name, values in solpos.items())}
+    raise SOLPOS_Error(_code, data)
+
+
+def _sunrise_sunset(latitude, longitude, timezone, dates, errors='mask'):
+    """
+    Calculate sunrise and sunset at local noon of each day.
+
+    :param latitude: latitude [degrees], scalar or one per day
+    :param longitude: longitude [degrees], scalar or one per day
+    :param timezone: UTC-timezone [hours], scalar or one per day
+    :param dates: (D, 3) array of year, month and day
+    :param errors: ``'raise'`` or ``'mask'`` days with SOLPOS errors
+    :returns: sunrise and sunset [minutes from local midnight]
+    """
+    datetimes = np.zeros((dates.shape[0], 6), dtype=np.intc)
+    datetimes[:, :3] = dates
+    datetimes[:, 3] = 12
+    # refraction isn't used, so the default SOLPOS weather is fine
+    solpos = get_solpos_outputs(
+        latitude, longitude, timezone, datetimes, 1013.0, 10.0,
+        outputs=['sretr', 'ssetr'], errors=errors)
+    if errors == 'mask':
+        solpos = solpos[0]
+    return solpos['sretr'], solpos['ssetr']
+
+
+@instrument
+def get_sunrise_sunset(location, dates):
+    """
+    Get a table of sunrise and sunset for a sequence of days.
+
+    :param location: [latitude, longitude, UTC-timezone]
+    :type location: float
+    :param dates: [year, month, day], extra columns like hour are ignored
+    :type dates: int
+    :returns: sunrise and sunset [minutes from local midnight]
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
 
+    Sunrise and sunset are from the SOLPOS ``srss`` calculation at local noon
+    of each day, without refraction. If the sun doesn't rise, sunrise is 2999
+    and sunset is -2999, and if it doesn't set, sunrise is -2999 and sunset is
+    2999.
 
+    **Example:**
+
+    >>> location = [35.56836, -119.2022, -8.0]
+    >>> sunrise, sunset = get_sunrise_sunset(
+    ...     location, [(2013, 6, d) for d in range(1, 31)])
+    """
+    dates = np.asarray(dates, dtype=np.intc)
+    dates = dates.reshape(-1, dates.shape[-1])[:, :3]
+    return _sunrise_sunset(location[0], location[1], location[2], dates,
+                           errors='raise')
+
+
+@instrument
 def solposAM(location, datetime, weather):
     """
     Calculate solar position and air mass by calling functions exported by
@@ -162,9 +1497,8 @@ def solposAM(location, datetime, weather):
     >>> list(airmass)
     [1.0352272987365723, 1.0379053354263306]
     """
-    # load the DLL
-    solposAM_dll = ctypes.cdll.LoadLibrary(SOLPOSAMDLL)
-    _solposAM = solposAM_dll.solposAM
+    # get the DLL, loaded once per process
+    _solposAM = load_solposAM().solposAM
     # cast Python types as ctypes
     _location = (ctypes.c_float * 3)(*location)
     _datetime = (ctypes.c_int * 6)(*datetime)
@@ -176,8 +1510,8 @@ def solposAM(location, datetime, weather):
     orientation = (ctypes.c_float * 2)()
     shadowband = (ctypes.c_float * 3)()
     # call DLL
-    err_code = _solposAM(_location, _datetime, _weather, angles, airmass,
-                         settings, orientation, shadowband)
+    err_code = native(1, _solposAM, _location, _datetime, _weather, angles,
+                      airmass, settings, orientation, shadowband)
     # return results if successful, otherwise raise SOLPOS_Error
     if err_code == 0:
         return angles, airmass
@@ -195,8 +1529,41 @@ def solposAM(location, datetime, weather):
         raise SOLPOS_Error(_code, data)
 
 
+@functools.lru_cache(maxsize=None)
+def _wavelengths():
+    """
+    Get the wavelengths [microns] of SPECTRL2 spectra, read once.
+    """
+    wavelengths = get_specx(1)
+    wavelengths.flags.writeable = False
+    return wavelengths
+
+
+def _spectral_window(window):
+    """
+    Get the indices of the wavelengths of SPECTRL2 spectra in a window.
+
+    :param window: minimum and maximum wavelength [microns], both included,
+        or ``None`` for every wavelength
+    :type window: float
+    :returns: index of the first wavelength and index after the last one
+    :rtype: tuple
+    :raises: :exc:`ValueError` if no wavelength is in the window
+    """
+    if window is None:
+        return 0, NSPEC
+    low, high = np.asarray(window, dtype=np.float32)
+    wavelengths = _wavelengths()
+    first = int(np.searchsorted(wavelengths, low, side='left'))
+    last = int(np.searchsorted(wavelengths, high, side='right'))
+    if first >= last:
+        raise ValueError('No wavelength in window %r.' % (tuple(window),))
+    return first, last
+
+
+@instrument
 def spectrl2(units, location, datetime, weather, orientation,
-             atmospheric_conditions, albedo):
+             atmospheric_conditions, albedo, window=None, out=None):
     """
     Calculate solar spectrum by calling functions exported by
     :data:`SPECTRL2DLL`.
@@ -215,6 +1582,12 @@ def spectrl2(units, location, datetime, weather, orientation,
     :type atmospheric_conditions: float
     :param albedo: 6 wavelengths and 6 reflectivities
     :type albedo: float
+    :param window: minimum and maximum wavelength [microns] calculated,
+        ``None`` for all 122
+    :type window: float
+    :param out: buffers for the diffuse, direct, extraterrestrial and global
+        spectra and the x-coordinate the library writes into
+    :type out: tuple
     :returns: spectral decomposition, x-coordinate
     :rtype: float
     :raises: :exc:`~solar_utils.exceptions.SPECTRL2_Error`,
@@ -222,6 +1595,13 @@ def spectrl2(units, location, datetime, weather, orientation,
 
     Returns the diffuse, direct, extraterrestrial and global spectral components
     on the tilted surface in as a function of x-coordinate specified by units.
+    With a ``window`` only the wavelengths in it, including its ends, are
+    calculated and returned, the same as the matching values of the whole
+    spectra. The window is always a wavelength, even for ``units`` 3.
+
+    With ``out``, the library writes straight into five buffers of ``float32``
+    of the length of the spectra, NumPy arrays or writable buffer-protocol
+    objects, and views of them are returned instead of ctypes arrays.
 
     =====  ===============================================================
     units  output units
@@ -250,11 +1630,15 @@ def spectrl2(units, location, datetime, weather, orientation,
     >>> (specdif, specdir, specetr, specglo,
          specx) = spectrl2(units, location, datetime, weather, orientation,
                            atmospheric_conditions, albedo)
+    >>> specglo = spectrl2(units, location, datetime, weather, orientation,
+    ...                    atmospheric_conditions, albedo,
+    ...                    window=[0.3, 1.2])[3]
+    >>> len(specglo)
+    72
     """
-    # load the DLL
-    ctypes.cdll.LoadLibrary(SOLPOSAMDLL)  # requires 'solpos.dll'
-    spectrl2_dll = ctypes.cdll.LoadLibrary(SPECTRL2DLL)
-    _spectrl2 = spectrl2_dll.spectrl2
+    first, last = _spectral_window(window)
+    # get the DLL, loaded once per process, also loads 'solposAM.dll'
+    _spectrl2_window = load_spectrl2().spectrl2_window
     # cast Python types as ctypes
     _location = (ctypes.c_float * 3)(*location)
     _datetime = (ctypes.c_int * 6)(*datetime)
@@ -262,25 +1646,29 @@ def spectrl2(units, location, datetime, weather, orientation,
     _orientation = (ctypes.c_float * 2)(*orientation)
     _atmospheric_conditions = (ctypes.c_float * 5)(*atmospheric_conditions)
     _albedo = (ctypes.c_float * 12)(*albedo)
-    # allocate space for results
-    specdif = (ctypes.c_float * 122)()
-    specdir = (ctypes.c_float * 122)()
-    specetr = (ctypes.c_float * 122)()
-    specglo = (ctypes.c_float * 122)()
-    specx = (ctypes.c_float * 122)()
+    # allocate space for results, or use the caller's
+    nspec = last - first
+    if out is None:
+        result = tuple((ctypes.c_float * nspec)() for _ in range(5))
+        specdif, specdir, specetr, specglo, specx = result
+    else:
+        result = _spectrl2_out(out, (nspec,))
+        specdif, specdir, specetr, specglo, specx = (
+            np.ctypeslib.as_ctypes(values) for values in result)
     angles = (ctypes.c_float * 2)()
     airmass = (ctypes.c_float * 2)()
     settings = (ctypes.c_int * 2)()
     shadowband = (ctypes.c_float * 3)()
     # call DLL
-    err_code = _spectrl2(
+    err_code = native(
+        1, _spectrl2_window,
         units, _location, _datetime, _weather, _orientation,
-        _atmospheric_conditions, _albedo, specdif, specdir, specetr, specglo,
-        specx, angles, airmass, settings, shadowband
+        _atmospheric_conditions, _albedo, first, last, specdif, specdir,
+        specetr, specglo, specx, angles, airmass, settings, shadowband
     )
     # return results if successful, otherwise raise exception
     if err_code == 0:
-        return specdif, specdir, specetr, specglo, specx
+        return result
     elif err_code < 0:
         data = {'units': units,
                 'tau500': atmospheric_conditions[3],
@@ -299,3 +1687,639 @@ def spectrl2(units, location, datetime, weather, orientation,
                 'orientation': orientation,
                 'shadowband': shadowband}
         raise SOLPOS_Error(_code, data)
+
+
+def _spectrl2_out(out, shape):
+    """
+    View the caller-supplied outputs of SPECTRL2.
+
+    :param out: diffuse, direct, extraterrestrial and global spectra and
+        x-coordinate
+    :param shape: shape of each spectra
+    :type shape: tuple
+    :returns: spectra and x-coordinate
+    :rtype: tuple
+    :raises: :exc:`ValueError` if the buffers don't match the results
+    """
+    names = ('specdif', 'specdir', 'specetr', 'specglo', 'specx')
+    if len(out) != len(names):
+        raise ValueError('out must be (%s)' % ', '.join(names))
+    shapes = (shape,) * 4 + (shape[-1:],)
+    return tuple(_as_out(values, dims, np.float32, name)
+                 for values, dims, name in zip(out, shapes, names))
+
+
+@instrument
+def get_spectrl2(units, location, datetimes, weather, orientation,
+                 atmospheric_conditions, albedo, num_threads=1,
+                 skip_night=False, window=None, out=None):
+    """
+    Calculate solar spectra for a sequence of datetimes by calling functions
+    exported by :data:`SPECTRL2DLL`.
+
+    :param units: set ``units`` = 1 for W/m\\ :sup:`2`/micron
+    :type units: int
+    :param location: latitude, longitude and UTC-timezone
+    :type location: float
+    :param datetimes: year, month, day, hour, minute and second per row
+    :type datetimes: int
+    :param weather: ambient-pressure [mB] and ambient-temperature [C]
+    :type weather: float
+    :param orientation: tilt and aspect [degrees]
+    :type orientation: float
+    :param atmospheric_conditions: alpha, assym, ozone, tau500 and watvap
+    :type atmospheric_conditions: float
+    :param albedo: 6 wavelengths and 6 reflectivities
+    :type albedo: float
+    :param num_threads: number of threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param skip_night: don't calculate rows at night
+    :type skip_night: bool
+    :param window: minimum and maximum wavelength [microns] calculated,
+        ``None`` for all 122
+    :type window: float
+    :param out: buffers for the diffuse, direct, extraterrestrial and global
+        spectra and the x-coordinate the library writes into
+    :type out: tuple
+    :returns: spectral decomposition, x-coordinate
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`~solar_utils.exceptions.SPECTRL2_Error`,
+        :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    The ``weather``, ``orientation``, ``atmospheric_conditions`` and
+    ``albedo`` are either a single row used for every datetime or one row per
+    datetime. The diffuse, direct, extraterrestrial and global spectra are
+    returned as contiguous (N, 122) arrays and the x-coordinate, which is the
+    same for every datetime, as a single (122,) array. The ``datetimes`` are
+    handled as in :func:`get_solposAM`.
+
+    SPECTRL2 is reentrant, so with ``num_threads`` greater than one the rows
+    are split into contiguous chunks that are computed in a pool of threads,
+    each writing straight into its own slice of the outputs. The results are
+    identical to a serial call.
+
+    With ``skip_night=True`` only rows up to :data:`NIGHT_ZENITH` are
+    calculated, as in :func:`get_solposAM`, and the spectra of the other rows
+    are zero.
+
+    With a ``window`` the spectra are (N, M) arrays of only the M wavelengths
+    in it, as in :func:`spectrl2`.
+
+    With ``out``, the library writes straight into the caller's buffers and
+    the solar position and error codes go to scratch buffers kept per thread,
+    as in :func:`get_solposAM`, so repeated calls of the same size don't
+    allocate any arrays. ``out`` can't be used with ``skip_night``.
+
+    .. seealso::
+        :func:`spectrl2`
+
+    **Examples:**
+
+    >>> units = 1
+    >>> location = [33.65, -84.43, -5.0]
+    >>> datetimes = [[1999, 7, 22, h, 0, 0] for h in range(6, 19)]
+    >>> weather = [1006.0, 27.0]
+    >>> orientation = [33.65, 135.0]
+    >>> atmospheric_conditions = [[1.14, 0.65, -1.0, tau500, 1.36]
+    ...                           for tau500 in np.linspace(0.1, 0.3, 13)]
+    >>> albedo = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+    >>> (specdif, specdir, specetr, specglo,
+         specx) = get_spectrl2(units, location, datetimes, weather,
+                               orientation, atmospheric_conditions, albedo)
+    """
+    if out is not None and skip_night:
+        raise ValueError("out can't be used with skip_night")
+    _datetimes = _as_datetimes(datetimes)
+    count = _datetimes.shape[0]
+    if skip_night:
+        day = _daylight(location[0], location[1], location[2], _datetimes)
+        # calculate at least one row to get the x-coordinate
+        rows = day if day.size else np.arange(min(count, 1))
+        result = get_spectrl2(
+            units, location, _datetimes[rows], _take_rows(weather, rows, 2),
+            _take_rows(orientation, rows, 2),
+            _take_rows(atmospheric_conditions, rows, 5),
+            _take_rows(albedo, rows, 12), num_threads=num_threads,
+            window=window)
+        spectra = tuple(values[:day.size] for values in result[:4])
+        return _scatter(spectra, day, count, 0.0) + (result[4],)
+    # get the DLL, loaded once per process, also loads 'solposAM.dll'
+    _get_spectrl2 = load_spectrl2().get_spectrl2
+    # cast Python types as ctypes, broadcast single rows with a step of zero
+    _location = (ctypes.c_float * 3)(*location)
+    _weather, weather_step = _as_rows(weather, 2, count, 'weather')
+    _orientation, orientation_step = _as_rows(
+        orientation, 2, count, 'orientation')
+    _atmospheric_conditions, atmospheric_conditions_step = _as_rows(
+        atmospheric_conditions, 5, count, 'atmospheric_conditions')
+    _albedo, albedo_step = _as_rows(albedo, 12, count, 'albedo')
+    _steps = (ctypes.c_int * 4)(
+        weather_step, orientation_step, atmospheric_conditions_step,
+        albedo_step)
+    first, last = _spectral_window(window)
+    _window = (ctypes.c_int * 2)(first, last)
+    # allocate space for results, or use the caller's and scratch buffers
+    nspec = last - first
+    if out is None:
+        specdif = np.empty((count, nspec), dtype=np.float32)
+        specdir = np.empty((count, nspec), dtype=np.float32)
+        specetr = np.empty((count, nspec), dtype=np.float32)
+        specglo = np.empty((count, nspec), dtype=np.float32)
+        specx = np.zeros(nspec, dtype=np.float32)
+        angles = np.empty((count, 2), dtype=np.float32)
+        airmass = np.empty((count, 2), dtype=np.float32)
+        settings = np.empty((count, 2), dtype=np.intc)
+        shadowband = np.empty((count, 3), dtype=np.float32)
+        err_code = np.empty(count, dtype=C_LONG)
+    else:
+        specdif, specdir, specetr, specglo, specx = _spectrl2_out(
+            out, (count, nspec))
+        if not count:
+            specx[:] = 0.0
+        angles = _scratch('angles', (count, 2), np.float32)
+        airmass = _scratch('airmass', (count, 2), np.float32)
+        settings = _scratch('settings', (count, 2), np.intc)
+        shadowband = _scratch('shadowband', (count, 3), np.float32)
+        err_code = _scratch('err_code', (count,), C_LONG)
+
+    def _call(start, stop):
+        """
+        Call the library for rows in [start, stop) of the inputs & outputs.
+        """
+        rows = slice(start, stop)
+        # only the first chunk writes the shared x-coordinate
+        _specx = specx if start == 0 else np.empty(nspec, dtype=np.float32)
+        return _get_spectrl2(
+            units, _location, _datetimes[rows].ctypes.data_as(INT6_P),
+            _chunk(_weather, weather_step, rows).ctypes.data_as(FLOAT2_P),
+            _chunk(_orientation, orientation_step, rows).ctypes.data_as(
+                FLOAT2_P),
+            _chunk(_atmospheric_conditions, atmospheric_conditions_step,
+                   rows).ctypes.data_as(FLOAT5_P),
+            _chunk(_albedo, albedo_step, rows).ctypes.data_as(FLOAT12_P),
+            _steps, _window, stop - start,
+            specdif[rows].ctypes.data_as(FLOAT_P),
+            specdir[rows].ctypes.data_as(FLOAT_P),
+            specetr[rows].ctypes.data_as(FLOAT_P),
+            specglo[rows].ctypes.data_as(FLOAT_P),
+            _specx.ctypes.data_as(FLOAT_P),
+            angles[rows].ctypes.data_as(FLOAT2_P),
+            airmass[rows].ctypes.data_as(FLOAT2_P),
+            settings[rows].ctypes.data_as(INT2_P),
+            shadowband[rows].ctypes.data_as(FLOAT3_P),
+            err_code[rows].ctypes.data_as(LONG_P))
+
+    # call, passing pointers to the NumPy buffers, ctypes releases the GIL so
+    # chunks of rows run concurrently in a pool of threads
+    retval = native(count, _map_chunks, _call, count, num_threads)
+    if any(retval): raise RuntimeError('spectrl2 did not execute')
+    errors = np.flatnonzero(err_code)
+    if not errors.size:
+        return specdif, specdir, specetr, specglo, specx
+    n = errors[0]
+    if err_code[n] < 0:
+        atm = _atmospheric_conditions[n * atmospheric_conditions_step]
+        data = {'units': units,
+                'tau500': atm[3],
+                'watvap': atm[4],
+                'assym': atm[1]}
+        raise SPECTRL2_Error(int(err_code[n]), data)
+    else:
+        # convert err_code to bits
+        _code = _int2bits(err_code[n])
+        # copy rows of buffers that can be reused
+        data = {'location': location,
+                'datetime': _datetimes[n].tolist(),
+                'weather': _weather[n * weather_step],
+                'angles': angles[n].copy(),
+                'airmass': airmass[n].copy(),
+                'settings': settings[n].copy(),
+                'orientation': _orientation[n * orientation_step],
+                'shadowband': shadowband[n].copy()}
+        raise SOLPOS_Error(_code, data)
+
+
+def _position_rows(values, count, name):
+    """
+    View a precomputed solar position as C ``float`` rows, one per datetime.
+
+    :param values: one row of 2 values per datetime
+    :param count: number of datetimes
+    :type count: int
+    :param name: name of the input used in error messages
+    :type name: str
+    :rtype: :class:`numpy.ndarray`
+    """
+    rows, step = _as_rows(values, 2, count, name)
+    if step == 0 and count != 1:
+        raise ValueError('%s must have %d rows' % (name, count))
+    return rows
+
+
+@instrument
+def spectrl2_position(units, location, datetime, angles, airmass,
+                      orientation, atmospheric_conditions, albedo,
+                      cosinc=None, window=None):
+    """
+    Calculate solar spectrum from a solar position calculated elsewhere by
+    calling functions exported by :data:`SPECTRL2DLL`, without SOLPOS.
+
+    :param units: set ``units`` = 1 for W/m\\ :sup:`2`/micron
+    :type units: int
+    :param location: latitude, longitude and UTC-timezone
+    :type location: float
+    :param datetime: year, month, day, hour, minute and second, only the date
+        is used
+    :type datetime: int
+    :param angles: refracted zenith and azimuth [degrees]
+    :type angles: float
+    :param airmass: airmass and pressure adjusted airmass [atm]
+    :type airmass: float
+    :param orientation: tilt and aspect [degrees]
+    :type orientation: float
+    :param atmospheric_conditions: alpha, assym, ozone, tau500 and watvap
+    :type atmospheric_conditions: float
+    :param albedo: 6 wavelengths and 6 reflectivities
+    :type albedo: float
+    :param cosinc: cosine of the angle of incidence on the tilted surface,
+        ``None`` to calculate it from ``angles`` and ``orientation``
+    :type cosinc: float
+    :param window: minimum and maximum wavelength [microns] calculated,
+        ``None`` for all 122
+    :type window: float
+    :returns: spectral decomposition, x-coordinate
+    :rtype: float
+    :raises: :exc:`~solar_utils.exceptions.SPECTRL2_Error`,
+        :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    The same as :func:`spectrl2`, but the ``angles`` and ``airmass``, as
+    returned by :func:`solposAM`, are used instead of calculating them again,
+    and only the day of year and earth radius vector are calculated from the
+    date. Only a bad month or day raises
+    :exc:`~solar_utils.exceptions.SOLPOS_Error`.
+
+    :func:`spectrl2` doesn't use the ``weather``, SPECTRL2 always calculates
+    the solar position at 1013 mB and 15 C, so its spectra are the same as
+    the spectra of the solar position from :func:`solposAM` with ``weather``
+    of ``[1013.0, 15.0]``.
+
+    **Example:**
+
+    >>> location = [33.65, -84.43, -5.0]
+    >>> datetime = [1999, 7, 22, 9, 45, 37]
+    >>> angles, airmass = solposAM(location, datetime, [1013.0, 15.0])
+    >>> (specdif, specdir, specetr, specglo,
+    ...  specx) = spectrl2_position(
+    ...     1, location, datetime, angles, airmass, [33.65, 135.0],
+    ...     [1.14, 0.65, -1.0, 0.2, 1.36],
+    ...     [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6))
+    """
+    first, last = _spectral_window(window)
+    # get the DLL, loaded once per process
+    _spectrl2_position = load_spectrl2().spectrl2_position
+    # cast Python types as ctypes
+    _location = (ctypes.c_float * 3)(*location)
+    _datetime = (ctypes.c_int * 6)(*datetime)
+    _angles = (ctypes.c_float * 2)(*angles)
+    _airmass = (ctypes.c_float * 2)(*airmass)
+    _cosinc = None if cosinc is None else (ctypes.c_float * 1)(cosinc)
+    _orientation = (ctypes.c_float * 2)(*orientation)
+    _atmospheric_conditions = (ctypes.c_float * 5)(*atmospheric_conditions)
+    _albedo = (ctypes.c_float * 12)(*albedo)
+    # allocate space for results
+    nspec = last - first
+    specdif = (ctypes.c_float * nspec)()
+    specdir = (ctypes.c_float * nspec)()
+    specetr = (ctypes.c_float * nspec)()
+    specglo = (ctypes.c_float * nspec)()
+    specx = (ctypes.c_float * nspec)()
+    # call DLL
+    err_code = native(
+        1, _spectrl2_position,
+        units, _location, _datetime, _angles, _airmass, _cosinc,
+        _orientation, _atmospheric_conditions, _albedo, first, last, specdif,
+        specdir, specetr, specglo, specx
+    )
+    # return results if successful, otherwise raise exception
+    if err_code == 0:
+        return specdif, specdir, specetr, specglo, specx
+    elif err_code < 0:
+        data = {'units': units,
+                'tau500': atmospheric_conditions[3],
+                'watvap': atmospheric_conditions[4],
+                'assym': atmospheric_conditions[1]}
+        raise SPECTRL2_Error(err_code, data)
+    else:
+        raise SOLPOS_Error(_int2bits(err_code),
+                           {'location': location, 'datetime': datetime})
+
+
+@instrument
+def get_spectrl2_position(units, location, datetimes, angles, airmass,
+                          orientation, atmospheric_conditions, albedo,
+                          cosinc=None, num_threads=1, window=None):
+    """
+    Calculate solar spectra for a sequence of datetimes from solar positions
+    calculated elsewhere by calling functions exported by
+    :data:`SPECTRL2DLL`, without SOLPOS.
+
+    :param units: set ``units`` = 1 for W/m\\ :sup:`2`/micron
+    :type units: int
+    :param location: latitude, longitude and UTC-timezone
+    :type location: float
+    :param datetimes: year, month, day, hour, minute and second per row, only
+        the dates are used
+    :type datetimes: int
+    :param angles: refracted zenith and azimuth [degrees] per row
+    :type angles: float
+    :param airmass: airmass and pressure adjusted airmass [atm] per row
+    :type airmass: float
+    :param orientation: tilt and aspect [degrees]
+    :type orientation: float
+    :param atmospheric_conditions: alpha, assym, ozone, tau500 and watvap
+    :type atmospheric_conditions: float
+    :param albedo: 6 wavelengths and 6 reflectivities
+    :type albedo: float
+    :param cosinc: cosine of the angle of incidence on the tilted surface per
+        row, ``None`` to calculate it from ``angles`` and ``orientation``
+    :type cosinc: float
+    :param num_threads: number of threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param window: minimum and maximum wavelength [microns] calculated,
+        ``None`` for all 122
+    :type window: float
+    :returns: spectral decomposition, x-coordinate
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`~solar_utils.exceptions.SPECTRL2_Error`,
+        :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    The batch version of :func:`spectrl2_position`, with the ``angles`` and
+    ``airmass`` from :func:`get_solposAM` and the rest of the inputs and the
+    outputs as in :func:`get_spectrl2`. Night rows are calculated like any
+    other, with whatever position they are given.
+
+    **Example:**
+
+    >>> location = [33.65, -84.43, -5.0]
+    >>> datetimes = datetime_range('1999-07-22 06:00', '1999-07-22 19:00',
+    ...                            '10min')
+    >>> angles, airmass = get_solposAM(location, datetimes, [1013.0, 15.0])
+    >>> (specdif, specdir, specetr, specglo,
+    ...  specx) = get_spectrl2_position(
+    ...     1, location, datetimes, angles, airmass, [33.65, 135.0],
+    ...     [1.14, 0.65, -1.0, 0.2, 1.36],
+    ...     [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6))
+    """
+    _datetimes = _as_datetimes(datetimes)
+    count = _datetimes.shape[0]
+    # get the DLL, loaded once per process
+    _get_spectrl2_position = load_spectrl2().get_spectrl2_position
+    # cast Python types as ctypes, broadcast single rows with a step of zero
+    _location = (ctypes.c_float * 3)(*location)
+    _angles = _position_rows(angles, count, 'angles')
+    _airmass = _position_rows(airmass, count, 'airmass')
+    _cosinc = None
+    if cosinc is not None:
+        _cosinc = np.ascontiguousarray(cosinc, dtype=np.float32).reshape(-1)
+        if _cosinc.shape[0] != count:
+            raise ValueError('cosinc must have %d rows' % count)
+    _orientation, orientation_step = _as_rows(
+        orientation, 2, count, 'orientation')
+    _atmospheric_conditions, atmospheric_conditions_step = _as_rows(
+        atmospheric_conditions, 5, count, 'atmospheric_conditions')
+    _albedo, albedo_step = _as_rows(albedo, 12, count, 'albedo')
+    _steps = (ctypes.c_int * 3)(
+        orientation_step, atmospheric_conditions_step, albedo_step)
+    first, last = _spectral_window(window)
+    _window = (ctypes.c_int * 2)(first, last)
+    # allocate space for results
+    nspec = last - first
+    specdif = np.empty((count, nspec), dtype=np.float32)
+    specdir = np.empty((count, nspec), dtype=np.float32)
+    specetr = np.empty((count, nspec), dtype=np.float32)
+    specglo = np.empty((count, nspec), dtype=np.float32)
+    specx = np.zeros(nspec, dtype=np.float32)
+    err_code = np.empty(count, dtype=C_LONG)
+
+    def _call(start, stop):
+        """
+        Call the library for rows in [start, stop) of the inputs & outputs.
+        """
+        rows = slice(start, stop)
+        # only the first chunk writes the shared x-coordinate
+        _specx = specx if start == 0 else np.empty(nspec, dtype=np.float32)
+        return _get_spectrl2_position(
+            units, _location, _datetimes[rows].ctypes.data_as(INT6_P),
+            _angles[rows].ctypes.data_as(FLOAT2_P),
+            _airmass[rows].ctypes.data_as(FLOAT2_P),
+            None if _cosinc is None else _cosinc[rows].ctypes.data_as(
+                FLOAT_P),
+            _chunk(_orientation, orientation_step, rows).ctypes.data_as(
+                FLOAT2_P),
+            _chunk(_atmospheric_conditions, atmospheric_conditions_step,
+                   rows).ctypes.data_as(FLOAT5_P),
+            _chunk(_albedo, albedo_step, rows).ctypes.data_as(FLOAT12_P),
+            _steps, _window, stop - start,
+            specdif[rows].ctypes.data_as(FLOAT_P),
+            specdir[rows].ctypes.data_as(FLOAT_P),
+            specetr[rows].ctypes.data_as(FLOAT_P),
+            specglo[rows].ctypes.data_as(FLOAT_P),
+            _specx.ctypes.data_as(FLOAT_P),
+            err_code[rows].ctypes.data_as(LONG_P))
+
+    # call, passing pointers to the NumPy buffers, ctypes releases the GIL so
+    # chunks of rows run concurrently in a pool of threads
+    retval = native(count, _map_chunks, _call, count, num_threads)
+    if any(retval): raise RuntimeError('spectrl2 did not execute')
+    errors = np.flatnonzero(err_code)
+    if not errors.size:
+        return specdif, specdir, specetr, specglo, specx
+    n = errors[0]
+    if err_code[n] < 0:
+        atm = _atmospheric_conditions[n * atmospheric_conditions_step]
+        data = {'units': units,
+                'tau500': atm[3],
+                'watvap': atm[4],
+                'assym': atm[1]}
+        raise SPECTRL2_Error(int(err_code[n]), data)
+    else:
+        raise SOLPOS_Error(_int2bits(err_code[n]),
+                           {'location': location,
+                            'datetime': _datetimes[n].tolist()})
+
+
+@instrument
+def get_specx(units):
+    """
+    Get the x-coordinate of SPECTRL2 spectra without calculating them.
+
+    :param units: set ``units`` = 1 for W/m\\ :sup:`2`/micron
+    :type units: int
+    :returns: wavelength [microns] for ``units`` 1 and 2 or energy [eV] for
+        ``units`` 3
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`~solar_utils.exceptions.SPECTRL2_Error`
+
+    **Example:**
+
+    >>> specx = get_specx(1)
+    >>> specx[[0, -1]]
+    array([0.3, 4. ], dtype=float32)
+    """
+    specx = np.empty(NSPEC, dtype=np.float32)
+    if native(1, load_spectrl2().get_specx, units,
+              specx.ctypes.data_as(FLOAT_P)):
+        raise SPECTRL2_Error(-1, {'units': units})
+    return specx
+
+
+def _on_specx(curve, specx, name):
+    """
+    Resample a spectral curve onto the x-coordinate of SPECTRL2 spectra.
+
+    :param curve: (x, y) pair on any grid, zero outside of it, or 122 values
+        on ``specx``
+    :param specx: x-coordinate from :func:`get_specx`
+    :param name: name of the argument for error messages
+    :type name: str
+    :returns: 122 values on ``specx``
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`ValueError` if ``curve`` is neither
+    """
+    if len(curve) == 2:
+        x, y = (np.asarray(values, dtype=np.float64).ravel()
+                for values in curve)
+        if x.size != y.size:
+            raise ValueError('%s x and y must be the same size' % name)
+        order = np.argsort(x)
+        return np.interp(specx, x[order], y[order], left=0.0, right=0.0)
+    values = np.asarray(curve, dtype=np.float64)
+    if values.shape != (NSPEC,):
+        raise ValueError('%s must be an (x, y) pair or %d values'
+                         % (name, NSPEC))
+    return values
+
+
+@instrument
+def get_spectrl2_bands(units, location, datetimes, weather, orientation,
+                       atmospheric_conditions, albedo, responses, reference,
+                       num_threads=1):
+    """
+    Integrate SPECTRL2 global spectra over the spectral response of one or
+    more bands and get their spectral mismatch factors for a sequence of
+    datetimes, without returning the spectra.
+
+    :param units: set ``units`` = 1 for W/m\\ :sup:`2`/micron
+    :type units: int
+    :param location: latitude, longitude and UTC-timezone
+    :type location: float
+    :param datetimes: year, month, day, hour, minute and second per row
+    :type datetimes: int
+    :param weather: ambient-pressure [mB] and ambient-temperature [C]
+    :type weather: float
+    :param orientation: tilt and aspect [degrees]
+    :type orientation: float
+    :param atmospheric_conditions: alpha, assym, ozone, tau500 and watvap
+    :type atmospheric_conditions: float
+    :param albedo: 6 wavelengths and 6 reflectivities
+    :type albedo: float
+    :param responses: spectral response of each band, either as an (x, y)
+        pair or as 122 values on the x-coordinate of :func:`get_specx`
+    :param reference: reference spectrum, like the AM1.5 global spectrum, as
+        an (x, y) pair or as 122 values on the x-coordinate
+    :param num_threads: number of threads, ``None`` to use every CPU
+    :type num_threads: int
+    :returns: broadband (N,), in-band (N, bands) and mismatch factor (N,
+        bands)
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`~solar_utils.exceptions.SPECTRL2_Error`,
+        :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    The inputs are handled as in :func:`get_spectrl2`. The responses and
+    the reference are resampled once onto the x-coordinate of ``units``,
+    zero outside of their own x-coordinates, and the global spectrum on the
+    tilted surface of each row is integrated with the trapezoidal rule right
+    after SPECTRL2 calculates it, so only a few values per row are returned
+    instead of five spectra. The mismatch factor of a band is the fraction
+    of the broadband irradiance in the band relative to the same fraction of
+    the reference spectrum, and it's NaN if there's no irradiance.
+
+    **Example:**
+
+    >>> specx = get_specx(1)
+    >>> silicon = ([0.3, 0.9, 1.2], [0.0, 1.0, 0.0])
+    >>> reference = (specx, np.ones(122))
+    >>> broadband, inband, mismatch = get_spectrl2_bands(
+    ...     1, [33.65, -84.43, -5.0],
+    ...     [[1999, 7, 22, h, 0, 0] for h in range(6, 19)],
+    ...     [1006.0, 27.0], [33.65, 135.0], [1.14, 0.65, -1.0, 0.2, 1.36],
+    ...     [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6), [silicon],
+    ...     reference)
+    """
+    _datetimes = _as_datetimes(datetimes)
+    count = _datetimes.shape[0]
+    specx = get_specx(units)
+    _responses = np.array(
+        [_on_specx(response, specx, 'responses') for response in responses],
+        dtype=np.float32).reshape(-1, NSPEC)
+    nbands = _responses.shape[0]
+    _reference = _on_specx(reference, specx, 'reference').astype(np.float32)
+    # get the DLL, loaded once per process, also loads 'solposAM.dll'
+    _get_spectrl2_bands = load_spectrl2().get_spectrl2_bands
+    # cast Python types as ctypes, broadcast single rows with a step of zero
+    _location = (ctypes.c_float * 3)(*location)
+    _weather, weather_step = _as_rows(weather, 2, count, 'weather')
+    _orientation, orientation_step = _as_rows(
+        orientation, 2, count, 'orientation')
+    _atmospheric_conditions, atmospheric_conditions_step = _as_rows(
+        atmospheric_conditions, 5, count, 'atmospheric_conditions')
+    _albedo, albedo_step = _as_rows(albedo, 12, count, 'albedo')
+    _steps = (ctypes.c_int * 4)(
+        weather_step, orientation_step, atmospheric_conditions_step,
+        albedo_step)
+    # allocate space for results
+    broadband = np.empty(count, dtype=np.float32)
+    inband = np.empty((count, nbands), dtype=np.float32)
+    mismatch = np.empty((count, nbands), dtype=np.float32)
+    err_code = np.empty(count, dtype=C_LONG)
+
+    def _call(start, stop):
+        """
+        Call the library for rows in [start, stop) of the inputs & outputs.
+        """
+        rows = slice(start, stop)
+        return _get_spectrl2_bands(
+            units, _location, _datetimes[rows].ctypes.data_as(INT6_P),
+            _chunk(_weather, weather_step, rows).ctypes.data_as(FLOAT2_P),
+            _chunk(_orientation, orientation_step, rows).ctypes.data_as(
+                FLOAT2_P),
+            _chunk(_atmospheric_conditions, atmospheric_conditions_step,
+                   rows).ctypes.data_as(FLOAT5_P),
+            _chunk(_albedo, albedo_step, rows).ctypes.data_as(FLOAT12_P),
+            _steps, stop - start, _responses.ctypes.data_as(FLOAT122_P),
+            nbands, _reference.ctypes.data_as(FLOAT_P),
+            broadband[rows].ctypes.data_as(FLOAT_P),
+            inband[rows].ctypes.data_as(FLOAT_P),
+            mismatch[rows].ctypes.data_as(FLOAT_P),
+            err_code[rows].ctypes.data_as(LONG_P))
+
+    retval = native(count, _map_chunks, _call, count, num_threads)
+    if any(retval): raise RuntimeError('spectrl2 did not execute')
+    errors = np.flatnonzero(err_code)
+    if not errors.size:
+        return broadband, inband, mismatch
+    n = errors[0]
+    if err_code[n] < 0:
+        atm = _atmospheric_conditions[n * atmospheric_conditions_step]
+        data = {'units': units,
+                'tau500': atm[3],
+                'watvap': atm[4],
+                'assym': atm[1]}
+        raise SPECTRL2_Error(int(err_code[n]), data)
+    else:
+        # the position outputs aren't returned, so only the inputs are known
+        data = {'location': location,
+                'datetime': _datetimes[n].tolist(),
+                'weather': _weather[n * weather_step],
+                'orientation': _orientation[n * orientation_step]}
+        raise SOLPOS_Error(_int2bits(err_code[n]), data)
@@ -38,7 +38,7 @@ create_dirs:
 	mkdir -p $(BUILD_DIR)
 
 solposAM: create_dirs
-	cc -Wl,-rpath,@loader_path/ -shared -fPIC -Wall $(SOLPOSAM_SRC) \
+	cc -Wl,-rpath,@loader_path/ -shared -fPIC -pthread -Wall $(SOLPOSAM_SRC) \
 		-o $(BUILD_DIR)/$(SOLPOSAM) -install_name @rpath/$(SOLPOSAM)
 
 spectrl2: create_dirs
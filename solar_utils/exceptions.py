@@ -40,6 +40,12 @@ class SOLPOS_Error(SolarUtilsException):
         self.args = SOLPOS_Error.S_CODE[code], data
         self.message = str(self)
 
+    def __reduce__(self):
+        # pickle with the code number so errors raised in worker processes
+        # can be re-raised in the parent
+        return self.__class__, (SOLPOS_Error.S_CODE.index(self.args[0]),
+                                self.args[1])
+
     def __str__(self):
         if self.args[0] == 'S_YEAR_ERROR':
             errmsg = "S_decode ==> Please fix the year: %d [1950-2050]\n"
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-process executor for solar position and spectra of fleets of sites.
+
+Work for every site and datetime is split into chunks of at most
+``chunk_size`` datetimes of one site and sent to a pool of worker processes.
+Each worker loads the native libraries once, when it starts, and writes its
+results straight into shared memory at the position of its chunk, so the
+results come back in input order without being pickled. The arrays returned
+are backed by the shared memory, without a copy, and each block is closed and
+unlinked when the last array using it is released.
+
+2019 SunPower Corp.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+import weakref
+import numpy as np
+
+from solar_utils.core import (
+    NSPEC, _as_datetimes, _per_site_rows, datetime_range, get_solposAM_rows,
+    get_spectrl2
+)
+from solar_utils.loader import load_solposAM, load_spectrl2
+
+#: default number of datetimes per chunk
+CHUNK_SIZE = 8760
+
+
+def _init_worker():
+    """
+    Load the native libraries once in each worker process.
+    """
+    load_solposAM()
+    load_spectrl2()
+
+
+def _write(outputs, site, start, stop, results):
+    """
+    Write the results of a chunk into the shared memory outputs.
+
+    :param outputs: name, shape and dtype of each shared memory output
+    :param site: index of the site
+    :type site: int
+    :param start: index of the first datetime of the chunk
+    :type start: int
+    :param stop: index after the last datetime of the chunk
+    :type stop: int
+    :param results: one array of results for each output
+    """
+    for (name, shape, dtype), result in zip(outputs, results):
+        shm = SharedMemory(name=name)
+        try:
+            output = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            output[site, start:stop] = result
+            del output  # release the buffer before closing
+        finally:
+            shm.close()
+
+
+def _solpos_chunk(outputs, site, start, stop, location, datetimes, weather):
+    """
+    Compute solar position for one chunk in a worker process.
+    """
+    results = get_solposAM_rows(
+        location[0], location[1], location[2], datetimes, weather[:, 0],
+        weather[:, 1])
+    _write(outputs, site, start, stop, results)
+
+
+def _spectrl2_chunk(outputs, site, start, stop, units, location, datetimes,
+                    weather, orientation, atmospheric_conditions, albedo):
+    """
+    Compute spectra for one chunk in a worker process.
+    """
+    results = get_spectrl2(
+        units, location, datetimes, weather, orientation,
+        atmospheric_conditions, albedo)
+    # x-coordinate is the same for every datetime, only the first chunk of
+    # the first site writes it
+    results, specx = results[:-1], results[-1]
+    _write(outputs[:-1], site, start, stop, results)
+    if site == 0 and start == 0:
+        _write(outputs[-1:], 0, 0, NSPEC, [specx])
+
+
+def _release(shm):
+    """
+    Close and unlink a shared memory block.
+    """
+    shm.close()
+    shm.unlink()
+
+
+class _SharedBlock(object):
+    """
+    Owner of a shared memory block used as the base of an output array.
+
+    The array points at the block without holding a buffer of it, so the
+    block can be closed and unlinked, by a :func:`weakref.finalize`, as soon
+    as the owner is released, after the array and every view of it, or at
+    exit.
+
+    :param shm: shared memory block
+    :type shm: :class:`~multiprocessing.shared_memory.SharedMemory`
+    :param shape: shape of the array
+    :param dtype: NumPy dtype of the array
+    """
+    def __init__(self, shm, shape, dtype):
+        data = np.frombuffer(shm.buf, dtype=np.uint8)
+        address = data.ctypes.data
+        del data  # release the buffer so the block can be closed
+        self.__array_interface__ = {
+            'data': (address, False), 'shape': tuple(shape),
+            'typestr': np.dtype(dtype).str, 'version': 3}
+        self.finalizer = weakref.finalize(self, _release, shm)
+
+
+def _take(values, site, start, stop):
+    """
+    Get the rows of an input for a chunk of datetimes of one site.
+
+    :param values: input from :func:`_per_site_rows`
+    :returns: one row if broadcast, otherwise a row per datetime
+    """
+    values = values[site % values.shape[0]]
+    return values[start:stop] if values.shape[0] > 1 else values
+
+
+class SolarExecutor(object):
+    """
+    Compute solar position and spectra for many sites on a pool of processes.
+
+    :param max_workers: number of worker processes, ``None`` for every CPU
+    :type max_workers: int
+    :param chunk_size: maximum number of datetimes per chunk
+    :type chunk_size: int
+
+    **Example:**
+
+    >>> locations = [[35.56836, -119.2022, -8.0], [33.65, -84.43, -5.0]]
+    >>> weathers = [[1015.62055, 40.0], [1006.0, 27.0]]
+    >>> with SolarExecutor(max_workers=4) as executor:
+    ...     angles, airmass = executor.get_solpos8760(
+    ...         locations, 2013, weathers)
+    >>> angles.shape
+    (2, 8760, 2)
+    """
+    def __init__(self, max_workers=None, chunk_size=CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        self.chunk_size = chunk_size
+        self.pool = ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def shutdown(self, wait=True):
+        """
+        Shut down the worker processes.
+        """
+        self.pool.shutdown(wait=wait)
+
+    def _chunks(self, sites, times):
+        """
+        Split sites x datetimes into chunks of at most ``chunk_size``.
+
+        :returns: site, start and stop of each chunk
+        """
+        for site in range(sites):
+            for start in range(0, times, self.chunk_size):
+                yield site, start, min(start + self.chunk_size, times)
+
+    def _run(self, func, shapes, chunks):
+        """
+        Run chunks on the pool writing into shared memory outputs.
+
+        :param func: worker function called with the outputs followed by the
+            arguments of each chunk
+        :param shapes: shape and dtype of each output
+        :param chunks: arguments of each chunk
+        :returns: outputs backed by the shared memory, see
+            :class:`_SharedBlock`
+        """
+        blocks = [
+            SharedMemory(create=True, size=max(1, int(np.prod(shape)) *
+                                               np.dtype(dtype).itemsize))
+            for shape, dtype in shapes]
+        futures = []
+        try:
+            outputs = [(shm.name, shape, np.dtype(dtype).str)
+                       for shm, (shape, dtype) in zip(blocks, shapes)]
+            futures = [self.pool.submit(func, outputs, *args)
+                       for args in chunks]
+            for future in futures:
+                future.result()  # raise errors from the workers
+        except BaseException:
+            # don't release shared memory until every worker is done with it
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            for shm in blocks:
+                _release(shm)
+            raise
+        # the arrays own the blocks from now on
+        return [np.asarray(_SharedBlock(shm, shape, dtype))
+                for shm, (shape, dtype) in zip(blocks, shapes)]
+
+    def get_solposAM(self, locations, datetimes, weathers):
+        """
+        Get SOLPOS calculation for each site for a sequence of datetimes.
+
+        :param locations: [latitude, longitude, UTC-timezone] per site
+        :type locations: float
+        :param datetimes: [year, month, day, hour, minute, second]
+        :type datetimes: int
+        :param weathers: [ambient-pressure (mB), ambient-temperature (C)] for
+            all sites, per site or per site and datetime
+        :type weathers: float
+        :returns: angles [degrees], airmass [atm] with shape (sites,
+            datetimes, 2)
+        :rtype: :class:`numpy.ndarray`
+        :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+        .. seealso::
+            :func:`~solar_utils.core.get_solposAM`
+        """
+        locations = np.asarray(locations, dtype=np.float32).reshape(-1, 3)
+        datetimes = _as_datetimes(datetimes)
+        sites, times = locations.shape[0], datetimes.shape[0]
+        weathers = _per_site_rows(weathers, 2, sites, times, 'weathers')
+        shapes = [((sites, times, 2), np.float32),
+                  ((sites, times, 2), np.float32)]
+        chunks = (
+            (site, start, stop, locations[site], datetimes[start:stop],
+             _take(weathers, site, start, stop))
+            for site, start, stop in self._chunks(sites, times))
+        angles, airmass = self._run(_solpos_chunk, shapes, chunks)
+        return angles, airmass
+
+    def get_solpos8760(self, locations, year, weathers):
+        """
+        Get SOLPOS hourly calculation for each site for a non-leap year.
+
+        :param locations: [latitude, longitude, UTC-timezone] per site
+        :type locations: float
+        :param year: a non-leap year
+        :type year: int
+        :param weathers: [ambient-pressure (mB), ambient-temperature (C)] for
+            all sites, per site or per site and hour
+        :type weathers: float
+        :returns: angles [degrees], airmass [atm] with shape (sites, 8760, 2)
+        :rtype: :class:`numpy.ndarray`
+        :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+        .. seealso::
+            :func:`~solar_utils.core.get_solpos8760`
+        """
+        datetimes = datetime_range(
+            (year, 1, 1), np.datetime64('%04d-01-01' % year) + 365, '1h')
+        return self.get_solposAM(locations, datetimes, weathers)
+
+    def get_spectrl2(self, units, locations, datetimes, weathers, orientation,
+                     atmospheric_conditions, albedo):
+        """
+        Calculate solar spectra for each site for a sequence of datetimes.
+
+        :param units: set ``units`` = 1 for W/m\\ :sup:`2`/micron
+        :type units: int
+        :param locations: latitude, longitude and UTC-timezone per site
+        :type locations: float
+        :param datetimes: year, month, day, hour, minute and second
+        :type datetimes: int
+        :param weathers: ambient-pressure [mB] and ambient-temperature [C]
+        :type weathers: float
+        :param orientation: tilt and aspect [degrees]
+        :type orientation: float
+        :param atmospheric_conditions: alpha, assym, ozone, tau500 and watvap
+        :type atmospheric_conditions: float
+        :param albedo: 6 wavelengths and 6 reflectivities
+        :type albedo: float
+        :returns: spectral decomposition with shape (sites, datetimes, 122)
+            and x-coordinate with shape (122,)
+        :rtype: :class:`numpy.ndarray`
+        :raises: :exc:`~solar_utils.exceptions.SPECTRL2_Error`,
+            :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+        The ``weathers``, ``orientation``, ``atmospheric_conditions`` and
+        ``albedo`` are each one row for all sites, one row per site or one row
+        per site and datetime.
+
+        .. seealso::
+            :func:`~solar_utils.core.get_spectrl2`
+        """
+        locations = np.asarray(locations, dtype=np.float32).reshape(-1, 3)
+        datetimes = _as_datetimes(datetimes)
+        sites, times = locations.shape[0], datetimes.shape[0]
+        weathers = _per_site_rows(weathers, 2, sites, times, 'weathers')
+        orientation = _per_site_rows(
+            orientation, 2, sites, times, 'orientation')
+        atmospheric_conditions = _per_site_rows(
+            atmospheric_conditions, 5, sites, times, 'atmospheric_conditions')
+        albedo = _per_site_rows(albedo, 12, sites, times, 'albedo')
+        shapes = [((sites, times, NSPEC), np.float32)] * 4
+        shapes.append(((1, NSPEC), np.float32))
+        chunks = (
+            (site, start, stop, units, locations[site], datetimes[start:stop],
+             _take(weathers, site, start, stop),
+             _take(orientation, site, start, stop),
+             _take(atmospheric_conditions, site, start, stop),
+             _take(albedo, site, start, stop))
+            for site, start, stop in self._chunks(sites, times))
+        (specdif, specdir, specetr, specglo,
+         specx) = self._run(_spectrl2_chunk, shapes, chunks)
+        return specdif, specdir, specetr, specglo, specx[0]
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Front-end for pandas timestamps and data frames.
+
+A :class:`pandas.DatetimeIndex` is converted to the local standard time that
+SOLPOS requires and split into rows of year, month, day, hour, minute and
+second with NumPy ``datetime64`` arithmetic, without a Python object per
+timestamp, then the batch functions of :mod:`solar_utils.core` are called and
+their results are returned as a :class:`pandas.DataFrame` with the same
+index. pandas is optional, it is only needed to call these functions.
+
+2019 SunPower Corp.
+"""
+
+import numpy as np
+
+from solar_utils.core import _datetime_fields, get_solposAM, get_spectrl2
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+#: names of the SPECTRL2 spectra in the columns of :func:`get_spectrl2_frame`
+SPECTRA = ('specdif', 'specdir', 'specetr', 'specglo')
+
+
+def _require_pandas():
+    """
+    Check that pandas is installed.
+
+    :raises: :exc:`ImportError` if it isn't
+    """
+    if pd is None:
+        raise ImportError('pandas is required for solar_utils.frames')
+
+
+def _standard_offset(index):
+    """
+    Get the standard time UTC offset of a timezone-aware index from its first
+    timestamp, without daylight saving time.
+
+    :returns: UTC offset [hours], 0 for an empty index
+    :rtype: float
+    """
+    if not len(index):
+        return 0.0
+    first = index[0]
+    offset = first.utcoffset()
+    dst = first.dst()
+    if dst is not None:
+        offset -= dst
+    return offset.total_seconds() / 3600.0
+
+
+def index_datetimes(index, timezone=None):
+    """
+    Convert a pandas index to rows of standard time fields for SOLPOS.
+
+    :param index: timestamps, timezone-aware or naive in standard time
+    :type index: :class:`pandas.DatetimeIndex`
+    :param timezone: UTC offset of standard time [hours], ``None`` to use the
+        standard offset of a timezone-aware ``index``
+    :type timezone: float
+    :returns: (N, 6) array of C ``int`` and the UTC offset [hours]
+    :rtype: tuple
+    :raises: :exc:`ValueError` if ``index`` is naive and ``timezone`` is
+        ``None``, :exc:`ImportError` if pandas isn't installed
+
+    A timezone-aware ``index`` is converted to the standard time of
+    ``timezone``, so daylight saving time is removed. If ``timezone`` is
+    ``None`` it's the offset of the first timestamp without daylight saving
+    time, for example -8 for ``'US/Pacific'`` in summer or winter. A naive
+    ``index`` must already be standard time at ``timezone``. Fractions of a
+    second are truncated.
+
+    **Example:**
+
+    >>> index = pd.date_range('2017-06-01', periods=24, freq='h',
+    ...                       tz='US/Pacific')
+    >>> datetimes, timezone = index_datetimes(index)
+    >>> timezone
+    -8.0
+    >>> datetimes[0].tolist()
+    [2017, 5, 31, 23, 0, 0]
+    """
+    _require_pandas()
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        if timezone is None:
+            timezone = _standard_offset(index)
+        # UTC, then shifted to standard time
+        stamps = index.tz_convert(None).values.astype('M8[s]')
+        stamps = stamps + np.timedelta64(int(round(timezone * 3600)), 's')
+    elif timezone is None:
+        raise ValueError('a naive index needs the UTC offset of its '
+                         'standard time')
+    else:
+        stamps = index.values.astype('M8[s]')
+    datetimes = _datetime_fields(
+        stamps, np.empty((stamps.size, 6), dtype=np.intc))
+    return datetimes, float(timezone)
+
+
+def _site(location, index):
+    """
+    Get the location with the UTC offset of standard time and the datetimes
+    of an index.
+    """
+    timezone = location[2] if len(location) > 2 else None
+    datetimes, timezone = index_datetimes(index, timezone)
+    return [location[0], location[1], timezone], datetimes
+
+
+def get_solposAM_frame(location, index, weather, num_threads=1,
+                       errors='raise', skip_night=False):
+    """
+    Get SOLPOS calculation for pandas timestamps as a data frame.
+
+    :param location: [latitude, longitude] or [latitude, longitude,
+        UTC-timezone], see :func:`index_datetimes`
+    :type location: float
+    :param index: timestamps, timezone-aware or naive in standard time
+    :type index: :class:`pandas.DatetimeIndex`
+    :param weather: [ambient-pressure (mB), ambient-temperature (C)], one row
+        or one row per timestamp
+    :type weather: float
+    :param num_threads: number of native threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param errors: ``'raise'`` or ``'mask'`` rows with SOLPOS errors
+    :type errors: str
+    :param skip_night: don't calculate rows at night
+    :type skip_night: bool
+    :returns: refracted zenith ``zenref`` and azimuth ``azim`` [degrees], air
+        mass ``amass`` and pressure adjusted air mass ``ampress`` [atm] and,
+        if ``errors='mask'``, ``err_code``, indexed by ``index``
+    :rtype: :class:`pandas.DataFrame`
+    :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`,
+        :exc:`ImportError` if pandas isn't installed
+
+    The same as :func:`~solar_utils.core.get_solposAM` after
+    :func:`index_datetimes`.
+
+    **Example:**
+
+    >>> index = pd.date_range('2017-01-01', '2018-01-01', freq='min',
+    ...                       tz='US/Pacific', inclusive='left')
+    >>> solpos = get_solposAM_frame(
+    ...     [35.56836, -119.2022], index, [1015.62055, 40.0])
+    >>> solpos.columns.tolist()
+    ['zenref', 'azim', 'amass', 'ampress']
+    """
+    location, datetimes = _site(location, index)
+    result = get_solposAM(location, datetimes, weather,
+                          num_threads=num_threads, errors=errors,
+                          skip_night=skip_night)
+    angles, airmass = result[:2]
+    data = {'zenref': angles[:, 0], 'azim': angles[:, 1],
+            'amass': airmass[:, 0], 'ampress': airmass[:, 1]}
+    columns = ['zenref', 'azim', 'amass', 'ampress']
+    if errors == 'mask':
+        data['err_code'] = result[2]
+        columns.append('err_code')
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+def get_spectrl2_frame(units, location, index, weather, orientation,
+                       atmospheric_conditions, albedo, num_threads=1,
+                       skip_night=False, window=None):
+    """
+    Get SPECTRL2 spectra for pandas timestamps as a data frame.
+
+    :param units: set ``units`` = 1 for W/m\\ :sup:`2`/micron
+    :type units: int
+    :param location: [latitude, longitude] or [latitude, longitude,
+        UTC-timezone], see :func:`index_datetimes`
+    :type location: float
+    :param index: timestamps, timezone-aware or naive in standard time
+    :type index: :class:`pandas.DatetimeIndex`
+    :param weather: ambient-pressure [mB] and ambient-temperature [C]
+    :type weather: float
+    :param orientation: tilt and aspect [degrees]
+    :type orientation: float
+    :param atmospheric_conditions: alpha, assym, ozone, tau500 and watvap
+    :type atmospheric_conditions: float
+    :param albedo: 6 wavelengths and 6 reflectivities
+    :type albedo: float
+    :param num_threads: number of threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param skip_night: don't calculate rows at night
+    :type skip_night: bool
+    :param window: minimum and maximum wavelength [microns] calculated,
+        ``None`` for all 122
+    :type window: float
+    :returns: spectra with columns of :data:`SPECTRA` and x-coordinate,
+        indexed by ``index``
+    :rtype: :class:`pandas.DataFrame`
+    :raises: :exc:`~solar_utils.exceptions.SPECTRL2_Error`,
+        :exc:`~solar_utils.exceptions.SOLPOS_Error`,
+        :exc:`ImportError` if pandas isn't installed
+
+    The same as :func:`~solar_utils.core.get_spectrl2` after
+    :func:`index_datetimes`. The columns are a :class:`pandas.MultiIndex` of
+    the spectrum and the x-coordinate, so for example
+    ``spectra['specglo']`` is the global spectra with a column per
+    wavelength.
+    """
+    location, datetimes = _site(location, index)
+    result = get_spectrl2(
+        units, location, datetimes, weather, orientation,
+        atmospheric_conditions, albedo, num_threads=num_threads,
+        skip_night=skip_night, window=window)
+    spectra, specx = result[:4], result[4]
+    columns = pd.MultiIndex.from_product(
+        [SPECTRA, specx], names=['spectrum', 'x'])
+    return pd.DataFrame(np.concatenate(spectra, axis=1), index=index,
+                        columns=columns)
@@ -38,7 +38,7 @@ create_dirs:
 	mkdir -p $(BUILD_DIR)
 
 solposAM: create_dirs
-	cc -Wl,-rpath='$${ORIGIN}' -shared -fPIC -Wall $(SOLPOSAM_SRC) \
+	cc -Wl,-rpath='$${ORIGIN}' -shared -fPIC -pthread -Wall $(SOLPOSAM_SRC) \
 		-o $(BUILD_DIR)/$(SOLPOSAM)
 
 spectrl2: create_dirs
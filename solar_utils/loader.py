@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy, process-wide loader for the SOLPOS and SPECTRL2 shared libraries.
+
+Each library is opened at most once per process, the first time one of its
+functions is needed, and the exported functions are given full ``argtypes``
+and ``restype`` prototypes so ctypes doesn't have to guess the conversions on
+every call. Importing this module doesn't open either library.
+
+2019 SunPower Corp.
+"""
+
+import ctypes
+import os
+import sys
+import threading
+
+from solar_utils.metrics import call, native
+
+_DIRNAME = os.path.dirname(__file__)
+PLATFORM = sys.platform
+if PLATFORM == 'win32':
+    SOLPOSAM = 'solposAM.dll'
+    SPECTRL2 = 'spectrl2.dll'
+elif PLATFORM in ['linux2', 'linux']:
+    PLATFORM = 'linux'
+    SOLPOSAM = 'libsolposAM.so'
+    SPECTRL2 = 'libspectrl2.so'
+elif PLATFORM == 'darwin':
+    SOLPOSAM = 'libsolposAM.dylib'
+    SPECTRL2 = 'libspectrl2.dylib'
+else:
+    raise OSError('Platform "%s" is unknown or unsupported.' % PLATFORM)
+SOLPOSAMDLL = os.path.join(_DIRNAME, SOLPOSAM)
+SPECTRL2DLL = os.path.join(_DIRNAME, SPECTRL2)
+
+# ctypes pointer types used in the prototypes
+FLOAT_P = ctypes.POINTER(ctypes.c_float)
+INT_P = ctypes.POINTER(ctypes.c_int)
+LONG_P = ctypes.POINTER(ctypes.c_long)
+FLOAT2_P = ctypes.POINTER(ctypes.c_float * 2)
+FLOAT3_P = ctypes.POINTER(ctypes.c_float * 3)
+FLOAT5_P = ctypes.POINTER(ctypes.c_float * 5)
+FLOAT12_P = ctypes.POINTER(ctypes.c_float * 12)
+FLOAT122_P = ctypes.POINTER(ctypes.c_float * 122)
+INT2_P = ctypes.POINTER(ctypes.c_int * 2)
+INT6_P = ctypes.POINTER(ctypes.c_int * 6)
+
+_LOCK = threading.Lock()
+_LIBS = {}
+
+
+def _prototype(dll, name, restype, argtypes):
+    """
+    Set the return and argument types of a function exported by a library.
+
+    :param dll: the library
+    :type dll: :class:`ctypes.CDLL`
+    :param name: name of the exported function
+    :type name: str
+    :param restype: ctypes return type
+    :param argtypes: sequence of ctypes argument types
+    """
+    func = getattr(dll, name)
+    func.restype = restype
+    func.argtypes = argtypes
+
+
+def _declare_solposAM(dll):
+    """
+    Declare prototypes of the functions exported by :data:`SOLPOSAMDLL`.
+    """
+    _prototype(dll, 'solposAM', ctypes.c_long, [
+        FLOAT_P,  # location
+        INT_P,  # datetime
+        FLOAT_P,  # weather
+        FLOAT_P,  # angles
+        FLOAT_P,  # airmass
+        INT_P,  # settings
+        FLOAT_P,  # orientation
+        FLOAT_P  # shadowband
+    ])
+    _prototype(dll, 'get_solposAM', ctypes.c_long, [
+        FLOAT_P,  # location
+        INT6_P,  # datetimes
+        FLOAT_P,  # weather
+        ctypes.c_int,  # cnt
+        FLOAT2_P,  # angles
+        FLOAT2_P,  # airmass
+        INT2_P,  # settings
+        FLOAT2_P,  # orientation
+        FLOAT3_P,  # shadowband
+        LONG_P,  # err_code
+        ctypes.c_int  # num_threads
+    ])
+    _prototype(dll, 'get_solposAM_rows', ctypes.c_long, [
+        FLOAT_P,  # latitude
+        FLOAT_P,  # longitude
+        FLOAT_P,  # timezone
+        INT6_P,  # datetimes
+        FLOAT_P,  # pressure
+        FLOAT_P,  # temperature
+        INT_P,  # steps
+        ctypes.c_int,  # cnt
+        FLOAT2_P,  # angles
+        FLOAT2_P,  # airmass
+        INT2_P,  # settings
+        FLOAT2_P,  # orientation
+        FLOAT3_P,  # shadowband
+        LONG_P,  # err_code
+        ctypes.c_int  # num_threads
+    ])
+    _prototype(dll, 'get_solposAM_fleet', ctypes.c_long, [
+        FLOAT3_P,  # sites
+        ctypes.c_int,  # nsites
+        INT_P,  # order
+        INT6_P,  # datetimes
+        ctypes.c_int,  # ntimes
+        FLOAT2_P,  # weather
+        INT_P,  # weather_steps
+        FLOAT2_P,  # angles
+        FLOAT2_P,  # airmass
+        INT2_P,  # settings
+        FLOAT2_P,  # orientation
+        FLOAT3_P,  # shadowband
+        LONG_P,  # err_code
+        ctypes.c_int  # num_threads
+    ])
+    _prototype(dll, 'get_solpos_outputs', ctypes.c_long, [
+        FLOAT_P,  # latitude
+        FLOAT_P,  # longitude
+        FLOAT_P,  # timezone
+        INT6_P,  # datetimes
+        FLOAT_P,  # pressure
+        FLOAT_P,  # temperature
+        FLOAT_P,  # tilt
+        FLOAT_P,  # aspect
+        INT_P,  # steps
+        ctypes.c_int,  # cnt
+        ctypes.c_int,  # function
+        INT_P,  # fields
+        ctypes.c_int,  # nfields
+        FLOAT_P,  # outputs
+        LONG_P,  # err_code
+        ctypes.c_int  # num_threads
+    ])
+
+
+def _declare_spectrl2(dll):
+    """
+    Declare prototypes of the functions exported by :data:`SPECTRL2DLL`.
+    """
+    _prototype(dll, 'spectrl2', ctypes.c_long, [
+        ctypes.c_int,  # units
+        FLOAT_P,  # location
+        INT_P,  # datetime
+        FLOAT_P,  # weather
+        FLOAT_P,  # orientation
+        FLOAT_P,  # atmospheric conditions
+        FLOAT_P,  # albedo
+        FLOAT_P,  # specdif
+        FLOAT_P,  # specdir
+        FLOAT_P,  # specetr
+        FLOAT_P,  # specglo
+        FLOAT_P,  # specx
+        FLOAT_P,  # angles
+        FLOAT_P,  # airmass
+        INT_P,  # settings
+        FLOAT_P  # shadowband
+    ])
+    _prototype(dll, 'spectrl2_window', ctypes.c_long, [
+        ctypes.c_int,  # units
+        FLOAT_P,  # location
+        INT_P,  # datetime
+        FLOAT_P,  # weather
+        FLOAT_P,  # orientation
+        FLOAT_P,  # atmospheric conditions
+        FLOAT_P,  # albedo
+        ctypes.c_int,  # first
+        ctypes.c_int,  # last
+        FLOAT_P,  # specdif
+        FLOAT_P,  # specdir
+        FLOAT_P,  # specetr
+        FLOAT_P,  # specglo
+        FLOAT_P,  # specx
+        FLOAT_P,  # angles
+        FLOAT_P,  # airmass
+        INT_P,  # settings
+        FLOAT_P  # shadowband
+    ])
+    _prototype(dll, 'get_spectrl2', ctypes.c_long, [
+        ctypes.c_int,  # units
+        FLOAT_P,  # location
+        INT6_P,  # datetimes
+        FLOAT2_P,  # weather
+        FLOAT2_P,  # orientation
+        FLOAT5_P,  # atmospheric conditions
+        FLOAT12_P,  # albedo
+        INT_P,  # steps
+        INT_P,  # window
+        ctypes.c_int,  # cnt
+        FLOAT_P,  # specdif
+        FLOAT_P,  # specdir
+        FLOAT_P,  # specetr
+        FLOAT_P,  # specglo
+        FLOAT_P,  # specx
+        FLOAT2_P,  # angles
+        FLOAT2_P,  # airmass
+        INT2_P,  # settings
+        FLOAT3_P,  # shadowband
+        LONG_P  # err_code
+    ])
+    _prototype(dll, 'spectrl2_position', ctypes.c_long, [
+        ctypes.c_int,  # units
+        FLOAT_P,  # location
+        INT_P,  # datetime
+        FLOAT_P,  # angles
+        FLOAT_P,  # airmass
+        FLOAT_P,  # cosinc
+        FLOAT_P,  # orientation
+        FLOAT_P,  # atmospheric conditions
+        FLOAT_P,  # albedo
+        ctypes.c_int,  # first
+        ctypes.c_int,  # last
+        FLOAT_P,  # specdif
+        FLOAT_P,  # specdir
+        FLOAT_P,  # specetr
+        FLOAT_P,  # specglo
+        FLOAT_P  # specx
+    ])
+    _prototype(dll, 'get_spectrl2_position', ctypes.c_long, [
+        ctypes.c_int,  # units
+        FLOAT_P,  # location
+        INT6_P,  # datetimes
+        FLOAT2_P,  # angles
+        FLOAT2_P,  # airmass
+        FLOAT_P,  # cosinc
+        FLOAT2_P,  # orientation
+        FLOAT5_P,  # atmospheric conditions
+        FLOAT12_P,  # albedo
+        INT_P,  # steps
+        INT_P,  # window
+        ctypes.c_int,  # cnt
+        FLOAT_P,  # specdif
+        FLOAT_P,  # specdir
+        FLOAT_P,  # specetr
+        FLOAT_P,  # specglo
+        FLOAT_P,  # specx
+        LONG_P  # err_code
+    ])
+    _prototype(dll, 'get_specx', ctypes.c_long, [
+        ctypes.c_int,  # units
+        FLOAT_P  # specx
+    ])
+    _prototype(dll, 'get_spectrl2_bands', ctypes.c_long, [
+        ctypes.c_int,  # units
+        FLOAT_P,  # location
+        INT6_P,  # datetimes
+        FLOAT2_P,  # weather
+        FLOAT2_P,  # orientation
+        FLOAT5_P,  # atmospheric conditions
+        FLOAT12_P,  # albedo
+        INT_P,  # steps
+        ctypes.c_int,  # cnt
+        FLOAT122_P,  # responses
+        ctypes.c_int,  # nbands
+        FLOAT_P,  # reference
+        FLOAT_P,  # broadband
+        FLOAT_P,  # inband
+        FLOAT_P,  # mismatch
+        LONG_P  # err_code
+    ])
+
+
+def _open(path, declare):
+    """
+    Open a library and declare its prototypes.
+    """
+    dll = native(0, ctypes.CDLL, path)
+    declare(dll)
+    return dll
+
+
+def _load(path, declare):
+    """
+    Open a library once per process and declare its prototypes.
+
+    :param path: path to the shared library
+    :type path: str
+    :param declare: callback that sets the prototypes of the library
+    :returns: the loaded library
+    :rtype: :class:`ctypes.CDLL`
+    """
+    dll = _LIBS.get(path)
+    if dll is not None:
+        return dll
+    with _LOCK:
+        dll = _LIBS.get(path)
+        if dll is None:
+            # counted in the metrics by the name of the library
+            dll = call(os.path.basename(path), _open, path, declare)
+            _LIBS[path] = dll
+    return dll
+
+
+def load_solposAM():
+    """
+    Get the :data:`SOLPOSAMDLL` library, loading it on the first call.
+
+    :returns: the SOLPOS library with prototypes declared
+    :rtype: :class:`ctypes.CDLL`
+    """
+    return _load(SOLPOSAMDLL, _declare_solposAM)
+
+
+def load_spectrl2():
+    """
+    Get the :data:`SPECTRL2DLL` library, loading it on the first call.
+
+    :data:`SOLPOSAMDLL` is loaded first because SPECTRL2 imports ``solposAM``
+    from it.
+
+    :returns: the SPECTRL2 library with prototypes declared
+    :rtype: :class:`ctypes.CDLL`
+    """
+    load_solposAM()  # requires 'solposAM.dll'
+    return _load(SPECTRL2DLL, _declare_spectrl2)
+
+
+def is_loaded(path):
+    """
+    Check if a library has already been loaded by this process.
+
+    :param path: :data:`SOLPOSAMDLL` or :data:`SPECTRL2DLL`
+    :type path: str
+    :rtype: bool
+    """
+    return path in _LIBS
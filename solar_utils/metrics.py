@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in runtime metrics of the SOLPOS and SPECTRL2 call paths.
+
+When enabled, every call of a public function of :mod:`solar_utils.core` and
+every load of a shared library counts its calls, the rows calculated by the
+library, the time spent in the library, the rest of the time, which is
+marshalling the inputs and outputs with ctypes and NumPy, and the errors
+raised, by SOLPOS ``S_CODE`` or SPECTRL2 code. When disabled, which is the
+default, each call only checks a flag.
+
+Calls made by other functions, for example
+:func:`~solar_utils.core.get_solposAM` called by
+:func:`~solar_utils.core.get_solpos8760`, are counted under their own name,
+and their time isn't counted again in the caller. The native time of
+a call split across threads is the time until every thread is done.
+
+Set the environment variable ``SOLAR_UTILS_METRICS=1`` to enable metrics at
+import.
+
+2019 SunPower Corp.
+"""
+
+import functools
+import os
+import threading
+import time
+
+from solar_utils.exceptions import SOLPOS_Error, SPECTRL2_Error
+
+#: environment variable that enables metrics at import if set to ``1``
+ENVIRON = 'SOLAR_UTILS_METRICS'
+#: prefix of the names of metrics in :func:`export_text`
+PREFIX = 'solar_utils'
+
+_ENABLED = os.environ.get(ENVIRON) == '1'
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+_STATS = {}
+
+
+def enable():
+    """
+    Start counting.
+    """
+    global _ENABLED
+    _ENABLED = True
+
+
+def disable():
+    """
+    Stop counting, the counts are kept until :func:`reset`.
+    """
+    global _ENABLED
+    _ENABLED = False
+
+
+def is_enabled():
+    """
+    Check if metrics are being counted.
+
+    :rtype: bool
+    """
+    return _ENABLED
+
+
+def _error_code(exc):
+    """
+    Get the label of an error, the ``S_CODE`` of a SOLPOS error, the code of
+    a SPECTRL2 error or else the name of the exception class.
+    """
+    if isinstance(exc, SOLPOS_Error):
+        return exc.args[0]
+    if isinstance(exc, SPECTRL2_Error):
+        return str(exc.args[0])
+    return exc.__class__.__name__
+
+
+def _record(name, elapsed, frame, code):
+    """
+    Add a call to the counts of a function.
+
+    :param frame: native seconds, seconds of other calls and rows
+    :param code: label of the error raised, ``None`` if none
+    """
+    native, children, rows = frame
+    with _LOCK:
+        stats = _STATS.get(name)
+        if stats is None:
+            stats = _STATS[name] = {
+                'calls': 0, 'rows': 0, 'native_seconds': 0.0,
+                'marshalling_seconds': 0.0, 'errors': {}}
+        stats['calls'] += 1
+        stats['rows'] += rows
+        stats['native_seconds'] += native
+        stats['marshalling_seconds'] += max(0.0, elapsed - native - children)
+        if code is not None:
+            stats['errors'][code] = stats['errors'].get(code, 0) + 1
+
+
+def _profile(name, func, args, kwargs):
+    """
+    Call a function and count it.
+    """
+    stack = _LOCAL.__dict__.setdefault('stack', [])
+    frame = [0.0, 0.0, 0]
+    stack.append(frame)
+    code = None
+    t0 = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    except Exception as exc:
+        code = _error_code(exc)
+        raise
+    finally:
+        elapsed = time.perf_counter() - t0
+        stack.pop()
+        if stack:
+            stack[-1][1] += elapsed
+        _record(name, elapsed, frame, code)
+
+
+def call(name, func, *args, **kwargs):
+    """
+    Call a function and, if enabled, count it under ``name``.
+
+    :param name: name of the function in the metrics
+    :type name: str
+    :param func: function
+    :returns: the result of ``func``
+    """
+    if not _ENABLED:
+        return func(*args, **kwargs)
+    return _profile(name, func, args, kwargs)
+
+
+def instrument(func):
+    """
+    Decorate a function to count its calls when enabled.
+
+    **Example:**
+
+    >>> @instrument
+    ... def get_solposAM(location, datetimes, weather):
+    ...     ...
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _ENABLED:
+            return func(*args, **kwargs)
+        return _profile(name, func, args, kwargs)
+    return wrapper
+
+
+def native(rows, func, *args):
+    """
+    Call a native function and, if enabled, add its time and rows to the
+    function being counted.
+
+    :param rows: number of rows calculated
+    :type rows: int
+    :param func: ctypes function, or a function that calls it
+    :returns: the result of ``func``
+    """
+    if not _ENABLED:
+        return func(*args)
+    t0 = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        stack = getattr(_LOCAL, 'stack', None)
+        if stack:
+            frame = stack[-1]
+            frame[0] += time.perf_counter() - t0
+            frame[2] += rows
+
+
+def snapshot(reset=False):
+    """
+    Get the counts of every function called since the last reset.
+
+    :param reset: also reset the counts, atomically
+    :type reset: bool
+    :returns: ``calls``, ``rows``, ``native_seconds``,
+        ``marshalling_seconds`` and ``errors`` by label per function name
+    :rtype: dict
+
+    **Example:**
+
+    >>> enable()
+    >>> angles, airmass = get_solposAM(location, datetimes, weather)
+    >>> snapshot()['get_solposAM']['rows']
+    8760
+    """
+    global _STATS
+    with _LOCK:
+        result = dict(
+            (name, dict(stats, errors=dict(stats['errors'])))
+            for name, stats in _STATS.items())
+        if reset:
+            _STATS = {}
+    return result
+
+
+def reset():
+    """
+    Reset every count to zero.
+    """
+    snapshot(reset=True)
+
+
+def _escape(value):
+    """
+    Escape a label value of the text format.
+    """
+    return (value.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def export_text(stats=None, prefix=PREFIX):
+    """
+    Export counts in the Prometheus plain-text exposition format.
+
+    :param stats: counts from :func:`snapshot`, ``None`` for a new snapshot
+    :type stats: dict
+    :param prefix: prefix of the metric names
+    :type prefix: str
+    :returns: a ``# HELP`` and ``# TYPE`` header and a line per function of
+        each counter, and a line per function and error label of
+        ``<prefix>_errors_total``
+    :rtype: str
+
+    **Example:**
+
+    >>> print(export_text())
+    # HELP solar_utils_calls_total Calls per function.
+    # TYPE solar_utils_calls_total counter
+    solar_utils_calls_total{function="get_solposAM"} 1
+    ...
+    """
+    if stats is None:
+        stats = snapshot()
+    counters = (
+        ('calls_total', 'calls', 'Calls per function.'),
+        ('rows_total', 'rows', 'Rows calculated by the library.'),
+        ('native_seconds_total', 'native_seconds',
+         'Seconds in the library.'),
+        ('marshalling_seconds_total', 'marshalling_seconds',
+         'Seconds outside the library.'))
+    lines = []
+    for metric, key, description in counters:
+        metric = '%s_%s' % (prefix, metric)
+        lines.append('# HELP %s %s' % (metric, description))
+        lines.append('# TYPE %s counter' % metric)
+        for name in sorted(stats):
+            lines.append('%s{function="%s"} %r' % (
+                metric, _escape(name), stats[name][key]))
+    metric = '%s_errors_total' % prefix
+    lines.append('# HELP %s Errors raised per function and code.' % metric)
+    lines.append('# TYPE %s counter' % metric)
+    for name in sorted(stats):
+        errors = stats[name]['errors']
+        for code in sorted(errors):
+            lines.append('%s{function="%s",code="%s"} %d' % (
+                metric, _escape(name), _escape(code), errors[code]))
+    return '\n'.join(lines) + '\n'
@@ -110,14 +110,14 @@ struct trigdata /* used to pass calculated values locally */
 * Temporary global variables used only in this file:
 *
 *++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++*/
-  static int  month_days[2][13] = { { 0,   0,  31,  59,  90, 120, 151,
+  static const int  month_days[2][13] = { { 0,   0,  31,  59,  90, 120, 151,
                                        181, 212, 243, 273, 304, 334 },
                                     { 0,   0,  31,  60,  91, 121, 152,
                                        182, 213, 244, 274, 305, 335 } };
                    /* cumulative number of days prior to beginning of month */
 
-  static float degrad = 57.295779513; /* converts from radians to degrees */
-  static float raddeg = 0.0174532925; /* converts from degrees to radians */
+  static const float degrad = 57.295779513; /* converts from radians to degrees */
+  static const float raddeg = 0.0174532925; /* converts from degrees to radians */
 
 /*============================================================================
 *    Local function prototypes
@@ -126,6 +126,9 @@ static long int validate ( struct posdata *pdat);
 static void dom2doy( struct posdata *pdat );
 static void doy2dom( struct posdata *pdat );
 static void geometry ( struct posdata *pdat );
+static void geometry_time ( struct posdata *pdat );
+static void geometry_site ( struct posdata *pdat );
+static long local ( struct posdata *pdat );
 static void zen_no_ref ( struct posdata *pdat, struct trigdata *tdat );
 static void ssha( struct posdata *pdat, struct trigdata *tdat );
 static void sbcf( struct posdata *pdat, struct trigdata *tdat );
@@ -177,17 +180,6 @@ long S_solpos (struct posdata *pdat)
 {
   long int retval;
 
-  struct trigdata trigdat, *tdat;
-
-  tdat = &trigdat;   /* point to the structure */
-
-  /* initialize the trig structure */
-  tdat->sd = -999.0; /* flag to force calculation of trig data */
-  tdat->cd =    1.0;
-  tdat->ch =    1.0; /* set the rest of these to something safe */
-  tdat->cl =    1.0;
-  tdat->sl =    1.0;
-
   if ((retval = validate ( pdat )) != 0) /* validate the inputs */
     return retval;
 
@@ -200,6 +192,64 @@ long S_solpos (struct posdata *pdat)
   if ( pdat->function & L_GEOM )
     geometry( pdat );               /* do basic geometry calculations */
 
+  return local( pdat );
+}
+
+
+/*============================================================================
+*    Long integer function S_solpos_shared
+*
+*    Same as S_solpos, but reuses the site-independent ephemeris that is
+*    already in the struct posdata from a previous call of S_solpos for the
+*    same date, time, interval and time zone:
+*        daynum, dayang, erv, utime, julday, ectime, mnlong, mnanom, eclong,
+*        ecobli, declin, rascen and gmst
+*    Only the site-specific calculations (local sidereal time, hour angle,
+*    zenith, azimuth, refraction, airmass, etc.) are done, so many sites can
+*    share one ephemeris calculation per timestamp. The results are identical
+*    to S_solpos.
+*
+*    Requires:
+*        the same inputs as S_solpos, and the ephemeris above
+*
+*    Returns (via the struct posdata parameter):
+*        everything defined in the struct posdata in solpos.h.
+*----------------------------------------------------------------------------*/
+long S_solpos_shared (struct posdata *pdat)
+{
+  long int retval;
+
+  if ((retval = validate ( pdat )) != 0) /* validate the inputs */
+    return retval;
+
+  if ( pdat->function & L_DOY )
+    doy2dom( pdat );                /* month-day, daynum is reused */
+
+  if ( pdat->function & L_GEOM )
+    geometry_site( pdat );          /* site part of geometry calculations */
+
+  return local( pdat );
+}
+
+
+/*============================================================================
+*    Local long int function local
+*
+*    Calculations of S_solpos after the basic geometry
+*----------------------------------------------------------------------------*/
+static long local (struct posdata *pdat)
+{
+  struct trigdata trigdat, *tdat;
+
+  tdat = &trigdat;   /* point to the structure */
+
+  /* initialize the trig structure */
+  tdat->sd = -999.0; /* flag to force calculation of trig data */
+  tdat->cd =    1.0;
+  tdat->ch =    1.0; /* set the rest of these to something safe */
+  tdat->cl =    1.0;
+  tdat->sl =    1.0;
+
   if ( pdat->function & L_ZENETR )  /* etr at non-refracted zenith angle */
     zen_no_ref( pdat, tdat );
 
@@ -423,6 +473,19 @@ static void doy2dom(struct posdata *pdat)
 *    Does the underlying geometry for a given time and location
 *----------------------------------------------------------------------------*/
 static void geometry ( struct posdata *pdat )
+{
+    geometry_time( pdat );
+    geometry_site( pdat );
+}
+
+
+/*============================================================================
+*    Local Void function geometry_time
+*
+*    Site-independent part of geometry: depends only on date, time, interval
+*    and time zone
+*----------------------------------------------------------------------------*/
+static void geometry_time ( struct posdata *pdat )
 {
   float bottom;      /* denominator (bottom) of the fraction */
   float c2;          /* cosine of d2 */
@@ -555,6 +618,16 @@ static void geometry ( struct posdata *pdat )
     if ( pdat->gmst < 0.0 )
         pdat->gmst += 24.0;
 
+}
+
+
+/*============================================================================
+*    Local Void function geometry_site
+*
+*    Site-specific part of geometry: local sidereal time and hour angle
+*----------------------------------------------------------------------------*/
+static void geometry_site ( struct posdata *pdat )
+{
     /* Local mean sidereal time */
         /*  Michalsky, J.  1988.  The Astronomical Almanac's algorithm for
             approximate solar position (1950-2050).  Solar Energy 40 (3),
@@ -335,6 +335,22 @@ VARIABLE      Mask       Required Variables
 *----------------------------------------------------------------------------*/
 long S_solpos (struct posdata *pdat);
 
+/*============================================================================
+*    Long int function S_solpos_shared
+*
+*    Same as S_solpos, but reuses the site-independent ephemeris (daynum,
+*    dayang, erv, utime, julday, ectime, mnlong, mnanom, eclong, ecobli,
+*    declin, rascen and gmst) already in pdat from a call of S_solpos for the
+*    same date, time, interval and time zone.
+*
+*    Requires:
+*        the same inputs as S_solpos, and the ephemeris above
+*
+*    Returns:
+*        everything defined at the top of this listing.
+*----------------------------------------------------------------------------*/
+long S_solpos_shared (struct posdata *pdat);
+
 /*============================================================================
 *    Void function S_init
 *
@@ -4,6 +4,14 @@
 #include <math.h>
 #include <string.h>
 #include <stdio.h>
+#include <stdlib.h>
+
+// include OS threads
+#ifdef WIN32
+#include <windows.h>
+#else
+#include <pthread.h>
+#endif
 
 // include solpos header
 // contains documentation, function and structure prototypes, enumerations and
@@ -105,15 +113,427 @@ DllExport long solposAM( float location[3], int datetime[6], float weather[2],
 
 }
 
+// rows of a batch computed by one thread
+struct rows_task {
+    void (*func)( void *args, size_t start, size_t stop );
+    void *args;
+    size_t start;
+    size_t stop;
+};
+
+#ifdef WIN32
+static DWORD WINAPI run_rows( LPVOID task )
+#else
+static void *run_rows( void *task )
+#endif
+{
+    struct rows_task *t = (struct rows_task *)task;
+    t->func( t->args, t->start, t->stop );
+    return 0;
+}
+
+// parallel_rows
+// Splits cnt rows into contiguous chunks and calls func( args, start, stop )
+// for each chunk on its own OS thread. The calling thread computes the last
+// chunk. Chunks that can't get a thread are computed by the calling thread,
+// so every row is always computed exactly once.
+// Inputs:
+//      func: (void (*)) callback that computes rows in [start, stop)
+//      args: (void*) arguments passed to func
+//      cnt: (size_t) number of rows
+//      num_threads: (int) number of threads, including the calling thread
+static void parallel_rows( void (*func)( void *args, size_t start,
+    size_t stop ), void *args, size_t cnt, int num_threads )
+{
+    struct rows_task *tasks;
+#ifdef WIN32
+    HANDLE *threads;
+#else
+    pthread_t *threads;
+#endif
+    int *started;
+    size_t n = num_threads < 1 ? 1 : (size_t)num_threads;
+    size_t t;
+
+    if ( n > cnt ) n = cnt;
+    if ( n <= 1 ) {
+        func( args, 0, cnt );
+        return;
+    }
+    tasks = malloc( n * sizeof(*tasks) );
+    threads = malloc( n * sizeof(*threads) );
+    started = calloc( n, sizeof(*started) );
+    if ( !tasks || !threads || !started ) {
+        free( tasks ); free( threads ); free( started );
+        func( args, 0, cnt );
+        return;
+    }
+    for ( t = 0; t < n; t++ ) {
+        tasks[t].func = func;
+        tasks[t].args = args;
+        tasks[t].start = cnt * t / n;
+        tasks[t].stop = cnt * (t + 1) / n;
+    }
+    for ( t = 0; t + 1 < n; t++ ) {
+#ifdef WIN32
+        threads[t] = CreateThread( NULL, 0, run_rows, &tasks[t], 0, NULL );
+        started[t] = threads[t] != NULL;
+#else
+        started[t] = pthread_create( &threads[t], NULL, run_rows,
+            &tasks[t] ) == 0;
+#endif
+        if ( !started[t] ) run_rows( &tasks[t] );
+    }
+    run_rows( &tasks[n - 1] );
+    for ( t = 0; t + 1 < n; t++ ) {
+        if ( !started[t] ) continue;
+#ifdef WIN32
+        WaitForSingleObject( threads[t], INFINITE );
+        CloseHandle( threads[t] );
+#else
+        pthread_join( threads[t], NULL );
+#endif
+    }
+    free( tasks ); free( threads ); free( started );
+}
+
+// arguments of get_solposAM passed to each thread
+struct solposAM_args {
+    float *location;
+    int (*datetimes)[6];
+    float *weather;
+    float (*angles)[2];
+    float (*airmass)[2];
+    int (*settings)[2];
+    float (*orientation)[2];
+    float (*shadowband)[3];
+    long *err_code;
+};
+
+static void solposAM_chunk( void *args, size_t start, size_t stop )
+{
+    struct solposAM_args *a = (struct solposAM_args *)args;
+    for (size_t i=start; i<stop; i++){
+        a->err_code[i] = solposAM( a->location, a->datetimes[i], a->weather,
+            a->angles[i], a->airmass[i], a->settings[i], a->orientation[i],
+            a->shadowband[i] );
+    }
+}
+
 // get_solposAM
+// Calls solposAM for a sequence of datetimes. Each row is independent so the
+// rows are split across num_threads OS threads, results are identical to the
+// serial loop.
 DllExport long get_solposAM( float location[3], int datetimes[][6],
     float weather[2], int cnt, float angles[][2], float airmass[][2],
     int settings[][2], float orientation[][2], float shadowband[][3],
-    long err_code[])
+    long err_code[], int num_threads )
 {
-    for (size_t i=0; i<cnt; i++){
-        err_code[i] = solposAM( location, datetimes[i], weather, angles[i],
-            airmass[i], settings[i], orientation[i], shadowband[i] );
+    struct solposAM_args args = { location, datetimes, weather, angles,
+        airmass, settings, orientation, shadowband, err_code };
+    parallel_rows( solposAM_chunk, &args, cnt, num_threads );
+    return 0;
+}
+
+
+// arguments of get_solposAM_rows passed to each thread
+struct solposAM_rows_args {
+    float *latitude;
+    float *longitude;
+    float *timezone;
+    int (*datetimes)[6];
+    float *pressure;
+    float *temperature;
+    int *steps;
+    float (*angles)[2];
+    float (*airmass)[2];
+    int (*settings)[2];
+    float (*orientation)[2];
+    float (*shadowband)[3];
+    long *err_code;
+};
+
+static void solposAM_rows_chunk( void *args, size_t start, size_t stop )
+{
+    struct solposAM_rows_args *a = (struct solposAM_rows_args *)args;
+    float location[3], weather[2];
+    int *steps = a->steps;
+    for (size_t i=start; i<stop; i++){
+        location[0] = a->latitude[i * steps[0]];
+        location[1] = a->longitude[i * steps[1]];
+        location[2] = a->timezone[i * steps[2]];
+        weather[0] = a->pressure[i * steps[3]];
+        weather[1] = a->temperature[i * steps[4]];
+        a->err_code[i] = solposAM( location, a->datetimes[i], weather,
+            a->angles[i], a->airmass[i], a->settings[i], a->orientation[i],
+            a->shadowband[i] );
+    }
+}
+
+// get_solposAM_rows
+// Same as get_solposAM but with location and weather given per row as
+// separate columns. Each column is either a single value broadcast to every
+// row (step 0) or an array with one value per row (step 1).
+// Inputs:
+//      latitude, longitude, timezone: (float*) location columns
+//      datetimes: (int**) [year, month, day, hour, minute, second] per row
+//      pressure, temperature: (float*) weather columns
+//      steps: (int*) step of each column [lat, lon, tz, press, temp]
+//      cnt: (int) number of rows
+//      num_threads: (int) number of OS threads
+// Outputs: same as get_solposAM
+DllExport long get_solposAM_rows( float latitude[], float longitude[],
+    float timezone[], int datetimes[][6], float pressure[],
+    float temperature[], int steps[5], int cnt, float angles[][2],
+    float airmass[][2], int settings[][2], float orientation[][2],
+    float shadowband[][3], long err_code[], int num_threads )
+{
+    struct solposAM_rows_args args = { latitude, longitude, timezone,
+        datetimes, pressure, temperature, steps, angles, airmass, settings,
+        orientation, shadowband, err_code };
+    parallel_rows( solposAM_rows_chunk, &args, cnt, num_threads );
+    return 0;
+}
+
+
+// copy the site-independent ephemeris computed by S_solpos for one
+// timestamp and time zone, see S_solpos_shared
+static void copy_ephemeris( struct posdata *dst, struct posdata *src )
+{
+    dst->daynum = src->daynum;
+    dst->dayang = src->dayang;
+    dst->erv    = src->erv;
+    dst->utime  = src->utime;
+    dst->julday = src->julday;
+    dst->ectime = src->ectime;
+    dst->mnlong = src->mnlong;
+    dst->mnanom = src->mnanom;
+    dst->eclong = src->eclong;
+    dst->ecobli = src->ecobli;
+    dst->declin = src->declin;
+    dst->rascen = src->rascen;
+    dst->gmst   = src->gmst;
+}
+
+// arguments of get_solposAM_fleet passed to each thread
+struct solposAM_fleet_args {
+    float (*sites)[3];
+    int nsites;
+    int *order;
+    int (*datetimes)[6];
+    int ntimes;
+    float (*weather)[2];
+    int *weather_steps;
+    float (*angles)[2];
+    float (*airmass)[2];
+    int (*settings)[2];
+    float (*orientation)[2];
+    float (*shadowband)[3];
+    long *err_code;
+};
+
+static void solposAM_fleet_chunk( void *args, size_t start, size_t stop )
+{
+    struct solposAM_fleet_args *a = (struct solposAM_fleet_args *)args;
+    struct posdata pd, ephem, *pdat = &pd;
+    float *site, *weather;
+    int shared;
+    size_t s, i;
+    for (size_t t=start; t<stop; t++){
+        shared = 0; // no ephemeris yet for this timestamp
+        for (int k=0; k<a->nsites; k++){
+            s = (size_t)a->order[k];
+            i = s * a->ntimes + t;
+            site = a->sites[s];
+            weather = a->weather[s * a->weather_steps[0]
+                + t * a->weather_steps[1]];
+            S_init(pdat);
+            pdat->function = ( (S_SOLAZM  | S_REFRAC | S_AMASS) & ~S_DOY );
+            pdat->latitude  = site[0];
+            pdat->longitude = site[1];
+            pdat->timezone  = site[2];
+            pdat->press     = weather[0];
+            pdat->temp      = weather[1];
+            pdat->tilt      = 0;
+            pdat->aspect    = 180;
+            pdat->year      = a->datetimes[t][0];
+            pdat->month     = a->datetimes[t][1];
+            pdat->day       = a->datetimes[t][2];
+            pdat->hour      = a->datetimes[t][3];
+            pdat->minute    = a->datetimes[t][4];
+            pdat->second    = a->datetimes[t][5];
+            // UTC time depends on the time zone, so sites are sorted by time
+            // zone and the ephemeris is shared by consecutive sites in the
+            // same time zone
+            if ( shared && ephem.timezone == pdat->timezone ) {
+                copy_ephemeris( pdat, &ephem );
+                a->err_code[i] = S_solpos_shared(pdat);
+            } else {
+                a->err_code[i] = S_solpos(pdat);
+                shared = a->err_code[i] == 0;
+                if ( shared ) ephem = pd;
+            }
+            a->angles[i][0] = pdat->zenref;
+            a->angles[i][1] = pdat->azim;
+            a->airmass[i][0] = pdat->amass;
+            a->airmass[i][1] = pdat->ampress;
+            a->settings[i][0] = pdat->daynum;
+            a->settings[i][1] = pdat->interval;
+            a->orientation[i][0] = pdat->tilt;
+            a->orientation[i][1] = pdat->aspect;
+            a->shadowband[i][0] = pdat->sbwid;
+            a->shadowband[i][1] = pdat->sbrad;
+            a->shadowband[i][2] = pdat->sbsky;
+        }
+    }
+}
+
+// get_solposAM_fleet
+// Same as solposAM for every site and every datetime, but the time-only
+// ephemeris is calculated once per datetime and time zone and shared by all
+// of the sites in that time zone, so only the site-specific steps (hour
+// angle, zenith, azimuth, refraction and airmass) are done per site. Results
+// are identical to calling solposAM for each site and datetime. Datetimes are
+// split across num_threads OS threads.
+// Inputs:
+//      sites: (float**) [latitude, longitude, UTC-timezone] per site
+//      nsites: (int) number of sites
+//      order: (int*) indices of the sites sorted by time zone
+//      datetimes: (int**) [year, month, day, hour, minute, second]
+//      ntimes: (int) number of datetimes
+//      weather: (float**) [ambient-pressure (mBar), ambient-temperature (C)]
+//      weather_steps: (int*) step of weather rows per [site, datetime]
+//      num_threads: (int) number of OS threads
+// Outputs: same as get_solposAM, with row site * ntimes + datetime
+DllExport long get_solposAM_fleet( float sites[][3], int nsites, int order[],
+    int datetimes[][6], int ntimes, float weather[][2], int weather_steps[2],
+    float angles[][2], float airmass[][2], int settings[][2],
+    float orientation[][2], float shadowband[][3], long err_code[],
+    int num_threads )
+{
+    struct solposAM_fleet_args args = { sites, nsites, order, datetimes,
+        ntimes, weather, weather_steps, angles, airmass, settings,
+        orientation, shadowband, err_code };
+    parallel_rows( solposAM_fleet_chunk, &args, ntimes, num_threads );
+    return 0;
+}
+
+
+// posdata fields that get_solpos_outputs can return, in the same order as
+// SOLPOS_OUTPUTS in core.py
+enum { O_DAYNUM, O_AMASS, O_AMPRESS, O_AZIM, O_COSINC, O_COSZEN, O_DAYANG,
+    O_DECLIN, O_ELEVETR, O_ELEVREF, O_EQNTIM, O_ERV, O_ETR, O_ETRN,
+    O_ETRTILT, O_HRANG, O_PRIME, O_SBCF, O_SRETR, O_SSETR, O_SSHA, O_TST,
+    O_TSTFIX, O_UNPRIME, O_ZENETR, O_ZENREF };
+
+static float posdata_field( struct posdata *pdat, int field )
+{
+    switch ( field ) {
+        case O_DAYNUM:  return (float)pdat->daynum;
+        case O_AMASS:   return pdat->amass;
+        case O_AMPRESS: return pdat->ampress;
+        case O_AZIM:    return pdat->azim;
+        case O_COSINC:  return pdat->cosinc;
+        case O_COSZEN:  return pdat->coszen;
+        case O_DAYANG:  return pdat->dayang;
+        case O_DECLIN:  return pdat->declin;
+        case O_ELEVETR: return pdat->elevetr;
+        case O_ELEVREF: return pdat->elevref;
+        case O_EQNTIM:  return pdat->eqntim;
+        case O_ERV:     return pdat->erv;
+        case O_ETR:     return pdat->etr;
+        case O_ETRN:    return pdat->etrn;
+        case O_ETRTILT: return pdat->etrtilt;
+        case O_HRANG:   return pdat->hrang;
+        case O_PRIME:   return pdat->prime;
+        case O_SBCF:    return pdat->sbcf;
+        case O_SRETR:   return pdat->sretr;
+        case O_SSETR:   return pdat->ssetr;
+        case O_SSHA:    return pdat->ssha;
+        case O_TST:     return pdat->tst;
+        case O_TSTFIX:  return pdat->tstfix;
+        case O_UNPRIME: return pdat->unprime;
+        case O_ZENETR:  return pdat->zenetr;
+        case O_ZENREF:  return pdat->zenref;
+        default:        return 0;
     }
+}
+
+// arguments of get_solpos_outputs passed to each thread
+struct solpos_outputs_args {
+    float *latitude;
+    float *longitude;
+    float *timezone;
+    int (*datetimes)[6];
+    float *pressure;
+    float *temperature;
+    float *tilt;
+    float *aspect;
+    int *steps;
+    size_t cnt;
+    int function;
+    int *fields;
+    int nfields;
+    float *outputs;
+    long *err_code;
+};
+
+static void solpos_outputs_chunk( void *args, size_t start, size_t stop )
+{
+    struct solpos_outputs_args *a = (struct solpos_outputs_args *)args;
+    struct posdata pd, *pdat = &pd;
+    int *steps = a->steps;
+    for (size_t i=start; i<stop; i++){
+        S_init(pdat);
+        pdat->function  = a->function;
+        pdat->latitude  = a->latitude[i * steps[0]];
+        pdat->longitude = a->longitude[i * steps[1]];
+        pdat->timezone  = a->timezone[i * steps[2]];
+        pdat->press     = a->pressure[i * steps[3]];
+        pdat->temp      = a->temperature[i * steps[4]];
+        pdat->tilt      = a->tilt[i * steps[5]];
+        pdat->aspect    = a->aspect[i * steps[6]];
+        pdat->year      = a->datetimes[i][0];
+        pdat->month     = a->datetimes[i][1];
+        pdat->day       = a->datetimes[i][2];
+        pdat->hour      = a->datetimes[i][3];
+        pdat->minute    = a->datetimes[i][4];
+        pdat->second    = a->datetimes[i][5];
+        a->err_code[i] = S_solpos(pdat);
+        for (int f=0; f<a->nfields; f++){
+            a->outputs[f * a->cnt + i] = posdata_field( pdat, a->fields[f] );
+        }
+    }
+}
+
+// get_solpos_outputs
+// Calls S_solpos once per row with any function mask and returns the
+// requested posdata fields. Inputs are columns like get_solposAM_rows, each
+// either broadcast (step 0) or given per row (step 1).
+// Inputs:
+//      latitude, longitude, timezone: (float*) location columns
+//      datetimes: (int**) [year, month, day, hour, minute, second] per row
+//      pressure, temperature: (float*) weather columns
+//      tilt, aspect: (float*) orientation columns (degrees)
+//      steps: (int*) step of each column [lat, lon, tz, press, temp, tilt,
+//          aspect]
+//      cnt: (int) number of rows
+//      function: (int) S_solpos function mask, must not contain L_DOY
+//      fields: (int*) posdata fields to return, see O_DAYNUM ... O_ZENREF
+//      nfields: (int) number of fields
+//      num_threads: (int) number of OS threads
+// Outputs:
+//      outputs: (float*) field f of row i at outputs[f * cnt + i]
+//      err_code: (long*) S_solpos return code per row
+DllExport long get_solpos_outputs( float latitude[], float longitude[],
+    float timezone[], int datetimes[][6], float pressure[],
+    float temperature[], float tilt[], float aspect[], int steps[7], int cnt,
+    int function, int fields[], int nfields, float outputs[],
+    long err_code[], int num_threads )
+{
+    struct solpos_outputs_args args = { latitude, longitude, timezone,
+        datetimes, pressure, temperature, tilt, aspect, steps, (size_t)cnt,
+        function, fields, nfields, outputs, err_code };
+    parallel_rows( solpos_outputs_chunk, &args, cnt, num_threads );
     return 0;
-}
\ No newline at end of file
+}
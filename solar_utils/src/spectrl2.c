@@ -6,10 +6,12 @@
 #include <math.h>
 #include <string.h>
 #include <stdio.h>
+#include <stdlib.h>
 
 // include spectrl2 header
 // contains documentation, function and structure prototypes, enumerations and
 // other definitions and macros
+#include "solpos00.h"
 #include "spectrl2_2.h"
 
 // define a macro for __declspec(dllexport) keyword instead of .def file
@@ -21,47 +23,13 @@
 #define DllImport
 #endif
 
-// import solposAM
-DllImport long solposAM( float *location, int *datetime, float *weather,
-    float *angles, float *airmass, int *settings, float *orientation,
-    float *shadowband );
-
-// spectrl2
-// Inputs:
-//      units: (int) output units: 1, 2 or 3
-//      location: (float*) [longitude, latitude, UTC-timezone]
-//      datetime: (int*) [year, month, day, hour, minute, second]
-//      weather: (float*) [ambient-pressure (mBar), ambient-temperature (C)]
-//      orientation: (float*) [tilt, aspect] (degrees)
-//      atmosphericConditions: (float*) [alpha, assym, ozone, tau500, watvap]
-//      albedo: (float**) [wavelength * 6], [reflectance * 6]  (optional)
-// Outputs:
-//      specdif: (float*) diffuse spectrum on panel
-//      specdir: (float*) direct normal spectrum on panel
-//      specetr: (float*) extraterrestrial spectrum
-//      specglo: (float*) global spectrum on panel
-//      specx: (float*) wavelength
-//      angles: (float*) [refracted-zenith, azimuth]
-//      airmass: (float*) [airmass (atmos), pressure-adjusted-airmass (atmos)]
-//      settings: (int*): [daynum, interval]
-//      shadowband: (float*): [width, radiation, sky]
-DllExport long spectrl2( int units, float *location, int *datetime,
-    float *weather, float *orientation, float *atmosphericConditions,
-    float *albedo, float *specdif, float *specdir, float *specetr,
-    float *specglo, float *specx, float *angles, float *airmass, int *settings, 
-    float *shadowband )
+// set_inputs
+// Initializes the spectral2 data structure and sets every input except the
+// weather, see spectrl2_window.
+static void set_inputs( struct specdattype *specdat, int units,
+    float *location, int *datetime, float *orientation,
+    float *atmosphericConditions, float *albedo, int first, int last )
 {
-
-    /* variable declarations */
-    struct specdattype spdat, *specdat;  /* spectral2 data structure */
-    static int   i;                      /* Loop counter */
-    long retval;              /* to capture S_spectral2 return codes */
-
-    /**************  Begin Program **************/
-
-    /* point to the specral2 structure */
-    specdat = &spdat;
-
     /* Initialize the data structure -- you can omit if ALL structure vaiables 
      * are assigned elswhere. Defaults in initialization can be overridden by 
      * reassigning below. */
@@ -90,14 +58,6 @@ DllExport long spectrl2( int units, float *location, int *datetime,
     specdat->minute    = datetime[4]; // 45;
     specdat->second    = datetime[5]; // 37;
 
-    /* Let's assume that the temperature is 27 degrees C and that
-     * the pressure is 1006 millibars.  The temperature is used for the
-     * atmospheric refraction correction, and the pressure is used for the
-     * refraction correction and the pressure-corrected airmass. */
-
-    specdat->press     = weather[0]; // 1006.0; // mB
-    specdat->temp      = weather[1]; //   27.0; // deg C
-
     /* We will use the first set of units (energy vs wavelength) */
 
     specdat->units     = units; // 1;
@@ -134,22 +94,357 @@ DllExport long spectrl2( int units, float *location, int *datetime,
     specdat->tilt      = orientation[0]; // specdat->latitude;  /* Tilted at latitude */
     specdat->aspect    = orientation[1]; // 135.0;       /* 135 deg. = SE */
 
-    /* call the computational routine */
-    retval = S_spectral2 ( specdat );
+    /* only calculate the wavelengths in the window */
+    specdat->specfirst = first;
+    specdat->speclast  = last;
+}
 
-    // fill in values for angles, airmass, settings and shadowband
-    solposAM( location, datetime, weather, angles, airmass, settings,
-        orientation, shadowband );
+// get_outputs
+// Copies the spectra in the window [first, last) out of the spectral2 data
+// structure, see spectrl2_window.
+static void get_outputs( struct specdattype *specdat, int first, int last,
+    float *specdif, float *specdir, float *specetr, float *specglo,
+    float *specx )
+{
+    int   i;                             /* Loop counter */
 
     /* output of MEX function */
-    for ( i = 0; i < 122; ++i ) {
-        specdif[i]     = specdat->specdif[i];
-        specdir[i]     = specdat->specdir[i];
-        specetr[i]     = specdat->specetr[i];
-        specglo[i]     = specdat->specglo[i];
-        specx[i]       = specdat->specx[i];
+    for ( i = first; i < last; ++i ) {
+        specdif[i - first] = specdat->specdif[i];
+        specdir[i - first] = specdat->specdir[i];
+        specetr[i - first] = specdat->specetr[i];
+        specglo[i - first] = specdat->specglo[i];
+        specx[i - first]   = specdat->specx[i];
+    }
+}
+
+// spectrl2_window
+// Calculates the spectra only at the wavelengths in a window.
+// Inputs:
+//      units: (int) output units: 1, 2 or 3
+//      location: (float*) [longitude, latitude, UTC-timezone]
+//      datetime: (int*) [year, month, day, hour, minute, second]
+//      weather: (float*) [ambient-pressure (mBar), ambient-temperature (C)]
+//      orientation: (float*) [tilt, aspect] (degrees)
+//      atmosphericConditions: (float*) [alpha, assym, ozone, tau500, watvap]
+//      albedo: (float**) [wavelength * 6], [reflectance * 6]  (optional)
+//      first: (int) index of the first wavelength, 0 to 121
+//      last: (int) index after the last wavelength, first + 1 to 122
+// Outputs (spectra have last - first values):
+//      specdif: (float*) diffuse spectrum on panel
+//      specdir: (float*) direct normal spectrum on panel
+//      specetr: (float*) extraterrestrial spectrum
+//      specglo: (float*) global spectrum on panel
+//      specx: (float*) wavelength
+//      angles: (float*) [refracted-zenith, azimuth]
+//      airmass: (float*) [airmass (atmos), pressure-adjusted-airmass (atmos)]
+//      settings: (int*): [daynum, interval]
+//      shadowband: (float*): [width, radiation, sky]
+// The angles, airmass, settings and shadowband are the solar position that
+// S_spectral2 calculated for the spectra, which doesn't use the weather but
+// the SOLPOS defaults of 1013 mBar and 15 C.
+DllExport long spectrl2_window( int units, float *location, int *datetime,
+    float *weather, float *orientation, float *atmosphericConditions,
+    float *albedo, int first, int last, float *specdif, float *specdir,
+    float *specetr, float *specglo, float *specx, float *angles,
+    float *airmass, int *settings, float *shadowband )
+{
+
+    /* variable declarations */
+    struct specdattype spdat, *specdat;  /* spectral2 data structure */
+    struct posdata sdat, *soldat;        /* solpos data structure */
+    long retval;              /* to capture S_spectral2 return codes */
+
+    /**************  Begin Program **************/
+
+    /* point to the specral2 and solpos structures */
+    specdat = &spdat;
+    soldat = &sdat;
+
+    set_inputs( specdat, units, location, datetime, orientation,
+        atmosphericConditions, albedo, first, last );
+
+    /* Let's assume that the temperature is 27 degrees C and that
+     * the pressure is 1006 millibars.  The temperature is used for the
+     * atmospheric refraction correction, and the pressure is used for the
+     * refraction correction and the pressure-corrected airmass. */
+
+    specdat->press     = weather[0]; // 1006.0; // mB
+    specdat->temp      = weather[1]; //   27.0; // deg C
+
+    /* call the computational routine, keeping its solar position */
+    retval = S_spectral2_pos ( specdat, soldat, 0 );
+
+    // fill in values for angles, airmass, settings and shadowband from the
+    // solar position of the spectra, instead of calling solposAM again
+    if ( retval >= 0 ) {
+        angles[0]     = soldat->zenref;
+        angles[1]     = soldat->azim;
+        airmass[0]    = soldat->amass;
+        airmass[1]    = soldat->ampress;
+        settings[0]   = soldat->daynum;
+        settings[1]   = soldat->interval;
+        shadowband[0] = soldat->sbwid;
+        shadowband[1] = soldat->sbrad;
+        shadowband[2] = soldat->sbsky;
     }
 
+    get_outputs( specdat, first, last, specdif, specdir, specetr, specglo,
+        specx );
+
+    return retval;
+
+}
+
+// spectrl2_position
+// Calculates the spectra from a solar position calculated elsewhere, for
+// example by get_solposAM, without calling SOLPOS at all.
+// Inputs:
+//      units: (int) output units: 1, 2 or 3
+//      location: (float*) [longitude, latitude, UTC-timezone]
+//      datetime: (int*) [year, month, day, hour, minute, second], only the
+//          date is used
+//      angles: (float*) [refracted-zenith, azimuth] (degrees)
+//      airmass: (float*) [airmass (atmos), pressure-adjusted-airmass (atmos)]
+//      cosinc: (float*) cosine of the incidence angle on the panel, NULL to
+//          calculate it from the angles and orientation
+//      orientation: (float*) [tilt, aspect] (degrees)
+//      atmosphericConditions: (float*) [alpha, assym, ozone, tau500, watvap]
+//      albedo: (float**) [wavelength * 6], [reflectance * 6]  (optional)
+//      first: (int) index of the first wavelength, 0 to 121
+//      last: (int) index after the last wavelength, first + 1 to 122
+// Outputs (spectra have last - first values):
+//      specdif, specdir, specetr, specglo, specx: same as spectrl2_window
+DllExport long spectrl2_position( int units, float *location, int *datetime,
+    float *angles, float *airmass, float *cosinc, float *orientation,
+    float *atmosphericConditions, float *albedo, int first, int last,
+    float *specdif, float *specdir, float *specetr, float *specglo,
+    float *specx )
+{
+    struct specdattype spdat, *specdat;  /* spectral2 data structure */
+    struct posdata sdat, *soldat;        /* solpos data structure */
+    long retval;              /* to capture S_spectral2 return codes */
+
+    specdat = &spdat;
+    soldat = &sdat;
+
+    set_inputs( specdat, units, location, datetime, orientation,
+        atmosphericConditions, albedo, first, last );
+
+    /* the precomputed solar position */
+    soldat->zenref  = angles[0];
+    soldat->azim    = angles[1];
+    soldat->amass   = airmass[0];
+    soldat->ampress = airmass[1];
+    if ( cosinc != NULL )
+        soldat->cosinc = *cosinc;
+    if ( (retval = S_spec_pos ( specdat, soldat, cosinc == NULL )) != 0 )
+        return retval;
+
+    retval = S_spectral2_pos ( specdat, soldat, 1 );
+
+    get_outputs( specdat, first, last, specdif, specdir, specetr, specglo,
+        specx );
+
     return retval;
+}
+
+// spectrl2
+// Calculates the spectra at all 122 wavelengths, see spectrl2_window.
+DllExport long spectrl2( int units, float *location, int *datetime,
+    float *weather, float *orientation, float *atmosphericConditions,
+    float *albedo, float *specdif, float *specdir, float *specetr,
+    float *specglo, float *specx, float *angles, float *airmass, int *settings, 
+    float *shadowband )
+{
+    return spectrl2_window( units, location, datetime, weather, orientation,
+        atmosphericConditions, albedo, 0, 122, specdif, specdir, specetr,
+        specglo, specx, angles, airmass, settings, shadowband );
+}
+
+// get_spectrl2
+// Calls spectrl2 for a sequence of datetimes. Weather, orientation,
+// atmospheric conditions and albedo are either a single row broadcast to every
+// datetime (step 0) or one row per datetime (step 1).
+// Inputs:
+//      units: (int) output units: 1, 2 or 3
+//      location: (float*) [longitude, latitude, UTC-timezone]
+//      datetimes: (int**) [year, month, day, hour, minute, second] per row
+//      weather: (float**) [ambient-pressure (mBar), ambient-temperature (C)]
+//      orientation: (float**) [tilt, aspect] (degrees)
+//      atmosphericConditions: (float**) [alpha, assym, ozone, tau500, watvap]
+//      albedo: (float**) [wavelength * 6], [reflectance * 6]
+//      steps: (int*) step of [weather, orientation, atmosphericConditions,
+//          albedo]
+//      window: (int*) [first, last] indices of the wavelengths calculated
+//      cnt: (int) number of datetimes
+// Outputs:
+//      specdif, specdir, specetr, specglo: (float**) spectra per row with
+//          last - first values each
+//      specx: (float*) wavelength, the same for every row
+//      angles, airmass, settings, shadowband: (float**) solpos per row
+//      err_code: (long*) spectrl2 return code per row
+DllExport long get_spectrl2( int units, float *location, int datetimes[][6],
+    float weather[][2], float orientation[][2],
+    float atmosphericConditions[][5], float albedo[][12], int steps[4],
+    int window[2], int cnt, float *specdif, float *specdir, float *specetr,
+    float *specglo, float *specx, float angles[][2],
+    float airmass[][2], int settings[][2], float shadowband[][3],
+    long err_code[] )
+{
+    size_t n = window[1] - window[0];  /* wavelengths per row */
+    size_t rows = cnt > 0 ? (size_t)cnt : 0;
+    for (size_t i=0; i<rows; i++){
+        err_code[i] = spectrl2_window( units, location, datetimes[i],
+            weather[i * steps[0]], orientation[i * steps[1]],
+            atmosphericConditions[i * steps[2]], albedo[i * steps[3]],
+            window[0], window[1], specdif + i * n, specdir + i * n,
+            specetr + i * n, specglo + i * n, specx, angles[i], airmass[i],
+            settings[i], shadowband[i] );
+    }
+    return 0;
+}
+
+// get_spectrl2_position
+// Calls spectrl2_position for a sequence of datetimes. Orientation,
+// atmospheric conditions and albedo are either a single row broadcast to every
+// datetime (step 0) or one row per datetime (step 1).
+// Inputs:
+//      units: (int) output units: 1, 2 or 3
+//      location: (float*) [longitude, latitude, UTC-timezone]
+//      datetimes: (int**) [year, month, day, hour, minute, second] per row
+//      angles: (float**) [refracted-zenith, azimuth] per row
+//      airmass: (float**) [airmass, pressure-adjusted-airmass] per row
+//      cosinc: (float*) cosine of the incidence angle per row, or NULL
+//      orientation: (float**) [tilt, aspect] (degrees)
+//      atmosphericConditions: (float**) [alpha, assym, ozone, tau500, watvap]
+//      albedo: (float**) [wavelength * 6], [reflectance * 6]
+//      steps: (int*) step of [orientation, atmosphericConditions, albedo]
+//      window: (int*) [first, last] indices of the wavelengths calculated
+//      cnt: (int) number of datetimes
+// Outputs:
+//      specdif, specdir, specetr, specglo: (float**) spectra per row with
+//          last - first values each
+//      specx: (float*) wavelength, the same for every row
+//      err_code: (long*) spectrl2_position return code per row
+DllExport long get_spectrl2_position( int units, float *location,
+    int datetimes[][6], float angles[][2], float airmass[][2], float *cosinc,
+    float orientation[][2], float atmosphericConditions[][5],
+    float albedo[][12], int steps[3], int window[2], int cnt, float *specdif,
+    float *specdir, float *specetr, float *specglo, float *specx,
+    long err_code[] )
+{
+    size_t n = window[1] - window[0];  /* wavelengths per row */
+    size_t rows = cnt > 0 ? (size_t)cnt : 0;
+    for (size_t i=0; i<rows; i++){
+        err_code[i] = spectrl2_position( units, location, datetimes[i],
+            angles[i], airmass[i], cosinc == NULL ? NULL : cosinc + i,
+            orientation[i * steps[0]], atmosphericConditions[i * steps[1]],
+            albedo[i * steps[2]], window[0], window[1], specdif + i * n,
+            specdir + i * n, specetr + i * n, specglo + i * n, specx );
+    }
+    return 0;
+}
+
+// get_specx
+// Gets the x-coordinate of the spectra without calculating them.
+// Inputs:
+//      units: (int) output units: 1, 2 or 3
+// Outputs:
+//      specx: (float*) wavelength or energy
+DllExport long get_specx( int units, float *specx )
+{
+    return S_spec_x( units, specx );
+}
 
+// trapezoid_weights
+// Weights of the trapezoidal rule over the x-coordinate, which decreases
+// with units 3.
+static void trapezoid_weights( float *specx, double *weights )
+{
+    int i;
+    for ( i = 0; i < 122; ++i ) {
+        weights[i] = fabs( specx[i < 121 ? i + 1 : i]
+            - specx[i > 0 ? i - 1 : i] ) / 2.0;
+    }
+}
+
+// get_spectrl2_bands
+// Calls spectrl2 for a sequence of datetimes like get_spectrl2, but only
+// integrates the global spectrum of each row instead of returning it.
+// Inputs:
+//      units ... steps: (see get_spectrl2)
+//      cnt: (int) number of datetimes
+//      responses: (float**) spectral response of each band on the
+//          x-coordinate of units
+//      nbands: (int) number of bands
+//      reference: (float*) reference spectrum on the x-coordinate of units
+// Outputs:
+//      broadband: (float*) integrated global spectrum per row
+//      inband: (float**) integrated global spectrum times the response of
+//          each band per row, [cnt][nbands]
+//      mismatch: (float**) spectral mismatch factor of each band relative
+//          to the reference spectrum per row, [cnt][nbands], NaN if the
+//          broadband irradiance is zero
+//      (outputs of rows with errors are NaN)
+//      err_code: (long*) spectrl2 return code per row
+DllExport long get_spectrl2_bands( int units, float *location,
+    int datetimes[][6], float weather[][2], float orientation[][2],
+    float atmosphericConditions[][5], float albedo[][12], int steps[4],
+    int cnt, float responses[][122], int nbands, float *reference,
+    float *broadband, float *inband, float *mismatch, long err_code[] )
+{
+    float specdif[122], specdir[122], specetr[122], specglo[122];
+    float specx[122], angles[2], airmass[2], shadowband[3];
+    int settings[2];
+    double weights[122];
+    double *reference_bands; /* in-band fraction of the reference spectrum */
+    double total, band;
+    size_t rows = cnt > 0 ? (size_t)cnt : 0;
+    int b, j;
+
+    if ( S_spec_x( units, specx ) ) {
+        // every row has the same error
+        for ( size_t i = 0; i < rows; i++ ) err_code[i] = -1;
+        return 0;
+    }
+    trapezoid_weights( specx, weights );
+    reference_bands = malloc( ( nbands > 0 ? nbands : 1 ) * sizeof(double) );
+    if ( !reference_bands ) return -1;
+    total = 0.0;
+    for ( j = 0; j < 122; ++j ) total += weights[j] * reference[j];
+    for ( b = 0; b < nbands; ++b ) {
+        band = 0.0;
+        for ( j = 0; j < 122; ++j )
+            band += weights[j] * responses[b][j] * reference[j];
+        reference_bands[b] = band / total;
+    }
+    for ( size_t i = 0; i < rows; i++ ) {
+        err_code[i] = spectrl2( units, location, datetimes[i],
+            weather[i * steps[0]], orientation[i * steps[1]],
+            atmosphericConditions[i * steps[2]], albedo[i * steps[3]],
+            specdif, specdir, specetr, specglo, specx, angles, airmass,
+            settings, shadowband );
+        if ( err_code[i] ) {
+            // the spectra weren't calculated
+            broadband[i] = NAN;
+            for ( b = 0; b < nbands; ++b )
+                inband[i * nbands + b] = mismatch[i * nbands + b] = NAN;
+            continue;
+        }
+        total = 0.0;
+        for ( j = 0; j < 122; ++j ) total += weights[j] * specglo[j];
+        broadband[i] = total;
+        for ( b = 0; b < nbands; ++b ) {
+            band = 0.0;
+            for ( j = 0; j < 122; ++j )
+                band += weights[j] * responses[b][j] * specglo[j];
+            inband[i * nbands + b] = band;
+            mismatch[i * nbands + b] =
+                ( total > 0.0 && reference_bands[b] > 0.0 )
+                ? band / total / reference_bands[b] : NAN;
+        }
+    }
+    free( reference_bands );
+    return 0;
 }
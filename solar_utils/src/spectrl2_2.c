@@ -6,6 +6,62 @@
 #include "solpos00.h"
 #include "spectrl2_2.h"
 
+/* This array contains the extraterrestrial spectrum and atmospheric 
+   absorption coefficients at 122 wavelengths.  The first array range is
+   defined as follows:
+     0 = wavelength (microns)
+     1 = extraterrestrial spectrum (W/sq m/micron)
+     2 = water vapor absorption coefficient
+     3 = ozone absorption coefficient
+     4 = uniformly mixed gas "absorption coefficient"   */
+static const float A[5][122] = { { 0.3, 0.305, 0.31, 0.315, 0.32, 0.325, 0.33, 0.335, 0.34,
+  0.345, 0.35, 0.36, 0.37, 0.38, 0.39, 0.4, 0.41, 0.42, 0.43, 0.44, 0.45, 0.46, 0.47,
+  0.48, 0.49, 0.5, 0.51, 0.52, 0.53, 0.54, 0.55, 0.57, 0.593, 0.61, 0.63, 0.656, 
+  0.6676, 0.69, 0.71, 0.718, 0.7244, 0.74, 0.7525, 0.7575, 0.7625, 0.7675, 0.78, 0.8,
+  0.816, 0.8237, 0.8315, 0.84, 0.86, 0.88, 0.905, 0.915, 0.925, 0.93, 0.937, 0.948,
+  0.965, 0.98, 0.9935, 1.04, 1.07, 1.1, 1.12, 1.13, 1.145, 1.161, 1.17, 1.2, 1.24, 
+  1.27, 1.29, 1.32, 1.35, 1.395, 1.4425, 1.4625, 1.477, 1.497, 1.52, 1.539, 1.558,
+  1.578, 1.592, 1.61, 1.63, 1.646, 1.678, 1.74, 1.8, 1.86, 1.92, 1.96, 1.985, 2.005,
+  2.035, 2.065, 2.1, 2.148, 2.198, 2.27, 2.36, 2.45, 2.5, 2.6, 2.7, 2.8, 2.9, 3.0, 
+  3.1, 3.2, 3.3, 3.4, 3.5, 3.6, 3.7, 3.8, 3.9, 4.0 },
+    { 535.9, 558.3, 622.0, 692.7, 715.1, 832.9, 961.9, 931.9, 900.6, 911.3, 975.5,
+  975.9, 1119.9, 1103.8, 1033.8, 1479.1, 1701.3, 1740.4, 1587.2, 1837.0, 2005.0,
+  2043.0, 1987.0, 2027.0, 1896.0, 1909.0, 1927.0, 1831.0, 1891.0, 1898.0, 1892.0,
+  1840.0, 1768.0, 1728.0, 1658.0, 1524.0, 1531.0, 1420.0, 1399.0, 1374.0, 1373.0,
+  1298.0, 1269.0, 1245.0, 1223.0, 1205.0, 1183.0, 1148.0, 1091.0, 1062.0, 1038.0,
+  1022.0, 998.7, 947.2, 893.2, 868.2, 829.7, 830.3, 814.0, 786.9, 768.3, 767.0, 757.6,
+  688.1, 640.7, 606.2, 585.9, 570.2, 564.1, 544.2, 533.4, 501.6, 477.5, 442.7, 440.0,
+  416.8, 391.4, 358.9, 327.5, 317.5, 307.3, 300.4, 292.8, 275.5, 272.1, 259.3, 246.9,
+  244.0, 243.5, 234.8, 220.5, 190.8, 171.1, 144.5, 135.7, 123.0, 123.8, 113.0, 108.5,
+  97.5, 92.4, 82.4, 74.6, 68.3, 63.8, 49.5, 48.5, 38.6, 36.6, 32.0, 28.1, 24.8, 22.1,
+  19.6, 17.5, 15.7, 14.1, 12.7, 11.5, 10.4, 9.5, 8.6 },
+    { 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+  0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+  0.075, 0.0, 0.0, 0.0, 0.0, 0.016, 0.0125, 1.8, 2.5, 0.061, 0.0008, 0.0001, 0.00001,
+  0.00001, 0.0006, 0.036, 1.6, 2.5, 0.5, 0.155, 0.00001, 0.0026, 7.0, 5.0, 5.0, 27.0,
+  55.0, 45.0, 4.0, 1.48, 0.1, 0.00001, 0.001, 3.2, 115.0, 70.0, 75.0, 10.0, 5.0, 2.0,
+  0.002, 0.002, 0.1, 4.0, 200.0, 1000.0, 185.0, 80.0, 80.0, 12.0, 0.16, 0.002, 0.0005,
+  0.0001, 0.00001, 0.0001, 0.001, 0.01, 0.036, 1.1, 130.0, 1000.0, 500.0, 100.0, 4.0,
+  2.9, 1.0, 0.4, 0.22, 0.25, 0.33, 0.5, 4.0, 80.0, 310.0, 15000.0, 22000.0, 8000.0,
+  650.0, 240.0, 230.0, 100.0, 120.0, 19.5, 3.6, 3.1, 2.5, 1.4, 0.17, 0.0045 },
+    { 10.0, 4.8, 2.7, 1.35, 0.8, 0.38, 0.16, 0.075, 0.04, 0.019, 0.007, 0.0, 0.0, 0.0,
+  0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.003, 0.006, 0.009, 0.01400, 0.021, 0.03, 0.04,
+  0.048, 0.063, 0.075, 0.085, 0.12, 0.119, 0.12, 0.09, 0.065, 0.051, 0.028, 0.018,
+  0.015, 0.012, 0.01, 0.008, 0.007, 0.006, 0.005, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+  0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+  0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+  0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+  0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+  0.0 },
+    { 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+  0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+  0.0, 0.0, 0.0, 0.0, 0.15, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 4.0, 0.35, 0.0, 0.0, 0.0,
+  0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+  0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.05, 0.3, 0.02, 0.0002, 0.00011, 0.00001, 0.05,
+  0.011, 0.005, 0.0006, 0.0, 0.005, 0.13, 0.04, 0.06, 0.13, 0.001, 0.0014, 0.0001,
+  0.00001, 0.00001, 0.0001, 0.001, 4.3, 0.2, 21.0, 0.13, 1.0, 0.08, 0.001, 0.00038,
+  0.001, 0.0005, 0.00015, 0.00014, 0.00066, 100.0, 150.0, 0.13, 0.0095, 0.001, 0.8,
+  1.9, 1.3, 0.075, 0.01, 0.00195, 0.004, 0.29, 0.025 } };
 
 
 /*============================================================================
@@ -83,129 +139,89 @@
 
 int S_spectral2 (struct specdattype *specdat)
 {
-    /* This array contains the extraterrestrial spectrum and atmospheric 
-       absorption coefficients at 122 wavelengths.  The first array range is
-       defined as follows:
-         0 = wavelength (microns)
-         1 = extraterrestrial spectrum (W/sq m/micron)
-         2 = water vapor absorption coefficient
-         3 = ozone absorption coefficient
-         4 = uniformly mixed gas "absorption coefficient"   */
-    static float A[5][122] = { { 0.3, 0.305, 0.31, 0.315, 0.32, 0.325, 0.33, 0.335, 0.34,
-      0.345, 0.35, 0.36, 0.37, 0.38, 0.39, 0.4, 0.41, 0.42, 0.43, 0.44, 0.45, 0.46, 0.47,
-      0.48, 0.49, 0.5, 0.51, 0.52, 0.53, 0.54, 0.55, 0.57, 0.593, 0.61, 0.63, 0.656, 
-      0.6676, 0.69, 0.71, 0.718, 0.7244, 0.74, 0.7525, 0.7575, 0.7625, 0.7675, 0.78, 0.8,
-      0.816, 0.8237, 0.8315, 0.84, 0.86, 0.88, 0.905, 0.915, 0.925, 0.93, 0.937, 0.948,
-      0.965, 0.98, 0.9935, 1.04, 1.07, 1.1, 1.12, 1.13, 1.145, 1.161, 1.17, 1.2, 1.24, 
-      1.27, 1.29, 1.32, 1.35, 1.395, 1.4425, 1.4625, 1.477, 1.497, 1.52, 1.539, 1.558,
-      1.578, 1.592, 1.61, 1.63, 1.646, 1.678, 1.74, 1.8, 1.86, 1.92, 1.96, 1.985, 2.005,
-      2.035, 2.065, 2.1, 2.148, 2.198, 2.27, 2.36, 2.45, 2.5, 2.6, 2.7, 2.8, 2.9, 3.0, 
-      3.1, 3.2, 3.3, 3.4, 3.5, 3.6, 3.7, 3.8, 3.9, 4.0 },
-        { 535.9, 558.3, 622.0, 692.7, 715.1, 832.9, 961.9, 931.9, 900.6, 911.3, 975.5,
-      975.9, 1119.9, 1103.8, 1033.8, 1479.1, 1701.3, 1740.4, 1587.2, 1837.0, 2005.0,
-      2043.0, 1987.0, 2027.0, 1896.0, 1909.0, 1927.0, 1831.0, 1891.0, 1898.0, 1892.0,
-      1840.0, 1768.0, 1728.0, 1658.0, 1524.0, 1531.0, 1420.0, 1399.0, 1374.0, 1373.0,
-      1298.0, 1269.0, 1245.0, 1223.0, 1205.0, 1183.0, 1148.0, 1091.0, 1062.0, 1038.0,
-      1022.0, 998.7, 947.2, 893.2, 868.2, 829.7, 830.3, 814.0, 786.9, 768.3, 767.0, 757.6,
-      688.1, 640.7, 606.2, 585.9, 570.2, 564.1, 544.2, 533.4, 501.6, 477.5, 442.7, 440.0,
-      416.8, 391.4, 358.9, 327.5, 317.5, 307.3, 300.4, 292.8, 275.5, 272.1, 259.3, 246.9,
-      244.0, 243.5, 234.8, 220.5, 190.8, 171.1, 144.5, 135.7, 123.0, 123.8, 113.0, 108.5,
-      97.5, 92.4, 82.4, 74.6, 68.3, 63.8, 49.5, 48.5, 38.6, 36.6, 32.0, 28.1, 24.8, 22.1,
-      19.6, 17.5, 15.7, 14.1, 12.7, 11.5, 10.4, 9.5, 8.6 },
-        { 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
-      0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
-      0.075, 0.0, 0.0, 0.0, 0.0, 0.016, 0.0125, 1.8, 2.5, 0.061, 0.0008, 0.0001, 0.00001,
-      0.00001, 0.0006, 0.036, 1.6, 2.5, 0.5, 0.155, 0.00001, 0.0026, 7.0, 5.0, 5.0, 27.0,
-      55.0, 45.0, 4.0, 1.48, 0.1, 0.00001, 0.001, 3.2, 115.0, 70.0, 75.0, 10.0, 5.0, 2.0,
-      0.002, 0.002, 0.1, 4.0, 200.0, 1000.0, 185.0, 80.0, 80.0, 12.0, 0.16, 0.002, 0.0005,
-      0.0001, 0.00001, 0.0001, 0.001, 0.01, 0.036, 1.1, 130.0, 1000.0, 500.0, 100.0, 4.0,
-      2.9, 1.0, 0.4, 0.22, 0.25, 0.33, 0.5, 4.0, 80.0, 310.0, 15000.0, 22000.0, 8000.0,
-      650.0, 240.0, 230.0, 100.0, 120.0, 19.5, 3.6, 3.1, 2.5, 1.4, 0.17, 0.0045 },
-        { 10.0, 4.8, 2.7, 1.35, 0.8, 0.38, 0.16, 0.075, 0.04, 0.019, 0.007, 0.0, 0.0, 0.0,
-      0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.003, 0.006, 0.009, 0.01400, 0.021, 0.03, 0.04,
-      0.048, 0.063, 0.075, 0.085, 0.12, 0.119, 0.12, 0.09, 0.065, 0.051, 0.028, 0.018,
-      0.015, 0.012, 0.01, 0.008, 0.007, 0.006, 0.005, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
-      0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
-      0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
-      0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
-      0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
-      0.0 },
-        { 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
-      0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
-      0.0, 0.0, 0.0, 0.0, 0.15, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 4.0, 0.35, 0.0, 0.0, 0.0,
-      0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
-      0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.05, 0.3, 0.02, 0.0002, 0.00011, 0.00001, 0.05,
-      0.011, 0.005, 0.0006, 0.0, 0.005, 0.13, 0.04, 0.06, 0.13, 0.001, 0.0014, 0.0001,
-      0.00001, 0.00001, 0.0001, 0.001, 4.3, 0.2, 21.0, 0.13, 1.0, 0.08, 0.001, 0.00038,
-      0.001, 0.0005, 0.00015, 0.00014, 0.00066, 100.0, 150.0, 0.13, 0.0095, 0.001, 0.8,
-      1.9, 1.3, 0.075, 0.01, 0.00195, 0.004, 0.29, 0.025 } };
-    static float wv[6];    /* Temporary wavelength array */
-    static float rf[6];    /* Temporary reflectivity array */
-
-    static float afs;      /* Equation 3-12 */
-    static float alg;      /* Equation 3-14 */
-    static float Am;       /* Abbrev. for soldat->amass */
-    static float Amo;      /* Abbrev. for ozone amount */
-    static float Amp;      /* Abbrev. for soldat->ampress */
-    static float Ao;       /* Abbrev. for ozone adjustment */
-    static float Au;       /* Abbrev. for uniformly mixed gases */
-    static float Aw;       /* Abbrev. for water vapor adjustment */
-    static float bfs;      /* Equation 3-13 */
-    static float c      =  2.9979244e14;  /* Used to calculate photon flux */ 
-    static float c1, c2, c3, c4, c5, c6;  /* general coefficients */
-    static float ci;       /* cosine of incidence angle */
-    static float cons   =  5.0340365e14;  /* Used to calculate photon flux */ 
-    static float ct;       /* cosine of specdat->tilt */
-    static float cz;       /* cosine of the zenith angle */
-    static float daer;     /* Equation 3-6, aerosol acattering component */
-    static float dir;      /* temporary direct normal energy value */
-    static float dif;      /* temporary diffuse energy value */
-    static float dray;     /* Equation 3-5, Rayleigh scattering component */
-    static float drgd;     /* Equation 3-7, multiple reflection, ground & air */
-    static float dtot;     /* temporary total energy value */
-    static float e;        /* energy in electron volts */
-    static float evolt  =  1.6021891e-19; /* Joules per electron-volt */
-    static float fs;       /* Equation 3-11 */
-    static float fsp;      /* Fs[prime], Equation 3-15 */
-    static float h      =  6.6261762e-34; /* Used to calculate photon flux */ 
-    static float H0;       /* Abbrev. for horizontal extraterrestrial spectrum */
-    static float omeg   =  0.945;         /* Single scattering albedo, 0.4 microns */
-    static float omegl;    /* Equation 3-16; omega-lamda; single-scattering albedo */
-    static float omegp  =  0.095;         /* Wavelength variation factor */
-    static float O3;       /* Abbrev. for ozone */
-    static float ozone;    /* ozone amount */
-    static float raddeg;   /* radians-to-degrees conversion */
-    static float rho;      /* interpolated specdat->spcrfl for specific wavelength */
-    static float rhoa;     /* Equation 3-8; sky reflectivity */
-    static float s1, s2, s3;    /* sine coefficients */
-    static float Ta, Taa, Taap, Tas, Tasp, To, Tr, Trp, Tu, Tup, Tw, Twp;  
+    struct posdata sdat;   /* solpos structure, only used here */
+
+    return S_spectral2_pos ( specdat, &sdat, 0 );
+}
+
+/*============================================================================
+*    Int function S_spectral2_pos
+*
+*    Same as S_spectral2, but with the solpos structure of the caller.  If
+*    precomputed is 0, the solar position is calculated by S_solpos as in
+*    S_spectral2 and left in soldat.  Otherwise S_solpos isn't called and
+*    soldat must already have zenref, cosinc, amass, ampress, erv and daynum,
+*    see S_spec_pos; the other outputs of soldat aren't used.
+*----------------------------------------------------------------------------*/
+int S_spectral2_pos (struct specdattype *specdat, struct posdata *soldat,
+    int precomputed)
+{
+    float wv[6];           /* Temporary wavelength array */
+    float rf[6];           /* Temporary reflectivity array */
+
+    float afs;             /* Equation 3-12 */
+    float alg;             /* Equation 3-14 */
+    float Am;              /* Abbrev. for soldat->amass */
+    float Amo;             /* Abbrev. for ozone amount */
+    float Amp;             /* Abbrev. for soldat->ampress */
+    float Ao;              /* Abbrev. for ozone adjustment */
+    float Au;              /* Abbrev. for uniformly mixed gases */
+    float Aw;              /* Abbrev. for water vapor adjustment */
+    float bfs;             /* Equation 3-13 */
+    const float c      =  2.9979244e14;   /* Used to calculate photon flux */ 
+    float c1, c2, c3, c4, c5, c6;         /* general coefficients */
+    float ci;              /* cosine of incidence angle */
+    const float cons   =  5.0340365e14;   /* Used to calculate photon flux */ 
+    float ct;              /* cosine of specdat->tilt */
+    float cz;              /* cosine of the zenith angle */
+    float daer;            /* Equation 3-6, aerosol acattering component */
+    float dir;             /* temporary direct normal energy value */
+    float dif;             /* temporary diffuse energy value */
+    float dray;            /* Equation 3-5, Rayleigh scattering component */
+    float drgd;            /* Equation 3-7, multiple reflection, ground & air */
+    float dtot;            /* temporary total energy value */
+    float e;               /* energy in electron volts */
+    const float evolt  =  1.6021891e-19;  /* Joules per electron-volt */
+    float fs;              /* Equation 3-11 */
+    float fsp;             /* Fs[prime], Equation 3-15 */
+    const float h      =  6.6261762e-34;  /* Used to calculate photon flux */ 
+    float H0;              /* Abbrev. for horizontal extraterrestrial spectrum */
+    const float omeg   =  0.945;          /* Single scattering albedo, 0.4 microns */
+    float omegl;           /* Equation 3-16; omega-lamda; single-scattering albedo */
+    const float omegp  =  0.095;          /* Wavelength variation factor */
+    float O3;              /* Abbrev. for ozone */
+    float ozone;           /* ozone amount */
+    float raddeg;          /* radians-to-degrees conversion */
+    float rho;             /* interpolated specdat->spcrfl for specific wavelength */
+    float rhoa;            /* Equation 3-8; sky reflectivity */
+    float s1, s2, s3;           /* sine coefficients */
+    float Ta, Taa, Taap, Tas, Tasp, To, Tr, Trp, Tu, Tup, Tw, Twp;  
                            /* Transmissivities */
-    static float W;        /* Abbrev. for soldat->S_watvap */
-    static float wvl;      /* Abbrev. for wavelength number */
+    float W;               /* Abbrev. for soldat->S_watvap */
+    float wvl;             /* Abbrev. for wavelength number */
                     
-    static int  track;    /* tracking/fixed tilt switch */
-    static int   nr;       /* indicates the wavelength range */
-    static int   i;              /* Loop counter */
-    static int   false  = 0;     /* 0 is false */
-    static int   true   = 1;     /* non-0 is true */
-    static int   retval;    /* solpos return code */
+    int  track;           /* tracking/fixed tilt switch */
+    int   nr;              /* indicates the wavelength range */
+    int   i;                     /* Loop counter */
+    int   first, last;           /* Window of wavelengths calculated */
+    const int   false  = 0;      /* 0 is false */
+    const int   true   = 1;      /* non-0 is true */
+    int   retval;           /* solpos return code */
     
-    /* set up the solpos structure */
-    struct posdata sdat, *soldat;
+    /* set up the solpos structure, initialize it unless it's precomputed */
+    if ( !precomputed ) {
+        S_init(soldat);
     
-    /* point to the posdata structure and initialize it */
-    soldat = &sdat;
-    S_init(soldat);
-    
-    /* set solpos for month, day, year (turns off day of year convention) */
-    soldat->function &= ~S_DOY;
-
-    soldat->year        = specdat->year;
-    soldat->month       = specdat->month;
-    soldat->day         = specdat->day;
-    soldat->hour        = specdat->hour;
-    soldat->minute      = specdat->minute;
-    soldat->second      = specdat->second;
+        /* set solpos for month, day, year (turns off day of year convention) */
+        soldat->function &= ~S_DOY;
+
+        soldat->year        = specdat->year;
+        soldat->month       = specdat->month;
+        soldat->day         = specdat->day;
+        soldat->hour        = specdat->hour;
+        soldat->minute      = specdat->minute;
+        soldat->second      = specdat->second;
+    }
     soldat->latitude    = specdat->latitude;
     soldat->longitude   = specdat->longitude;
     soldat->timezone    = specdat->timezone;
@@ -241,8 +257,8 @@ int S_spectral2 (struct specdattype *specdat)
     if ( soldat->tilt < 0 ) // MM 2012-01-20, change tilt < 0, same as solpos
         track    = true;
     
-    /* Find the sun */
-    if ((retval = S_solpos (soldat )) != 0)
+    /* Find the sun, unless it's already found */
+    if ( !precomputed && (retval = S_solpos (soldat )) != 0)
         // raises SOLPOS_Error
         //S_decode(retval, soldat);
         return retval;
@@ -337,9 +353,17 @@ int S_spectral2 (struct specdattype *specdat)
     
     /* Current wavelength range */
     nr  = 1;
+
+    /* Skip the wavelengths before the window, advancing the range */
+    first = specdat->specfirst < 0 ? 0 : specdat->specfirst;
+    last  = specdat->speclast > 122 ? 122 : specdat->speclast;
+    for ( i = 0; i < first; ++i ) {
+        if ( A[0][i] > wv[nr] )
+            ++nr;
+    }
     
     /* MAIN LOOP:  step through the wavelengths */
-    for ( i = 0; i < 122; ++i ) {
+    for ( i = first; i < last; ++i ) {
         /* Input variables */
         wvl = A[0][i];
         H0  = A[1][i];
@@ -490,6 +514,8 @@ void S_spec_init(struct specdattype *specdat)
                                    -1.0 = let S_spectral2 calculate it */ 
     specdat->tau500 = -1.0; /* Aerosol optical depth at 0.5 microns, base e */
     specdat->watvap = -1.0; /* Precipitable water vapor (cm) */               
+    specdat->specfirst = 0;  /* Calculate every wavelength */
+    specdat->speclast  = 122;
     
     for (i = 0; i < 6; i++)
     {
@@ -498,3 +524,88 @@ void S_spec_init(struct specdattype *specdat)
     }
     
 }
+
+/*============================================================================
+*    S_spec_x     (x-coordinate of the spectra without calculating them)
+*
+*        Fills specx[122] with the x-coordinate S_spectral2 outputs for
+*        units 1 to 3, returns -1 like S_spectral2 for other units.
+*----------------------------------------------------------------------------*/
+
+int S_spec_x(int units, float *specx)
+{
+    const float c      =  2.9979244e14;   /* Used to calculate photon flux */
+    const float evolt  =  1.6021891e-19;  /* Joules per electron-volt */
+    const float h      =  6.6261762e-34;  /* Used to calculate photon flux */
+    float e;               /* energy in electron volts */
+    int   i;               /* Loop counter */
+
+    if ( units > 3 || units < 1 )
+        return ( -1 );
+    e        = h * c / evolt;
+    for ( i = 0; i < 122; ++i )
+        specx[i]  = ( units == 3 ) ? e / A[0][i] : A[0][i];
+    return ( 0 );
+}
+
+/*============================================================================
+*    Int function S_spec_pos
+*
+*    Fills the solpos structure for S_spectral2_pos from a solar position
+*    calculated elsewhere, without calling S_solpos.  The caller sets zenref,
+*    amass and ampress, and cosinc unless calc_cosinc is non-0.  The daynum
+*    and erv are calculated from the date in specdat, and cosinc from zenref,
+*    azim and the tilt and aspect in specdat, the same way as S_solpos.
+*
+*    Returns 0, or the S_solpos error bits of a bad month or day.
+*----------------------------------------------------------------------------*/
+int S_spec_pos(struct specdattype *specdat, struct posdata *soldat,
+    int calc_cosinc)
+{
+    /* cumulative number of days prior to beginning of month */
+    static const int month_days[13] = { 0, 0, 31, 59, 90, 120, 151, 181, 212,
+                                        243, 273, 304, 334 };
+    static const float raddeg = 0.0174532925; /* degrees to radians */
+    float c2, cd, d2, s2, sd;   /* trig of the day angle, as S_solpos */
+    float ca, cp, ct, sa, sp, st, sz; /* trig of the tilt, as S_solpos */
+    long retval = 0;
+
+    if ( specdat->month < 1 || specdat->month > 12 )
+        retval |= ( 1L << S_MONTH_ERROR );
+    if ( specdat->day < 1 || specdat->day > 31 )
+        retval |= ( 1L << S_DAY_ERROR );
+    if ( retval )
+        return retval;
+
+    /* day of year */
+    soldat->daynum = specdat->day + month_days[specdat->month];
+    if ( ((specdat->year % 4) == 0) &&
+           ( ((specdat->year % 100) != 0) || ((specdat->year % 400) == 0) ) &&
+           (specdat->month > 2) )
+        soldat->daynum += 1;
+
+    /* Earth radius vector */
+    soldat->dayang = 360.0 * ( soldat->daynum - 1 ) / 365.0;
+    sd     = sin (raddeg * soldat->dayang);
+    cd     = cos (raddeg * soldat->dayang);
+    d2     = 2.0 * soldat->dayang;
+    c2     = cos (raddeg * d2);
+    s2     = sin (raddeg * d2);
+    soldat->erv  = 1.000110 + 0.034221 * cd + 0.001280 * sd;
+    soldat->erv  += 0.000719 * c2 + 0.000077 * s2;
+
+    /* cosine of the angle between the sun and the panel */
+    if ( calc_cosinc ) {
+        soldat->coszen  = cos( raddeg * soldat->zenref );
+        ca      = cos ( raddeg * soldat->azim );
+        cp      = cos ( raddeg * specdat->aspect );
+        ct      = cos ( raddeg * specdat->tilt );
+        sa      = sin ( raddeg * soldat->azim );
+        sp      = sin ( raddeg * specdat->aspect );
+        st      = sin ( raddeg * specdat->tilt );
+        sz      = sin ( raddeg * soldat->zenref );
+        soldat->cosinc  = soldat->coszen * ct + sz * st * ( ca * cp + sa * sp );
+    }
+
+    return 0;
+}
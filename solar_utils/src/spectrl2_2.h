@@ -81,6 +81,11 @@ struct specdattype
 	int   hour;			/* I:  Hour of day, 0 - 23 */
 	int   minute;		/* I:  Minute of hour, 0 - 59 */
 	int	  second;		/* I:  Second of minute, 0 - 59 */
+	int   specfirst;     /* I:  Index of the first wavelength calculated,
+	                                DEFAULT 0 */
+	int   speclast;      /* I:  Index after the last wavelength calculated,
+	                                DEFAULT 122, the other wavelengths of
+	                                the outputs aren't set */
 
 	/***** FLOATS *****/
 
@@ -174,5 +179,11 @@ struct specdattype
 *    National Renewable Energy Laboratory
 *    21 April 1998
 *----------------------------------------------------------------------------*/
+struct posdata;  /* solpos structure, see solpos00.h */
 extern int S_spectral2 (struct specdattype *specdat);
+int S_spectral2_pos (struct specdattype *specdat, struct posdata *soldat,
+    int precomputed);
+int S_spec_pos(struct specdattype *specdat, struct posdata *soldat,
+    int calc_cosinc);
 void S_spec_init(struct specdattype *specdat);
+int S_spec_x(int units, float *specx);
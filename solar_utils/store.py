@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent, memory-mapped store of annual solar position tables.
+
+Each site-year is calculated once, by the first process that asks for it,
+and saved in a directory as NumPy ``.npy`` columns next to a small JSON index
+entry with its key. Every later request, from any process, memory-maps the
+columns read-only, so the operating system shares one copy of the pages
+between all of the processes and nothing is recalculated or copied.
+
+Columns are written to temporary files and renamed into place, and the index
+entry is renamed into place last, so readers never see a partial entry and
+processes that calculate the same entry at the same time are harmless.
+
+2019 SunPower Corp.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from solar_utils.core import _as_timedelta64, get_solpos_range
+
+#: names of the columns saved for each entry
+COLUMNS = ('angles', 'airmass')
+
+
+def _canonical(values):
+    """
+    Round values to C ``float`` as the library sees them, for keys.
+    """
+    return [float(value) for value in np.asarray(values, dtype=np.float32)]
+
+
+class EphemerisStore(object):
+    """
+    Store of annual solar position tables keyed by site, year, resolution
+    and weather.
+
+    :param path: directory of the store, created if it doesn't exist
+    :type path: str
+
+    **Example:**
+
+    >>> store = EphemerisStore('/var/cache/solar')
+    >>> angles, airmass = store.get_solpos(
+    ...     [35.56836, -119.2022, -8.0], 2017, [1015.62055, 40.0], '1h')
+    >>> angles.shape
+    (8760, 2)
+    """
+    def __init__(self, path):
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._lock = threading.Lock()
+        self._maps = {}
+
+    @staticmethod
+    def key(location, year, weather, freq='1h'):
+        """
+        Get the key of an entry.
+
+        :param location: [latitude, longitude, UTC-timezone]
+        :type location: float
+        :param year: year
+        :type year: int
+        :param weather: [ambient-pressure (mB), ambient-temperature (C)]
+        :type weather: float
+        :param freq: resolution, see :func:`~solar_utils.core.datetime_range`
+        :returns: site, year, resolution [seconds] and weather
+        :rtype: dict
+        """
+        return {'location': _canonical(location), 'year': int(year),
+                'resolution': int(_as_timedelta64(freq).astype(np.int64)),
+                'weather': _canonical(weather)}
+
+    def _name(self, key):
+        """
+        Get the file name prefix of an entry from its key.
+        """
+        text = json.dumps(key, sort_keys=True)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()[:20]
+
+    def _file(self, name, suffix):
+        """
+        Get the path of a file of an entry.
+        """
+        return os.path.join(self.path, '%s.%s' % (name, suffix))
+
+    def _replace(self, filename, write):
+        """
+        Write a file atomically with ``write(fileobj)``.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fileobj:
+                write(fileobj)
+            os.chmod(tmp, 0o644)  # temporary files are private
+            os.replace(tmp, filename)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def _write(self, name, key, columns):
+        """
+        Save the columns of an entry, then its index entry.
+        """
+        for column, values in zip(COLUMNS, columns):
+            self._replace(self._file(name, '%s.npy' % column),
+                          lambda fileobj: np.save(fileobj, values))
+        index = json.dumps(key, sort_keys=True).encode('utf-8')
+        self._replace(self._file(name, 'json'),
+                      lambda fileobj: fileobj.write(index))
+
+    def get_solpos(self, location, year, weather, freq='1h', num_threads=1):
+        """
+        Get the solar position of a site for every step of a year,
+        calculating and saving it on the first request.
+
+        :param location: [latitude, longitude, UTC-timezone]
+        :type location: float
+        :param year: year, leap years have 366 days
+        :type year: int
+        :param weather: [ambient-pressure (mB), ambient-temperature (C)]
+        :type weather: float
+        :param freq: resolution, see :func:`~solar_utils.core.datetime_range`
+        :param num_threads: number of native threads to calculate a missing
+            entry, ``None`` to use every CPU
+        :type num_threads: int
+        :returns: angles [degrees], airmass [atm] as read-only memory maps
+        :rtype: :class:`numpy.memmap`
+        :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+        With ``freq='1h'`` a non-leap year is the same as
+        :func:`~solar_utils.core.get_solpos8760`.
+        """
+        key = self.key(location, year, weather, freq)
+        name = self._name(key)
+        with self._lock:
+            columns = self._maps.get(name)
+        if columns is not None:
+            return columns
+        if not os.path.exists(self._file(name, 'json')):
+            columns = get_solpos_range(
+                key['location'], (key['year'], 1, 1), (key['year'] + 1, 1, 1),
+                freq, key['weather'], num_threads=num_threads)
+            self._write(name, key, columns)
+        columns = tuple(
+            np.load(self._file(name, '%s.npy' % column), mmap_mode='r')
+            for column in COLUMNS)
+        with self._lock:
+            return self._maps.setdefault(name, columns)
+
+    def entries(self):
+        """
+        Get the keys of every entry in the store.
+
+        :returns: keys, see :meth:`key`
+        :rtype: list
+        """
+        keys = []
+        for filename in sorted(os.listdir(self.path)):
+            if filename.endswith('.json'):
+                with open(os.path.join(self.path, filename)) as fileobj:
+                    keys.append(json.load(fileobj))
+        return keys
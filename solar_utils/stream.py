@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming solar position of unbounded or very long series of datetimes.
+
+The datetimes are taken a chunk at a time, from an iterator of chunks or
+generated from a start, an optional end and a step, and the solar position of
+each chunk is calculated in one native call and yielded. The datetimes and
+the outputs of every chunk are written into the same buffers, allocated once
+for :data:`STREAM_CHUNK` rows, so the memory used stays the same however long
+the series is.
+
+The arrays yielded are views of the buffers and are overwritten by the next
+chunk, so copy any that are kept, or pass ``copy=True``.
+
+2019 SunPower Corp.
+"""
+
+import numpy as np
+
+from solar_utils.core import (
+    _as_datetime64, _as_datetimes, _as_timedelta64, _check_errors,
+    _datetime_fields, _solposAM_buffers, _solposAM_into
+)
+
+#: default maximum number of rows per chunk
+STREAM_CHUNK = 1 << 16
+
+
+def _stream(location, chunks, weather, num_threads, errors, chunk_size,
+            copy):
+    """
+    Calculate chunks of datetimes into buffers reused for every chunk.
+
+    :param chunks: iterator of (N, 6) arrays from :func:`_as_datetimes` of at
+        most ``chunk_size`` rows
+    """
+    buffers = _solposAM_buffers(chunk_size)
+    for datetimes in chunks:
+        count = datetimes.shape[0]
+        if not count:
+            continue
+        result = _solposAM_into(
+            location, datetimes, weather, num_threads, errors,
+            [values[:count] for values in buffers])
+        result = (datetimes,) + result
+        if copy:
+            result = tuple(values.copy() for values in result)
+        yield result
+
+
+def _split(chunks, chunk_size):
+    """
+    Split chunks of datetimes longer than ``chunk_size`` rows.
+    """
+    for chunk in chunks:
+        datetimes = _as_datetimes(chunk)
+        for first in range(0, datetimes.shape[0], chunk_size):
+            yield datetimes[first:first + chunk_size]
+
+
+def stream_solposAM(location, chunks, weather, num_threads=1,
+                    errors='raise', chunk_size=STREAM_CHUNK, copy=False):
+    """
+    Get SOLPOS calculation for an iterator of chunks of datetimes.
+
+    :param location: [latitude, longitude, UTC-timezone]
+    :type location: float
+    :param chunks: iterator of chunks of [year, month, day, hour, minute,
+        second] rows, each anything :func:`~solar_utils.core.get_solposAM`
+        takes
+    :param weather: [ambient-pressure (mB), ambient-temperature (C)]
+    :type weather: float
+    :param num_threads: number of native threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param errors: ``'raise'`` or ``'mask'`` rows with SOLPOS errors
+    :type errors: str
+    :param chunk_size: maximum number of rows per chunk yielded
+    :type chunk_size: int
+    :param copy: yield copies instead of views of the reused buffers
+    :type copy: bool
+    :returns: generator of datetimes, angles [degrees], airmass [atm] and, if
+        ``errors='mask'``, err_code per chunk
+    :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    Chunks longer than ``chunk_size`` rows are split, empty chunks are
+    skipped. The results of each chunk are the same as
+    :func:`~solar_utils.core.get_solposAM` of the chunk.
+
+    **Example:**
+
+    >>> location = [35.56836, -119.2022, -8.0]
+    >>> weather = [1015.62055, 40.0]
+    >>> chunks = (datetime_range('%d-01-01' % year, '%d-01-01' % (year + 1),
+    ...                          '1s') for year in range(2010, 2020))
+    >>> highest = 90.0
+    >>> for datetimes, angles, airmass in stream_solposAM(
+    ...         location, chunks, weather):
+    ...     highest = min(highest, angles[:, 0].min())
+    """
+    _check_errors(errors)
+    return _stream(location, _split(chunks, chunk_size), weather,
+                   num_threads, errors, chunk_size, copy)
+
+
+def _range_chunks(start, count, freq, chunk_size):
+    """
+    Generate chunks of datetimes of a range into a reused buffer.
+
+    :param start: first datetime in seconds
+    :type start: :class:`numpy.datetime64`
+    :param count: number of datetimes, ``None`` for no end
+    :param freq: step between datetimes in seconds
+    :type freq: :class:`numpy.timedelta64`
+    """
+    datetimes = np.empty((chunk_size, 6), dtype=np.intc)
+    steps = np.arange(chunk_size) * freq
+    first = 0
+    while count is None or first < count:
+        size = chunk_size if count is None else min(chunk_size, count - first)
+        stamps = start + first * freq + steps[:size]
+        yield _datetime_fields(stamps, datetimes[:size])
+        first += size
+
+
+def stream_solpos_range(location, start, end, freq, weather, num_threads=1,
+                        errors='raise', chunk_size=STREAM_CHUNK, copy=False):
+    """
+    Get SOLPOS calculation for a range of datetimes a chunk at a time.
+
+    :param location: [latitude, longitude, UTC-timezone]
+    :type location: float
+    :param start: first datetime
+    :type start: :class:`datetime.datetime`
+    :param end: end of the range, not included, or ``None`` for no end
+    :type end: :class:`datetime.datetime`
+    :param freq: step between datetimes, a whole number of seconds
+    :type freq: :class:`datetime.timedelta`
+    :param weather: [ambient-pressure (mB), ambient-temperature (C)]
+    :type weather: float
+    :param num_threads: number of native threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param errors: ``'raise'`` or ``'mask'`` rows with SOLPOS errors
+    :type errors: str
+    :param chunk_size: number of rows per chunk yielded, the last chunk can
+        be shorter
+    :type chunk_size: int
+    :param copy: yield copies instead of views of the reused buffers
+    :type copy: bool
+    :returns: generator of datetimes, angles [degrees], airmass [atm] and, if
+        ``errors='mask'``, err_code per chunk
+    :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    The ``start``, ``end`` and ``freq`` are the same as in
+    :func:`~solar_utils.core.get_solpos_range`, and the datetimes of each
+    chunk are generated into a reused buffer with NumPy ``datetime64``
+    arithmetic. With ``end=None`` the generator never stops.
+
+    **Example:**
+
+    >>> location = [35.56836, -119.2022, -8.0]
+    >>> weather = [1015.62055, 40.0]
+    >>> daylight = 0
+    >>> for datetimes, angles, airmass in stream_solpos_range(
+    ...         location, '2010-01-01', '2020-01-01', '1s', weather):
+    ...     daylight += np.count_nonzero(angles[:, 0] < 90.0)
+    """
+    _check_errors(errors)
+    start, freq = _as_datetime64(start), _as_timedelta64(freq)
+    count = None
+    if end is not None:
+        count = max(0, -(-(_as_datetime64(end) - start) // freq))
+    return _stream(location, _range_chunks(start, count, freq, chunk_size),
+                   weather, num_threads, errors, chunk_size, copy)
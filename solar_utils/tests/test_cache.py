@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the LRU memoization of SOLPOS and SPECTRL2.
+
+2019 SunPower Corp.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from solar_utils import solposAM, spectrl2
+from solar_utils.cache import SolarCache
+from solar_utils.exceptions import SOLPOS_Error
+
+LOCATION = [35.56836, -119.2022, -8.0]
+WEATHER = [1015.62055, 40.0]
+
+
+def test_cache_solposAM():
+    """
+    test cached solar position, quantization, statistics and errors
+    """
+    cache = SolarCache(maxsize=2)
+    angles, airmass = cache.solposAM(LOCATION, [2013, 6, 5, 12, 31, 0],
+                                     WEATHER)
+    x, y = solposAM([round(value, 4) for value in LOCATION],
+                    [2013, 6, 5, 12, 31, 0],
+                    [round(value, 4) for value in WEATHER])
+    assert np.array_equal(angles, x) and np.array_equal(airmass, y)
+    assert not angles.flags.writeable
+    # rounded to the same key
+    result = cache.solposAM([35.568361, -119.20221, -8.0],
+                            (2013, 6, 5, 12, 31, 0), WEATHER)
+    assert result[0] is angles
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.entries) == (
+        1, 1, 0, 1)
+    assert info.nbytes == 16
+    # least recently used is evicted
+    cache.solposAM(LOCATION, [2013, 6, 5, 13, 31, 0], WEATHER)
+    cache.solposAM(LOCATION, [2013, 6, 5, 12, 31, 0], WEATHER)
+    cache.solposAM(LOCATION, [2013, 6, 5, 14, 31, 0], WEATHER)
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.entries) == (
+        2, 3, 1, 2)
+    cache.solposAM(LOCATION, [2013, 6, 5, 12, 31, 0], WEATHER)
+    assert cache.cache_info().hits == 3
+    # errors aren't cached
+    try:
+        cache.solposAM(LOCATION, [2051, 6, 5, 12, 31, 0], WEATHER)
+    except SOLPOS_Error as err:
+        assert err.args[0] == 'S_YEAR_ERROR'
+    else:
+        raise AssertionError('SOLPOS_Error not raised')
+    assert cache.cache_info().entries == 2
+    cache.cache_clear()
+    assert cache.cache_info()[:5] == (0, 0, 0, 0, 0)
+
+
+def test_cache_spectrl2():
+    """
+    test cached spectra with a byte budget
+    """
+    args = (1, [33.65, -84.43, -5.0], [1999, 7, 22, 9, 45, 37],
+            [1006.0, 27.0], [33.65, 135.0], [1.14, 0.65, -1.0, 0.2, 1.36],
+            [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6))
+    cache = SolarCache(maxsize=None, maxbytes=2 * 5 * 122 * 4)
+    result = cache.spectrl2(*args)
+    expected = spectrl2(*args)
+    for x, y in zip(result, expected):
+        assert np.array_equal(x, np.ctypeslib.as_array(y))
+    assert cache.spectrl2(*args) is result
+    for hour in (10, 11):
+        cache.spectrl2(*(args[:2] + ([1999, 7, 22, hour, 0, 0],) + args[3:]))
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.entries) == (
+        1, 3, 1, 2)
+    assert info.nbytes == 2 * 5 * 122 * 4
+
+
+def test_cache_threads():
+    """
+    test the cache from many threads
+    """
+    cache = SolarCache(maxsize=10)
+    datetimes = [[2013, 6, 5, hour % 24, 0, 0] for hour in range(200)]
+
+    def call(datetime):
+        return cache.solposAM(LOCATION, datetime, WEATHER)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(call, datetimes))
+    for datetime, (angles, airmass) in zip(datetimes, results):
+        x, y = solposAM([round(value, 4) for value in LOCATION], datetime,
+                        [round(value, 4) for value in WEATHER])
+        assert np.array_equal(angles, x) and np.array_equal(airmass, y)
+    info = cache.cache_info()
+    assert info.hits + info.misses == 200
+    assert info.entries == 10
@@ -19,6 +19,10 @@ import os
 from nose.tools import ok_
 
 from solar_utils import *
+import solar_utils.core
+from solar_utils.core import (
+    L_DOY, S_REFRAC, S_SOLAZM, SOLPOS_OUTPUTS, solpos_function_mask
+)
 from solar_utils.exceptions import SOLPOS_Error, SPECTRL2_Error
 
 _DIRNAME = os.path.dirname(__file__)
@@ -114,6 +118,419 @@ def test_get_solposAM():
         assert err.args[0] == 'S_SECOND_ERROR'
 
 
+def test_get_solposAM_array():
+    """
+    test get_solposAM with NumPy and buffer-protocol datetimes
+    """
+    location = [35.56836, -119.2022, -8.0]
+    weather = [1015.62055, 40.0]
+    times = [
+        (pydatetime.datetime(2017, 1, 1, 0, 0, 0)
+         + pydatetime.timedelta(hours=h)).timetuple()[:6]
+        for h in range(1000)]
+    x0, y0 = get_solposAM(location, times, weather)
+    times = np.array(times, dtype=np.int32)
+    x, y = get_solposAM(location, times, weather)
+    assert isinstance(x, np.ndarray) and isinstance(y, np.ndarray)
+    assert x.shape == (1000, 2) and y.shape == (1000, 2)
+    assert np.array_equal(x, x0) and np.array_equal(y, y0)
+    x, y = get_solposAM(location, memoryview(times), weather)
+    assert np.array_equal(x, x0) and np.array_equal(y, y0)
+    # other dtypes and non-contiguous arrays are converted
+    x, y = get_solposAM(location, times.astype(np.int64)[::2], weather)
+    assert np.array_equal(x, x0[::2]) and np.array_equal(y, y0[::2])
+    times[10, 5] = 3248273
+    try:
+        get_solposAM(location, times, weather)
+    except SOLPOS_Error as err:
+        assert err.args[0] == 'S_SECOND_ERROR'
+        assert err.args[1]['datetime'] == times[10].tolist()
+    else:
+        raise AssertionError('SOLPOS_Error not raised')
+
+
+def test_get_solposAM_rows():
+    """
+    test get_solposAM_rows with per-row location and weather
+    """
+    locations = [[35.56836, -119.2022, -8.0], [33.65, -84.43, -5.0]]
+    weathers = [[1015.62055, 40.0], [1006.0, 27.0]]
+    times = np.array([
+        (pydatetime.datetime(2017, 1, 1, 0, 0, 0)
+         + pydatetime.timedelta(hours=h)).timetuple()[:6]
+        for h in range(48)], dtype=np.int32)
+    # each site separately
+    x0, y0 = zip(*[get_solposAM(loc, times, wea)
+                   for loc, wea in zip(locations, weathers)])
+    x0, y0 = np.concatenate(x0), np.concatenate(y0)
+    # both sites in one call
+    lat, lon, tz = np.repeat(locations, 48, axis=0).T
+    press, temp = np.repeat(weathers, 48, axis=0).T
+    x, y = get_solposAM_rows(lat, lon, tz, np.tile(times, (2, 1)), press, temp)
+    assert np.array_equal(x, x0) and np.array_equal(y, y0)
+    # scalars are broadcast
+    x, y = get_solposAM_rows(35.56836, -119.2022, -8.0, times, 1015.62055,
+                             [40.0] * 48)
+    assert np.array_equal(x, x0[:48]) and np.array_equal(y, y0[:48])
+    try:
+        get_solposAM_rows(lat[:3], lon, tz, times, press, temp)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ValueError not raised')
+    lat[50] = 1135.56836
+    try:
+        get_solposAM_rows(lat, lon, tz, np.tile(times, (2, 1)), press, temp)
+    except SOLPOS_Error as err:
+        assert err.args[0] == 'S_LAT_ERROR'
+        assert np.isclose(err.args[1]['location'][0], 1135.56836)
+    else:
+        raise AssertionError('SOLPOS_Error not raised')
+
+
+def test_get_solposAM_threads():
+    """
+    test native threads in get_solposAM are identical to the serial loop
+    """
+    location = [35.56836, -119.2022, -8.0]
+    weather = [1015.62055, 40.0]
+    times = np.array([
+        (pydatetime.datetime(2017, 1, 1, 0, 0, 0)
+         + pydatetime.timedelta(minutes=m)).timetuple()[:6]
+        for m in range(0, 525600, 7)], dtype=np.int32)
+    x0, y0 = get_solposAM(location, times, weather)
+    for num_threads in (2, 3, 8, None):
+        x, y = get_solposAM(location, times, weather, num_threads=num_threads)
+        assert np.array_equal(x, x0) and np.array_equal(y, y0)
+        x, y = get_solposAM_rows(
+            location[0], location[1], location[2], times, weather[0],
+            weather[1], num_threads=num_threads)
+        assert np.array_equal(x, x0) and np.array_equal(y, y0)
+    # fewer rows than threads
+    x, y = get_solposAM(location, times[:3], weather, num_threads=8)
+    assert np.array_equal(x, x0[:3]) and np.array_equal(y, y0[:3])
+    x, y = get_solposAM(location, times[:0], weather, num_threads=8)
+    assert x.shape == (0, 2) and y.shape == (0, 2)
+
+
+def test_get_solposAM_mask():
+    """
+    test get_solposAM with errors='mask' and decoding error bitmasks
+    """
+    location = [35.56836, -119.2022, -8.0]
+    weather = [1015.62055, 40.0]
+    times = np.array([[2017, 1, 1, h, 0, 0] for h in range(24)],
+                     dtype=np.int32)
+    x0, y0 = get_solposAM(location, times, weather)
+    times[3, 5] = 99  # second
+    times[5, :2] = [2060, 13]  # year and month
+    times[7, 3] = 30  # hour
+    x, y, err_code = get_solposAM(location, times, weather, errors='mask')
+    bad = [3, 5, 7]
+    assert np.flatnonzero(err_code).tolist() == bad
+    assert np.all(np.isnan(x[bad])) and np.all(np.isnan(y[bad]))
+    good = np.ones(24, dtype=bool)
+    good[bad] = False
+    assert np.array_equal(x[good], x0[good])
+    assert np.array_equal(y[good], y0[good])
+    rows, names = decode_solpos_errors(err_code)
+    assert rows.tolist() == bad
+    assert names == [['S_SECOND_ERROR'], ['S_YEAR_ERROR', 'S_MONTH_ERROR'],
+                     ['S_HOUR_ERROR']]
+    x, y, err_code = get_solposAM_rows(
+        location[0], location[1], location[2], times, weather[0], weather[1],
+        errors='mask')
+    assert np.flatnonzero(err_code).tolist() == bad
+    try:
+        get_solposAM(location, times, weather, errors='ignore')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ValueError not raised')
+
+
+def test_get_solposAM_fleet():
+    """
+    test get_solposAM_fleet is identical to get_solposAM for each site
+    """
+    locations = [[35.56836, -119.2022, -8.0], [33.65, -84.43, -5.0],
+                 [37.77, -122.42, -8.0], [51.48, 0.0, 0.0],
+                 [-33.87, 151.21, 10.0]]
+    weathers = [[1015.62055, 40.0], [1006.0, 27.0], [1013.0, 15.0],
+                [1010.0, 10.0], [1000.0, 20.0]]
+    times = np.array([[2016, m, 15, h, mi, 0] for m in (1, 2, 6, 12)
+                      for h in range(24) for mi in (0, 20, 40)],
+                     dtype=np.int32)
+    angles, airmass = get_solposAM_fleet(locations, times, weathers,
+                                         num_threads=3)
+    assert angles.shape == airmass.shape == (5, times.shape[0], 2)
+    for site, (location, weather) in enumerate(zip(locations, weathers)):
+        x, y = get_solposAM(location, times, weather)
+        assert x.tobytes() == angles[site].tobytes()
+        assert y.tobytes() == airmass[site].tobytes()
+    # weather broadcast to every site
+    x, y = get_solposAM_fleet(locations, times, weathers[0])
+    assert np.array_equal(x[1], get_solposAM(locations[1], times,
+                                             weathers[0])[0])
+    # errors
+    times[3, 3] = 30  # hour
+    x, y, err_code = get_solposAM_fleet(locations, times, weathers,
+                                        errors='mask')
+    assert err_code.shape == (5, times.shape[0])
+    assert np.all(np.isnan(x[:, 3])) and np.all(err_code[:, 3])
+    try:
+        get_solposAM_fleet(locations, times, weathers)
+    except SOLPOS_Error as err:
+        assert err.args[0] == 'S_HOUR_ERROR'
+    else:
+        raise AssertionError('SOLPOS_Error not raised')
+
+
+def test_get_solpos_outputs():
+    """
+    test get_solpos_outputs with NREL's S_solpos test values
+    """
+    test_data = {'daynum': 203, 'amass': 1.335752, 'ampress': 1.326522,
+                 'azim': 97.032875, 'cosinc': 0.912569, 'elevref': 48.409931,
+                 'etr': 989.668518, 'etrn': 1323.239868,
+                 'etrtilt': 1207.547363, 'prime': 1.037040,
+                 'sbcf': 1.201910, 'sretr': 347.173431, 'ssetr': 1181.111206,
+                 'unprime': 0.964283, 'zenref': 41.590069}
+    times = [[1999, 7, 22, 9, 45, 37], [1999, 7, 22, 12, 0, 0]]
+    solpos = get_solpos_outputs(
+        33.65, -84.43, -5.0, times, 1006.0, 27.0, tilt=33.65, aspect=135.0)
+    assert sorted(solpos) == sorted(SOLPOS_OUTPUTS)
+    for name, value in test_data.items():
+        ok_(RELDIFF(solpos[name][0], value) < TOL)
+    # same zenith, azimuth and airmass as get_solposAM
+    angles, airmass = get_solposAM([33.65, -84.43, -5.0], times,
+                                   [1006.0, 27.0])
+    assert np.array_equal(solpos['zenref'], angles[:, 0])
+    assert np.array_equal(solpos['azim'], angles[:, 1])
+    assert np.array_equal(solpos['amass'], airmass[:, 0])
+    # subset of outputs, per-row tilt
+    solpos = get_solpos_outputs(
+        33.65, -84.43, -5.0, times, 1006.0, 27.0, tilt=[33.65, 0.0],
+        aspect=135.0, outputs=['etrtilt', 'etr'])
+    assert sorted(solpos) == ['etr', 'etrtilt']
+    ok_(RELDIFF(solpos['etrtilt'][0], test_data['etrtilt']) < TOL)
+    assert solpos['etrtilt'][1] == solpos['etr'][1]
+    # errors
+    try:
+        get_solpos_outputs(33.65, -84.43, -5.0, times, 1006.0, 27.0,
+                           tilt=181.0)
+    except SOLPOS_Error as err:
+        assert err.args[0] == 'S_TILT_ERROR'
+    else:
+        raise AssertionError('SOLPOS_Error not raised')
+    solpos, err_code = get_solpos_outputs(
+        33.65, -84.43, -5.0, times, 1006.0, 27.0, tilt=[181.0, 0.0],
+        outputs=['etrtilt'], errors='mask')
+    assert np.isnan(solpos['etrtilt'][0]) and err_code[1] == 0
+    try:
+        get_solpos_outputs(33.65, -84.43, -5.0, times, 1006.0, 27.0,
+                           outputs=['zenith'])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ValueError not raised')
+
+
+def test_solpos_function_mask():
+    """
+    test outputs with the smallest function mask are identical to all outputs
+    """
+    times = [[2016, m, 15, h, 17, 0] for m in range(1, 13) for h in range(24)]
+    solpos = get_solpos_outputs(
+        33.65, -84.43, -5.0, times, 1006.0, 27.0, tilt=33.65, aspect=135.0)
+    for name in SOLPOS_OUTPUTS:
+        output = get_solpos_outputs(
+            33.65, -84.43, -5.0, times, 1006.0, 27.0, tilt=33.65,
+            aspect=135.0, outputs=[name])
+        assert output[name].tobytes() == solpos[name].tobytes()
+    assert solpos_function_mask(['zenref']) == S_REFRAC & ~L_DOY
+    assert solpos_function_mask(['zenref', 'azim']) == (
+        (S_REFRAC | S_SOLAZM) & ~L_DOY)
+    assert solpos_function_mask(['daynum']) == 0
+    # outputs of get_solposAM and get_solposAM_rows
+    location = [35.56836, -119.2022, -8.0]
+    weather = [1015.62055, 40.0]
+    angles, airmass = get_solposAM(location, times, weather)
+    zenith = get_solposAM(location, times, weather, outputs=['zenref'])
+    assert list(zenith) == ['zenref']
+    assert np.array_equal(zenith['zenref'], angles[:, 0])
+    zenith = get_solposAM_rows(
+        location[0], location[1], location[2], times, weather[0], weather[1],
+        outputs=['zenref'])
+    assert np.array_equal(zenith['zenref'], angles[:, 0])
+
+
+def test_skip_night():
+    """
+    test skipping rows at night with a table calculated once per day
+    """
+    location = [35.56836, -119.2022, -8.0]
+    weather = [1015.62055, 40.0]
+    sunrise, sunset = get_sunrise_sunset(location, [[2013, 6, 5]])
+    ok_(RELDIFF(sunrise[0], 286.03406) < TOL)
+    ok_(RELDIFF(sunset[0], 1144.765) < TOL)
+    # no sunrise in the arctic winter, no sunset in the summer
+    sunrise, sunset = get_sunrise_sunset(
+        [78.0, 15.0, 1.0], [[2013, 12, 21], [2013, 6, 21]])
+    assert sunrise.tolist() == [2999.0, -2999.0]
+    assert sunset.tolist() == [-2999.0, 2999.0]
+    angles, airmass = get_solpos8760(location, 2013, weather)
+    x, y = get_solpos8760(location, 2013, weather, skip_night=True)
+    day = ~np.isnan(x[:, 0])
+    assert 0.5 < day.mean() < 0.6
+    assert np.array_equal(x[day], angles[day])
+    assert np.array_equal(y[day], airmass[day])
+    # only rows with the sun well below the horizon are skipped
+    assert np.all(angles[~day, 0] > 90.0) and np.all(airmass[~day] == -1)
+    assert np.all(np.isnan(y[~day]))
+    # sites per row and errors
+    times = [[2013, 6, 5, 2, 0, 0], [2013, 6, 5, 12, 0, 0],
+             [2013, 6, 5, 30, 0, 0]]
+    x, y, err_code = get_solposAM_rows(
+        [35.0, 40.0, 40.0], [-119.0, -100.0, -100.0], -8.0, times, 1000.0,
+        20.0, errors='mask', skip_night=True)
+    assert np.isnan(x[0, 0]) and not np.isnan(x[1, 0])
+    assert err_code.tolist()[:2] == [0, 0] and err_code[2]
+    # spectra
+    units = 1
+    location = [33.65, -84.43, -5.0]
+    times = [[1999, 7, 22, h, 0, 0] for h in range(24)]
+    weather = [1006.0, 27.0]
+    orientation = [33.65, 135.0]
+    atmospheric_conditions = [1.14, 0.65, -1.0, 0.2, 1.36]
+    albedo = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+    spectra = get_spectrl2(units, location, times, weather, orientation,
+                           atmospheric_conditions, albedo)
+    skipped = get_spectrl2(units, location, times, weather, orientation,
+                           atmospheric_conditions, albedo, skip_night=True)
+    day = skipped[3].any(axis=1)
+    assert day.sum() == 15
+    for x, y in zip(spectra[:4], skipped[:4]):
+        assert x[day].tobytes() == y[day].tobytes()
+        assert not np.any(y[~day])
+    assert np.array_equal(spectra[4], skipped[4])
+
+
+def test_skip_night_polar():
+    """
+    test rows with the sun just above the horizon near the poles aren't
+    skipped on days without sunrise or sunset
+    """
+    weather = [1013.0, -10.0]
+    datetimes = datetime_range('2016-01-01', '2017-01-01', '1min')
+    for location in ([69.65, 18.96, 1.0], [78.2, 15.6, 1.0]):
+        angles, airmass = get_solposAM(location, datetimes, weather)
+        x, y = get_solposAM(location, datetimes, weather, skip_night=True)
+        day = ~np.isnan(x[:, 0])
+        assert np.array_equal(x[day], angles[day])
+        assert np.array_equal(y[day], airmass[day])
+        assert np.all(angles[~day, 0] > 93.0) and np.all(airmass[~day] == -1)
+    # the sun never rises at Tromso by the table, but is above the horizon
+    location = [69.65, 18.96, 1.0]
+    sunrise, sunset = get_sunrise_sunset(location, [[2016, 1, 18]])
+    assert sunrise.tolist() == [2999.0] and sunset.tolist() == [-2999.0]
+    times = datetime_range('2016-01-18', '2016-01-19', '10min')
+    args = (location, times, weather, [0.0, 180.0],
+            [1.14, 0.65, -1.0, 0.2, 1.36],
+            [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6))
+    spectra = get_spectrl2(1, *args)
+    skipped = get_spectrl2(1, *args, skip_night=True)
+    zenith = get_solposAM(location, times, weather)[0][:, 0]
+    day = zenith < 93.0
+    assert 0 < day.sum() < day.size
+    for x, y in zip(spectra[:4], skipped[:4]):
+        assert x[day].tobytes() == y[day].tobytes()
+        # the other rows are either calculated or zero
+        assert all(a.tobytes() == b.tobytes() or not b.any()
+                   for a, b in zip(x[~day], y[~day]))
+
+
+def test_get_solpos_range():
+    """
+    test datetime_range and get_solpos_range
+    """
+    # same datetimes as the Python datetime loop, across a leap day
+    start = pydatetime.datetime(2015, 12, 31, 20, 0, 0)
+    step = pydatetime.timedelta(minutes=7, seconds=13)
+    expected = [(start + step * n).timetuple()[:6] for n in range(12000)]
+    end = start + step * 12000
+    for freq in (step, 433, '433s', np.timedelta64(433, 's')):
+        assert datetime_range(start, end, freq).tolist() == [
+            list(row) for row in expected]
+    assert datetime_range('2016-01-01', '2017-01-01', 'h').shape == (8784, 6)
+    assert datetime_range(
+        (2016, 1, 1), (2016, 1, 1, 0, 0, 3), 1)[:, 5].tolist() == [0, 1, 2]
+    for freq in ('0s', '1ms', 0.5, pydatetime.timedelta(milliseconds=1500)):
+        try:
+            datetime_range(start, end, freq)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('ValueError not raised')
+    # calculated in chunks
+    location = [35.56836, -119.2022, -8.0]
+    weather = [1015.62055, 40.0]
+    angles, airmass = get_solposAM(location, expected, weather)
+    range_chunk = solar_utils.core.RANGE_CHUNK
+    solar_utils.core.RANGE_CHUNK = 5000
+    try:
+        x, y = get_solpos_range(location, start, end, step, weather)
+    finally:
+        solar_utils.core.RANGE_CHUNK = range_chunk
+    assert np.array_equal(x, angles) and np.array_equal(y, airmass)
+    x, y, err_code = get_solpos_range(
+        location, '2050-12-31T23', '2051-01-01T01', '30min', weather,
+        errors='mask')
+    assert err_code[:2].tolist() == [0, 0] and np.all(err_code[2:])
+    # non-leap year like get_solpos8760 used to calculate
+    angles, airmass = get_solpos8760(location, 2013, weather)
+    x, y = get_solpos_range(location, (2013, 1, 1), (2014, 1, 1), '1h',
+                            weather)
+    assert np.array_equal(x, angles) and np.array_equal(y, airmass)
+
+
+def test_get_solposAM_approx():
+    """
+    test maximum error of interpolated SOLPOS
+    """
+    weather = [1013.0, 15.0]
+    datetimes = datetime_range('2016-01-01', '2017-01-01', '3min')
+    # mid latitude, tropics with the sun overhead and arctic
+    for location in ([35.56836, -119.2022, -8.0], [10.0, -84.0, -6.0],
+                     [78.0, 15.0, 1.0]):
+        angles, airmass = get_solposAM(location, datetimes, weather)
+        x, y = get_solposAM_approx(location, datetimes, weather)
+        assert np.abs(x[:, 0] - angles[:, 0]).max() < 0.005
+        azimuth = np.abs((x[:, 1] - angles[:, 1] + 180.0) % 360.0 - 180.0)
+        day = angles[:, 0] <= 90.0
+        assert azimuth[day].max() < 0.5 and azimuth.max() < 3.0
+        day = airmass[:, 0] > 0
+        assert np.array_equal(y[~day], airmass[~day])
+        assert RELDIFF(y[day], airmass[day]).max() < 2e-3
+    # 1-second data, errors and datetimes with fields out of range
+    datetimes = datetime_range('2017-06-05T11', '2017-06-05T13', '1s')
+    datetimes = np.concatenate([datetimes, [[2017, 6, 5, 24, 0, 0],
+                                            [2051, 6, 5, 12, 0, 0]]])
+    angles, airmass, err_code = get_solposAM(
+        location, datetimes, weather, errors='mask')
+    x, y, z = get_solposAM_approx(location, datetimes, weather,
+                                  errors='mask')
+    assert np.array_equal(z, err_code) and err_code[-1] and not err_code[-2]
+    assert np.array_equal(x[-2:], angles[-2:], equal_nan=True)
+    assert np.abs(x[:-2, 0] - angles[:-2, 0]).max() < 0.005
+    try:
+        get_solposAM_approx(location, datetimes, weather)
+    except SOLPOS_Error as err:
+        assert err.args[0] == 'S_YEAR_ERROR'
+    else:
+        raise AssertionError('SOLPOS_Error not raised')
+
+
 def test_solposAM():
     """
     test solposAM.dll
@@ -220,5 +637,282 @@ def test_spectrl2():
     except SOLPOS_Error as err:
         assert err.args[0] == 'S_YEAR_ERROR'
 
+
+def test_get_spectrl2():
+    """
+    test get_spectrl2 matches spectrl2 for every row
+    """
+    units = 1
+    location = [33.65, -84.43, -5.0]
+    datetimes = [[1999, 7, 22, h, 45, 37] for h in range(5, 20)]
+    weather = [1006.0, 27.0]
+    orientation = [33.65, 135.0]
+    atmospheric_conditions = [[1.14, 0.65, -1.0, tau500, 1.36]
+                              for tau500 in np.linspace(0.1, 0.3, 15)]
+    albedo = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+    (specdif, specdir, specetr, specglo,
+     specx) = get_spectrl2(units, location, datetimes, weather, orientation,
+                           atmospheric_conditions, albedo)
+    assert specdif.shape == (15, 122) and specdif.flags.c_contiguous
+    assert specx.shape == (122,)
+    for n, (dt, atm) in enumerate(zip(datetimes, atmospheric_conditions)):
+        expected = spectrl2(units, location, dt, weather, orientation, atm,
+                            albedo)
+        for x, x0 in zip((specdif[n], specdir[n], specetr[n], specglo[n],
+                          specx), expected):
+            assert np.array_equal(x, np.ctypeslib.as_array(x0))
+    # raise a SPECTRL2_Error - TAU500 in one row
+    atmospheric_conditions[3] = [-1.0] * 5
+    try:
+        get_spectrl2(units, location, datetimes, weather, orientation,
+                     atmospheric_conditions, albedo)
+    except SPECTRL2_Error as err:
+        assert err.args[0] == -2
+    else:
+        raise AssertionError('SPECTRL2_Error not raised')
+    # now raise a SOLPOS_Error - YEAR
+    datetimes[3] = [2051, 6, 5, 12, 31, 0]
+    try:
+        get_spectrl2(units, location, datetimes, weather, orientation,
+                     atmospheric_conditions[0], albedo)
+    except SOLPOS_Error as err:
+        assert err.args[0] == 'S_YEAR_ERROR'
+    else:
+        raise AssertionError('SOLPOS_Error not raised')
+
+
+def test_get_spectrl2_threads():
+    """
+    stress test threaded get_spectrl2 is identical to serial
+    """
+    units = 1
+    location = [33.65, -84.43, -5.0]
+    datetimes = np.array([
+        (pydatetime.datetime(1999, 7, 22, 0, 0, 0)
+         + pydatetime.timedelta(minutes=m)).timetuple()[:6]
+        for m in range(0, 2880, 3)], dtype=np.int32)
+    count = datetimes.shape[0]
+    weather = [1006.0, 27.0]
+    orientation = [33.65, 135.0]
+    atmospheric_conditions = np.column_stack([
+        np.full(count, 1.14), np.full(count, 0.65), np.full(count, -1.0),
+        np.linspace(0.05, 0.5, count), np.linspace(0.5, 3.0, count)])
+    albedo = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+    args = (units, location, datetimes, weather, orientation,
+            atmospheric_conditions, albedo)
+    serial = get_spectrl2(*args)
+    for num_threads in (2, 4, 7, None):
+        for _ in range(3):
+            threaded = get_spectrl2(*args, num_threads=num_threads)
+            for x, x0 in zip(threaded, serial):
+                assert x.tobytes() == x0.tobytes()  # bit for bit, with NaN
+
+
+def test_get_spectrl2_bands():
+    """
+    test band integration and mismatch factor against the spectra
+    """
+    location = [33.65, -84.43, -5.0]
+    datetimes = [[1999, 7, 22, h, 30, 0] for h in range(4, 21)]
+    weather = [1006.0, 27.0]
+    orientation = [33.65, 135.0]
+    atmospheric_conditions = [[1.14, 0.65, -1.0, tau500, 1.36]
+                              for tau500 in np.linspace(0.1, 0.3, 17)]
+    albedo = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+    args = (location, datetimes, weather, orientation,
+            atmospheric_conditions, albedo)
+    for units in (1, 3):
+        specx = get_specx(units)
+        specglo, x = get_spectrl2(units, *args)[3:]
+        assert np.array_equal(specx, x)
+        silicon = ([0.3, 0.9, 1.2], [0.0, 1.0, 0.0])
+        if units == 3:
+            silicon = ([1.03, 1.38, 4.13], [0.0, 1.0, 0.0])
+        reference = np.linspace(1.0, 2.0, 122)
+        broadband, inband, mismatch = get_spectrl2_bands(
+            units, *args, responses=[silicon, np.ones(122)],
+            reference=reference)
+        assert broadband.shape == (17,) and inband.shape == (17, 2)
+        response = np.interp(specx, *silicon, left=0.0, right=0.0)
+        # trapezoidal rule
+        weights = np.zeros(122)
+        dx = np.abs(np.diff(specx.astype(np.float64))) / 2.0
+        weights[:-1] += dx
+        weights[1:] += dx
+        total = specglo.dot(weights)
+        band = (specglo * response).dot(weights)
+        day = total > 0
+        assert np.allclose(broadband, total, rtol=1e-5, equal_nan=True)
+        assert np.allclose(inband[:, 0], band, rtol=1e-5, equal_nan=True)
+        assert np.allclose(inband[:, 1], total, rtol=1e-5, equal_nan=True)
+        expected = (band / total) / (
+            (reference * response).dot(weights) / reference.dot(weights))
+        assert np.allclose(mismatch[day, 0], expected[day], rtol=1e-5)
+        assert np.allclose(mismatch[day, 1], 1.0)
+        assert np.all(np.isnan(mismatch[~day]))
+    # threads and errors
+    threaded = get_spectrl2_bands(
+        1, *args, responses=[silicon], reference=reference, num_threads=3)
+    serial = get_spectrl2_bands(
+        1, *args, responses=[silicon], reference=reference)
+    for x, x0 in zip(threaded, serial):
+        assert x.tobytes() == x0.tobytes()
+    atmospheric_conditions[5][3] = 11.0
+    try:
+        get_spectrl2_bands(1, *args, responses=[silicon], reference=reference)
+    except SPECTRL2_Error as err:
+        assert err.args[0] == -2
+    else:
+        raise AssertionError('SPECTRL2_Error not raised')
+    atmospheric_conditions[5][3] = 0.2
+    datetimes[7][1] = 13
+    try:
+        get_spectrl2_bands(1, *args, responses=[silicon], reference=reference)
+    except SOLPOS_Error as err:
+        assert err.args[0] == 'S_MONTH_ERROR'
+        assert err.args[1]['datetime'] == [1999, 13, 22, 11, 30, 0]
+    else:
+        raise AssertionError('SOLPOS_Error not raised')
+
+
+def test_spectrl2_window():
+    """
+    test a wavelength window is the same as the slice of the whole spectra
+    """
+    location = [33.65, -84.43, -5.0]
+    datetimes = [[1999, 7, 22, h, 30, 0] for h in range(4, 21)]
+    weather = [1006.0, 27.0]
+    orientation = [33.65, 135.0]
+    atmospheric_conditions = [1.14, 0.65, -1.0, 0.2, 1.36]
+    albedo = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+    args = (location, datetimes, weather, orientation,
+            atmospheric_conditions, albedo)
+    wavelengths = get_specx(1)
+    first = np.searchsorted(wavelengths, 0.5)
+    last = np.searchsorted(wavelengths, 2.0, side='right')
+    for units in (1, 3):
+        full = get_spectrl2(units, *args)
+        windowed = get_spectrl2(units, *args, window=[0.5, 2.0],
+                                num_threads=3)
+        assert windowed[0].shape == (17, last - first)
+        for x, x0 in zip(windowed, full):
+            assert x.tobytes() == x0[..., first:last].tobytes()
+        result = spectrl2(units, location, datetimes[5], weather, orientation,
+                          atmospheric_conditions, albedo, window=[0.5, 2.0])
+        for x, x0 in zip(result, [values[5] for values in full[:4]]
+                         + [full[4]]):
+            assert np.array_equal(x, x0[first:last])
+    try:
+        spectrl2(1, location, datetimes[5], weather, orientation,
+                 atmospheric_conditions, albedo, window=[4.1, 5.0])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ValueError not raised')
+
+
+def test_spectrl2_position():
+    """
+    test spectra of precomputed solar positions are the same as SPECTRL2's
+    """
+    location = [33.65, -84.43, -5.0]
+    datetimes = [[1999, 7, 22, h, 30, 0] for h in range(4, 21)]
+    # SPECTRL2 calculates solar position at the SOLPOS default weather
+    angles, airmass = get_solposAM(location, datetimes, [1013.0, 15.0])
+    orientation = [33.65, 135.0]
+    atmospheric_conditions = [1.14, 0.65, -1.0, 0.2, 1.36]
+    albedo = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+    expected = get_spectrl2(1, location, datetimes, [1006.0, 27.0],
+                            orientation, atmospheric_conditions, albedo)
+    result = get_spectrl2_position(
+        1, location, datetimes, angles, airmass, orientation,
+        atmospheric_conditions, albedo, num_threads=3)
+    for x, x0 in zip(result, expected):
+        assert np.array_equal(x, x0, equal_nan=True)
+    result = spectrl2_position(
+        1, location, datetimes[5], angles[5], airmass[5], orientation,
+        atmospheric_conditions, albedo, window=[0.5, 2.0])
+    specx = np.array(result[4])
+    first = np.searchsorted(expected[4], specx[0])
+    assert np.array_equal(result[3], expected[3][5, first:first + specx.size])
+    # given cosinc, tracking
+    cosinc = np.ones(17)
+    tracking = get_spectrl2(1, location, datetimes, [1006.0, 27.0],
+                            [-1.0, 180.0], atmospheric_conditions, albedo)
+    result = get_spectrl2_position(
+        1, location, datetimes, angles, airmass, [-1.0, 180.0],
+        atmospheric_conditions, albedo, cosinc=cosinc)
+    assert np.array_equal(result[3], tracking[3], equal_nan=True)
+    # errors
+    datetimes[5][1] = 13
+    try:
+        get_spectrl2_position(1, location, datetimes, angles, airmass,
+                              orientation, atmospheric_conditions, albedo)
+    except SOLPOS_Error as err:
+        assert err.args[0] == 'S_MONTH_ERROR'
+    else:
+        raise AssertionError('SOLPOS_Error not raised')
+    try:
+        spectrl2_position(1, location, datetimes[0], angles[0], airmass[0],
+                          orientation, [1.14, 0.65, -1.0, 11.0, 1.36],
+                          albedo)
+    except SPECTRL2_Error as err:
+        assert err.args[0] == -2
+    else:
+        raise AssertionError('SPECTRL2_Error not raised')
+
+
+def test_out():
+    """
+    test results are written into caller-supplied buffers
+    """
+    import array
+    location = [35.56836, -119.2022, -8.0]
+    weather = [1015.62055, 40.0]
+    datetimes = datetime_range('2017-01-01', '2017-01-02', '1h')
+    expected = get_solposAM(location, datetimes, weather)
+    out = (np.empty((24, 2), dtype=np.float32),
+           array.array('f', bytes(24 * 2 * 4)))
+    for _ in range(2):
+        angles, airmass = get_solposAM(location, datetimes, weather, out=out)
+        assert angles is out[0]
+        assert np.array_equal(angles, expected[0])
+        assert np.array_equal(np.frombuffer(out[1], dtype=np.float32),
+                              expected[1].ravel())
+    # err_code with errors='mask'
+    datetimes[3, 1] = 13
+    err_code = np.empty(24, dtype=solar_utils.core.C_LONG)
+    result = get_solposAM(location, datetimes, weather, errors='mask',
+                          out=out[:1] + (np.empty((24, 2), np.float32),
+                                         err_code))
+    assert result[2] is err_code and err_code[3] and not err_code[2]
+    for bad in [out[:1], (out[0], np.empty((24, 2))),
+                (out[0], np.empty((12, 2), np.float32))]:
+        try:
+            get_solposAM(location, datetimes, weather, out=bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('ValueError not raised')
+    # spectrl2
+    location = [33.65, -84.43, -5.0]
+    args = ([1006.0, 27.0], [33.65, 135.0], [1.14, 0.65, -1.0, 0.2, 1.36],
+            [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6))
+    datetimes = datetime_range('1999-07-22 06:00', '1999-07-22 19:00', '1h')
+    expected = spectrl2(1, location, datetimes[3], *args, window=[0.3, 1.2])
+    out = tuple(np.empty(72, dtype=np.float32) for _ in range(5))
+    result = spectrl2(1, location, datetimes[3], *args, window=[0.3, 1.2],
+                      out=out)
+    for x, x0, buffer in zip(result, expected, out):
+        assert x is buffer and np.array_equal(x, x0)
+    expected = get_spectrl2(1, location, datetimes, *args)
+    out = tuple(np.empty((13, 122), dtype=np.float32) for _ in range(4))
+    out += (np.empty(122, dtype=np.float32),)
+    result = get_spectrl2(1, location, datetimes, *args, num_threads=2,
+                          out=out)
+    for x, x0, buffer in zip(result, expected, out):
+        assert x is buffer and np.array_equal(x, x0, equal_nan=True)
+
+
 if __name__ == '__main__':
     test_spectrl2()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the multi-process executor.
+
+2019 SunPower Corp.
+"""
+
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from solar_utils import get_solpos8760, get_spectrl2
+from solar_utils.exceptions import SOLPOS_Error
+from solar_utils.executor import SolarExecutor
+
+LOCATIONS = [[35.56836, -119.2022, -8.0], [33.65, -84.43, -5.0]]
+WEATHERS = [[1015.62055, 40.0], [1006.0, 27.0]]
+
+
+def test_executor_solpos8760():
+    """
+    test fleet solar position matches each site in input order
+    """
+    with SolarExecutor(max_workers=2, chunk_size=1000) as executor:
+        angles, airmass = executor.get_solpos8760(LOCATIONS, 2017, WEATHERS)
+        assert angles.shape == (2, 8760, 2)
+        for site, (location, weather) in enumerate(zip(LOCATIONS, WEATHERS)):
+            x, y = get_solpos8760(location, 2017, weather)
+            assert np.array_equal(angles[site], x)
+            assert np.array_equal(airmass[site], y)
+        # the results are backed by shared memory released with the arrays
+        finalizer = angles.base.finalizer
+        name = finalizer.peek()[2][0].name
+        view = angles[1]
+        del angles
+        assert finalizer.alive
+        del view
+        assert not finalizer.alive
+        try:
+            SharedMemory(name=name)
+        except FileNotFoundError:
+            pass
+        else:
+            raise AssertionError('shared memory not unlinked')
+        try:
+            executor.get_solpos8760([[1135.56836, -119.2022, -8.0]], 2017,
+                                    WEATHERS[0])
+        except SOLPOS_Error as err:
+            assert err.args[0] == 'S_LAT_ERROR'
+        else:
+            raise AssertionError('SOLPOS_Error not raised')
+
+
+def test_executor_spectrl2():
+    """
+    test fleet spectra match each site in input order
+    """
+    datetimes = [[1999, 7, 22, h, 45, 37] for h in range(6, 19)]
+    orientation = [33.65, 135.0]
+    atmospheric_conditions = [1.14, 0.65, -1.0, 0.2, 1.36]
+    albedo = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+    with SolarExecutor(max_workers=2, chunk_size=5) as executor:
+        results = executor.get_spectrl2(
+            1, LOCATIONS, datetimes, WEATHERS, orientation,
+            atmospheric_conditions, albedo)
+    for site, (location, weather) in enumerate(zip(LOCATIONS, WEATHERS)):
+        expected = get_spectrl2(1, location, datetimes, weather, orientation,
+                                atmospheric_conditions, albedo)
+        for x, x0 in zip(results[:4], expected[:4]):
+            assert np.array_equal(x[site], x0)
+    assert np.array_equal(results[4], expected[4])
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the pandas front-end.
+
+2019 SunPower Corp.
+"""
+
+import numpy as np
+import pytest
+
+from solar_utils import get_solposAM, get_spectrl2
+
+pd = pytest.importorskip('pandas')
+
+from solar_utils.frames import (  # noqa: E402
+    get_solposAM_frame, get_spectrl2_frame, index_datetimes
+)
+
+LOCATION = [35.56836, -119.2022, -8.0]
+WEATHER = [1015.62055, 40.0]
+
+
+def test_index_datetimes():
+    """
+    test timestamps are converted to standard time fields
+    """
+    index = pd.date_range('2017-03-12', periods=48, freq='30min',
+                          tz='US/Pacific')
+    datetimes, timezone = index_datetimes(index)
+    assert timezone == -8.0
+    expected = [
+        (ts.tz_convert('Etc/GMT+8')).timetuple()[:6] for ts in index]
+    assert datetimes.tolist() == [list(row) for row in expected]
+    # naive timestamps are already standard time
+    naive = index.tz_convert('Etc/GMT+8').tz_localize(None)
+    x, y = index_datetimes(naive, -8.0)
+    assert np.array_equal(x, datetimes) and y == -8.0
+    try:
+        index_datetimes(naive)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ValueError not raised')
+
+
+def test_get_solposAM_frame():
+    """
+    test data frames are the same as the batch results
+    """
+    index = pd.date_range('2017-06-01', '2017-06-08', freq='10min',
+                          tz='US/Pacific')
+    solpos = get_solposAM_frame(LOCATION[:2], index, WEATHER)
+    assert solpos.index.equals(index)
+    datetimes = index_datetimes(index)[0]
+    angles, airmass = get_solposAM(LOCATION, datetimes, WEATHER)
+    assert np.array_equal(solpos[['zenref', 'azim']].values, angles)
+    assert np.array_equal(solpos[['amass', 'ampress']].values, airmass)
+    masked = get_solposAM_frame(LOCATION, index, WEATHER, errors='mask')
+    assert not masked['err_code'].any()
+    spectra = get_spectrl2_frame(
+        1, LOCATION, index[:24], WEATHER, [33.65, 135.0],
+        [1.14, 0.65, -1.0, 0.2, 1.36],
+        [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6), window=[0.3, 1.2])
+    specglo, specx = get_spectrl2(
+        1, LOCATION, datetimes[:24], WEATHER, [33.65, 135.0],
+        [1.14, 0.65, -1.0, 0.2, 1.36],
+        [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6),
+        window=[0.3, 1.2])[3:]
+    assert np.array_equal(spectra['specglo'].values, specglo, equal_nan=True)
+    assert np.array_equal(spectra['specglo'].columns.values, specx)
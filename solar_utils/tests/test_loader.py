@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the lazy library loader.
+
+2019 SunPower Corp.
+"""
+
+import ctypes
+import subprocess
+import sys
+
+from solar_utils import loader
+
+
+def test_import_is_lazy():
+    """
+    importing solar_utils doesn't open the libraries
+    """
+    code = ('import solar_utils.loader as L; import solar_utils; '
+            'print(L.is_loaded(L.SOLPOSAMDLL) or L.is_loaded(L.SPECTRL2DLL))')
+    out = subprocess.check_output([sys.executable, '-c', code])
+    assert out.strip() == b'False'
+
+
+def test_load_once():
+    """
+    libraries are loaded once and have prototypes
+    """
+    solposAM_dll = loader.load_solposAM()
+    assert loader.load_solposAM() is solposAM_dll
+    assert loader.is_loaded(loader.SOLPOSAMDLL)
+    assert solposAM_dll.solposAM.restype is ctypes.c_long
+    assert len(solposAM_dll.solposAM.argtypes) == 8
+    assert len(solposAM_dll.get_solposAM.argtypes) == 11
+    spectrl2_dll = loader.load_spectrl2()
+    assert loader.load_spectrl2() is spectrl2_dll
+    assert spectrl2_dll.spectrl2.restype is ctypes.c_long
+    assert len(spectrl2_dll.spectrl2.argtypes) == 16
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the opt-in runtime metrics.
+
+2019 SunPower Corp.
+"""
+
+from solar_utils import get_solpos8760, get_solposAM, solposAM, spectrl2
+from solar_utils import metrics
+from solar_utils.exceptions import SOLPOS_Error, SPECTRL2_Error
+
+LOCATION = [35.56836, -119.2022, -8.0]
+WEATHER = [1015.62055, 40.0]
+
+
+def test_metrics():
+    """
+    test calls, rows, times and errors are counted only when enabled
+    """
+    enabled = metrics.is_enabled()
+    metrics.disable()
+    metrics.reset()
+    solposAM(LOCATION, [2013, 6, 5, 12, 31, 0], WEATHER)
+    assert metrics.snapshot() == {}
+    metrics.enable()
+    try:
+        get_solpos8760(LOCATION, 2017, WEATHER)
+        for month in (6, 13):
+            try:
+                solposAM(LOCATION, [2013, month, 5, 12, 31, 0], WEATHER)
+            except SOLPOS_Error:
+                pass
+        try:
+            spectrl2(1, [33.65, -84.43, -5.0], [1999, 7, 22, 9, 45, 37],
+                     [1006.0, 27.0], [33.65, 135.0],
+                     [1.14, 0.65, -1.0, 11.0, 1.36],
+                     [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6))
+        except SPECTRL2_Error:
+            pass
+    finally:
+        metrics.disable()
+    stats = metrics.snapshot(reset=True)
+    # calls by other functions are counted under their own name
+    assert stats['get_solpos8760']['calls'] == 1
+    assert stats['get_solpos8760']['rows'] == 0
+    assert stats['get_solposAM']['calls'] == 1
+    assert stats['get_solposAM']['rows'] == 8760
+    assert stats['get_solposAM']['native_seconds'] > 0.0
+    assert stats['get_solposAM']['marshalling_seconds'] > 0.0
+    assert stats['solposAM']['calls'] == 2
+    assert stats['solposAM']['errors'] == {'S_MONTH_ERROR': 1}
+    assert stats['spectrl2']['errors'] == {'-2': 1}
+    assert metrics.snapshot() == {}
+    text = metrics.export_text(stats)
+    assert 'solar_utils_calls_total{function="solposAM"} 2\n' in text
+    assert 'solar_utils_rows_total{function="get_solposAM"} 8760\n' in text
+    assert ('solar_utils_errors_total{function="solposAM",'
+            'code="S_MONTH_ERROR"} 1\n') in text
+    assert '# TYPE solar_utils_native_seconds_total counter\n' in text
+    # disabled
+    get_solposAM(LOCATION, [[2013, 6, 5, 12, 31, 0]], WEATHER)
+    assert metrics.snapshot() == {}
+    if enabled:
+        metrics.enable()
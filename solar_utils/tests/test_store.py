@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the persistent memory-mapped ephemeris store.
+
+2019 SunPower Corp.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from solar_utils import get_solpos8760
+from solar_utils.store import EphemerisStore
+
+LOCATION = [35.56836, -119.2022, -8.0]
+WEATHER = [1015.62055, 40.0]
+
+
+def _read(path):
+    """
+    Read an entry from another process.
+    """
+    angles, airmass = EphemerisStore(path).get_solpos(
+        LOCATION, 2017, WEATHER)
+    return isinstance(angles, np.memmap), float(angles.sum())
+
+
+def test_store():
+    """
+    test entries are calculated once and then memory-mapped
+    """
+    path = tempfile.mkdtemp()
+    try:
+        store = EphemerisStore(path)
+        angles, airmass = store.get_solpos(LOCATION, 2017, WEATHER)
+        x, y = get_solpos8760(LOCATION, 2017, WEATHER)
+        assert np.array_equal(angles, x) and np.array_equal(airmass, y)
+        assert isinstance(angles, np.memmap) and not angles.flags.writeable
+        assert store.get_solpos(LOCATION, 2017, WEATHER)[0] is angles
+        files = sorted(os.listdir(path))
+        assert len(files) == 3
+        mtimes = [os.path.getmtime(os.path.join(path, f)) for f in files]
+        # another store and other processes reuse the saved entry
+        angles = EphemerisStore(path).get_solpos(LOCATION, 2017, WEATHER)[0]
+        assert np.array_equal(angles, x)
+        with ProcessPoolExecutor(2) as pool:
+            results = list(pool.map(_read, [path] * 2))
+        assert results == [(True, float(x.sum()))] * 2
+        assert sorted(os.listdir(path)) == files
+        assert mtimes == [
+            os.path.getmtime(os.path.join(path, f)) for f in files]
+        # other keys
+        angles, _ = store.get_solpos(LOCATION, 2016, WEATHER, '30min')
+        assert angles.shape == (366 * 48, 2)
+        store.get_solpos(LOCATION, 2017, [1000.0, 20.0])
+        keys = store.entries()
+        assert len(keys) == 3
+        assert store.key(LOCATION, 2016, WEATHER, '30min') in keys
+        assert not [f for f in os.listdir(path) if f.endswith('.tmp')]
+    finally:
+        shutil.rmtree(path)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for streaming solar position.
+
+2019 SunPower Corp.
+"""
+
+import itertools
+
+import numpy as np
+
+from solar_utils import datetime_range, get_solpos_range, get_solposAM
+from solar_utils.exceptions import SOLPOS_Error
+from solar_utils.stream import stream_solposAM, stream_solpos_range
+
+LOCATION = [35.56836, -119.2022, -8.0]
+WEATHER = [1015.62055, 40.0]
+
+
+def test_stream_solpos_range():
+    """
+    test chunks of a range are the same as the whole range
+    """
+    angles, airmass = get_solpos_range(
+        LOCATION, '2016-02-28', '2016-03-02', '1min', WEATHER)
+    chunks = list(stream_solpos_range(
+        LOCATION, '2016-02-28', '2016-03-02', '1min', WEATHER,
+        chunk_size=1000, copy=True))
+    assert [len(chunk[0]) for chunk in chunks] == [1000] * 4 + [320]
+    for result, expected in zip(zip(*chunks), (
+            datetime_range('2016-02-28', '2016-03-02', '1min'), angles,
+            airmass)):
+        assert np.array_equal(np.concatenate(result), expected)
+    # the buffers are reused without a copy
+    first, second = itertools.islice(stream_solpos_range(
+        LOCATION, '2016-02-28', None, '1min', WEATHER, chunk_size=1000), 2)
+    assert first[1].ctypes.data == second[1].ctypes.data
+    # no end
+    chunks = itertools.islice(stream_solpos_range(
+        LOCATION, '2016-02-28', None, '1min', WEATHER, chunk_size=1000,
+        copy=True), 5)
+    datetimes = np.concatenate([chunk[0] for chunk in chunks])
+    assert np.array_equal(
+        datetimes, datetime_range('2016-02-28', '2016-03-02 11:20', '1min'))
+
+
+def test_stream_solposAM():
+    """
+    test chunks of an iterator are split and calculated
+    """
+    chunks = [datetime_range('2017-06-01', '2017-06-02', '1min'), [],
+              [[2017, 6, 2, 12, 0, 0]]]
+    results = list(stream_solposAM(LOCATION, iter(chunks), WEATHER,
+                                   chunk_size=500, copy=True))
+    assert [len(result[0]) for result in results] == [500, 500, 440, 1]
+    angles, airmass = get_solposAM(
+        LOCATION, np.concatenate([chunks[0], chunks[2]]), WEATHER)
+    assert np.array_equal(
+        np.concatenate([result[1] for result in results]), angles)
+    # errors
+    chunks = [[[2017, 6, 1, 12, 0, 0], [2017, 13, 1, 12, 0, 0]]]
+    try:
+        list(stream_solposAM(LOCATION, chunks, WEATHER))
+    except SOLPOS_Error as err:
+        assert err.args[0] == 'S_MONTH_ERROR'
+    else:
+        raise AssertionError('SOLPOS_Error not raised')
+    (datetimes, angles, airmass, err_code), = stream_solposAM(
+        LOCATION, chunks, WEATHER, errors='mask')
+    assert np.isnan(angles[1]).all() and err_code[1] and not err_code[0]
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the chunked out-of-core writer.
+
+2019 SunPower Corp.
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pytest
+
+from solar_utils import datetime_range, get_solpos_range, get_spectrl2
+from solar_utils.writer import (
+    INDEX, ChunkWriter, load, write_solpos_range, write_spectrl2_range
+)
+
+LOCATION = [35.56836, -119.2022, -8.0]
+WEATHER = [1015.62055, 40.0]
+ORIENTATION = [33.65, 135.0]
+ATMOSPHERIC_CONDITIONS = [1.14, 0.65, -1.0, 0.2, 1.36]
+ALBEDO = [0.3, 0.7, 0.8, 1.3, 2.5, 4.0] + ([0.2] * 6)
+
+
+def test_write_solpos_range():
+    """
+    test both layouts load the same as the whole range
+    """
+    angles, airmass = get_solpos_range(
+        LOCATION, '2016-02-28', '2016-03-02', '1min', WEATHER)
+    datetimes = datetime_range('2016-02-28', '2016-03-02', '1min')
+    path = tempfile.mkdtemp()
+    try:
+        for compress in (False, True):
+            folder = os.path.join(path, str(compress))
+            rows = write_solpos_range(
+                folder, LOCATION, '2016-02-28', '2016-03-02', '1min', WEATHER,
+                chunk_size=1000, compress=compress)
+            assert rows == 4320
+            columns = load(folder)
+            assert isinstance(columns['angles'], np.memmap) != compress
+            assert np.array_equal(columns['datetimes'], datetimes)
+            assert np.array_equal(columns['angles'], angles)
+            assert np.array_equal(columns['airmass'], airmass)
+            del columns
+    finally:
+        shutil.rmtree(path)
+
+
+def test_write_spectrl2_range():
+    """
+    test spectra are written a chunk at a time with their x-coordinate
+    """
+    location = [33.65, -84.43, -5.0]
+    datetimes = datetime_range('1999-07-01', '1999-07-02', '10min')
+    expected = get_spectrl2(
+        1, location, datetimes, [1013.0, 15.0], ORIENTATION,
+        ATMOSPHERIC_CONDITIONS, ALBEDO)
+    path = tempfile.mkdtemp()
+    try:
+        rows = write_spectrl2_range(
+            path, 1, location, '1999-07-01', '1999-07-02', '10min',
+            [1013.0, 15.0], ORIENTATION, ATMOSPHERIC_CONDITIONS, ALBEDO,
+            chunk_size=50)
+        assert rows == 144
+        columns = load(path, mmap_mode=None)
+        assert np.array_equal(columns['datetimes'], datetimes)
+        for name, values in zip(
+                ('specdif', 'specdir', 'specetr', 'specglo', 'specx'),
+                expected):
+            np.testing.assert_array_equal(columns[name], values)
+    finally:
+        shutil.rmtree(path)
+
+
+def test_chunk_writer():
+    """
+    test chunks must match and the index is only written when closed
+    """
+    path = tempfile.mkdtemp()
+    try:
+        writer = ChunkWriter(path)
+        writer.write(x=np.arange(3.0), y=np.ones((3, 2), dtype=np.intc))
+        with pytest.raises(ValueError):
+            writer.write(x=np.arange(3.0), y=np.ones((3, 3), dtype=np.intc))
+        with pytest.raises(ValueError):
+            writer.write(x=np.arange(3.0), y=np.ones((2, 2), dtype=np.intc))
+        assert not os.path.exists(os.path.join(path, INDEX))
+        writer.write(x=np.arange(2.0), y=np.zeros((2, 2), dtype=np.intc))
+        writer.close()
+        columns = load(path)
+        assert np.array_equal(columns['x'], [0.0, 1.0, 2.0, 0.0, 1.0])
+        assert columns['y'].shape == (5, 2)
+        del columns
+        # an error in the block doesn't write the index and closes the files
+        os.remove(os.path.join(path, INDEX))
+        for compress in (False, True):
+            with pytest.raises(RuntimeError):
+                with ChunkWriter(path, compress=compress) as writer:
+                    writer.write(x=np.arange(3.0))
+                    writer._join()
+                    files = list(writer._files.values())
+                    raise RuntimeError('stop')
+            assert all(fileobj.closed for fileobj in files)
+            assert not os.path.exists(os.path.join(path, INDEX))
+    finally:
+        shutil.rmtree(path)
+
+
+def test_chunk_writer_closed():
+    """
+    test a closed writer doesn't queue chunks that are never written
+    """
+    path = tempfile.mkdtemp()
+    try:
+        for compress in (False, True):
+            folder = os.path.join(path, str(compress))
+            writer = ChunkWriter(folder, compress=compress, max_pending=1)
+            writer.write(x=np.arange(3.0))
+            writer.close()
+            # more writes than the queue holds would wait forever
+            for _ in range(3):
+                with pytest.raises(ValueError):
+                    writer.write(x=np.arange(3.0))
+            with pytest.raises(ValueError):
+                writer.save('y', np.arange(2.0))
+            assert writer.rows == 3 and writer.chunks == 1
+            assert not os.path.exists(os.path.join(folder, 'y.npy'))
+            assert np.array_equal(load(folder)['x'], np.arange(3.0))
+            # closing again is fine
+            writer.close()
+        # also stopped by an error in the block
+        with pytest.raises(RuntimeError):
+            with ChunkWriter(path) as writer:
+                raise RuntimeError('stop')
+        with pytest.raises(ValueError):
+            writer.write(x=np.arange(3.0))
+    finally:
+        shutil.rmtree(path)
+
+
+class _FailingWriter(ChunkWriter):
+    """
+    Writer that fails to append its second chunk.
+    """
+    def _append(self, number, columns):
+        if number == 1:
+            raise IOError('disk full')
+        super(_FailingWriter, self)._append(number, columns)
+
+
+def test_chunk_writer_error():
+    """
+    test a failed chunk is raised until closed and the index isn't written
+    """
+    path = tempfile.mkdtemp()
+    try:
+        for compress in (False, True):
+            folder = os.path.join(path, str(compress))
+            writer = _FailingWriter(folder, compress=compress)
+            for _ in range(4):
+                try:
+                    writer.write(x=np.arange(3.0))
+                except IOError:
+                    pass
+            for _ in range(2):
+                with pytest.raises(IOError):
+                    writer.close()
+            with pytest.raises(ValueError):
+                writer.write(x=np.arange(3.0))
+            assert not writer._files
+            assert not os.path.exists(os.path.join(folder, INDEX))
+            # the chunks after the failed one were dropped
+            assert not os.path.exists(os.path.join(folder, 'chunk-000002.npz'))
+    finally:
+        shutil.rmtree(path)
@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+"""
+Chunked, out-of-core writer of solar position and spectra.
+
+Results are calculated a chunk at a time and each chunk is appended to a
+directory of columns on disk by a background thread, so writing one chunk
+overlaps calculating the next and only a few chunks are ever in memory.
+
+Uncompressed, each column is a NumPy ``.npy`` file that grows as chunks are
+appended, and its header is written with the final shape when the writer is
+closed, so the columns can be memory-mapped with :func:`load`. Compressed,
+each chunk is a ``chunk-NNNNNN.npz`` file of every column. A JSON ``index``
+file with the columns, rows and layout is written last, when the writer is
+closed.
+
+2019 SunPower Corp.
+"""
+
+import json
+import os
+import queue
+import struct
+import threading
+
+import numpy as np
+
+from solar_utils.core import _as_datetime64, _as_timedelta64, get_spectrl2
+from solar_utils.stream import (
+    STREAM_CHUNK, _range_chunks, stream_solpos_range
+)
+
+#: name of the index file of a directory written by :class:`ChunkWriter`
+INDEX = 'index.json'
+#: bytes reserved for the header of each ``.npy`` column
+NPY_HEADER = 256
+#: default number of chunks queued for the background thread
+MAX_PENDING = 2
+
+
+def _npy_header(dtype, shape):
+    """
+    Get a ``.npy`` version 1.0 header of :data:`NPY_HEADER` bytes.
+
+    The header is padded with spaces so it can be rewritten in place with the
+    final shape.
+    """
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype),
+                   'fortran_order': False, 'shape': tuple(shape)})
+    header = header.ljust(NPY_HEADER - 11) + '\n'
+    return (np.lib.format.magic(1, 0) + struct.pack('<H', len(header))
+            + header.encode('latin1'))
+
+
+class ChunkWriter(object):
+    """
+    Append chunks of columns to a directory on a background thread.
+
+    :param path: directory, created if it doesn't exist
+    :type path: str
+    :param compress: save each chunk as a compressed ``.npz`` file instead of
+        appending to ``.npy`` columns
+    :type compress: bool
+    :param max_pending: number of chunks queued before :meth:`write` waits
+    :type max_pending: int
+
+    Every chunk must have the same columns, with the same dtype and the same
+    shape except for the number of rows. An error of the background thread
+    is raised by every later :meth:`write` and by :meth:`close`, the chunks
+    after it are dropped and the index is never written, so the partial
+    directory can't be loaded. Used as a context manager, the writer is
+    closed at the end of the block, but if the block raises, the index isn't
+    written either. Once closed, :meth:`write` and :meth:`save` raise
+    :exc:`ValueError`.
+
+    **Example:**
+
+    >>> with ChunkWriter('/data/solpos/site-1') as writer:
+    ...     for datetimes, angles, airmass in stream_solpos_range(
+    ...             location, '2010-01-01', '2020-01-01', '1min', weather):
+    ...         writer.write(datetimes=datetimes, angles=angles,
+    ...                      airmass=airmass)
+    >>> columns = load('/data/solpos/site-1')
+    """
+    def __init__(self, path, compress=False, max_pending=MAX_PENDING):
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.compress = compress
+        self.rows = 0
+        self.chunks = 0
+        self._columns = None
+        self._files = {}
+        self._arrays = {}
+        self._error = None
+        self._queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._stop()
+
+    def _run(self):
+        """
+        Write queued chunks until ``None`` is queued.
+        """
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            if self._error is not None:
+                continue  # drain the queue so write doesn't wait forever
+            try:
+                self._append(*chunk)
+            except BaseException as exc:
+                self._error = exc
+
+    def _append(self, number, columns):
+        """
+        Write a chunk in the background thread.
+        """
+        if self.compress:
+            filename = os.path.join(self.path, 'chunk-%06d.npz' % number)
+            np.savez_compressed(filename, **columns)
+            return
+        for name, values in columns.items():
+            fileobj = self._files.get(name)
+            if fileobj is None:
+                fileobj = open(os.path.join(self.path, '%s.npy' % name), 'wb')
+                fileobj.write(_npy_header(values.dtype, (0,)))
+                self._files[name] = fileobj
+            values.tofile(fileobj)
+
+    def _check(self):
+        """
+        Raise the error of the background thread, if any, kept so it's raised
+        again by every later call.
+        """
+        if self._error is not None:
+            raise self._error
+
+    def _check_open(self):
+        """
+        Raise :exc:`ValueError` if the background thread was stopped, since
+        nothing would write the chunks.
+        """
+        if self._thread is None:
+            raise ValueError('writer is closed')
+
+    def write(self, **columns):
+        """
+        Queue a chunk of columns to be written, waiting if the queue is full.
+
+        :param columns: arrays with the same number of rows, copied so the
+            caller can reuse them
+        :raises: :exc:`ValueError` if the writer is closed or the columns
+            don't match the first chunk
+        """
+        self._check_open()
+        self._check()
+        columns = dict((name, np.array(values, copy=True, order='C'))
+                       for name, values in columns.items())
+        shapes = dict((name, (values.dtype.str, values.shape[1:]))
+                      for name, values in columns.items())
+        if self._columns is None:
+            self._columns = shapes
+        elif shapes != self._columns:
+            raise ValueError('columns %r must match the first chunk %r'
+                             % (shapes, self._columns))
+        counts = set(values.shape[0] for values in columns.values())
+        if len(counts) > 1:
+            raise ValueError('columns must have the same number of rows')
+        self._queue.put((self.chunks, columns))
+        self.rows += counts.pop() if counts else 0
+        self.chunks += 1
+
+    def save(self, name, values):
+        """
+        Save an array that isn't chunked, like the x-coordinate of spectra,
+        as ``name.npy``.
+
+        :param name: name of the array
+        :type name: str
+        :param values: array
+        :raises: :exc:`ValueError` if the writer is closed
+        """
+        self._check_open()
+        np.save(os.path.join(self.path, '%s.npy' % name), values)
+        self._arrays[name] = True
+
+    def _join(self):
+        """
+        Wait for every queued chunk and stop the background thread.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _close_files(self):
+        """
+        Close the file of every uncompressed column.
+        """
+        files, self._files = self._files, {}
+        for fileobj in files.values():
+            fileobj.close()
+
+    def _stop(self):
+        """
+        Stop the background thread and close the columns without writing the
+        index.
+        """
+        self._join()
+        self._close_files()
+
+    def close(self):
+        """
+        Wait for every queued chunk, finish the columns and write the index.
+
+        :raises: the error of the background thread, if any, in which case
+            the index isn't written
+        """
+        if self._thread is None:
+            self._check()
+            return
+        self._join()
+        try:
+            self._check()
+            for name, fileobj in self._files.items():
+                dtype, shape = self._columns[name]
+                fileobj.seek(0)
+                fileobj.write(
+                    _npy_header(np.dtype(dtype), (self.rows,) + shape))
+        finally:
+            self._close_files()
+        columns = dict((name, {'dtype': dtype, 'shape': list(shape)})
+                       for name, (dtype, shape) in (
+                           self._columns or {}).items())
+        index = {'columns': columns, 'rows': self.rows,
+                 'chunks': self.chunks, 'compress': self.compress,
+                 'arrays': sorted(self._arrays)}
+        with open(os.path.join(self.path, INDEX), 'w') as fileobj:
+            json.dump(index, fileobj, sort_keys=True)
+
+
+def load(path, mmap_mode='r'):
+    """
+    Load the columns of a directory written by :class:`ChunkWriter`.
+
+    :param path: directory
+    :type path: str
+    :param mmap_mode: memory-map mode of uncompressed columns, ``None`` to
+        read them
+    :type mmap_mode: str
+    :returns: columns and arrays by name
+    :rtype: dict
+
+    Uncompressed columns are memory-mapped, compressed chunks are read and
+    concatenated.
+    """
+    with open(os.path.join(path, INDEX)) as fileobj:
+        index = json.load(fileobj)
+    result = dict(
+        (name, np.load(os.path.join(path, '%s.npy' % name)))
+        for name in index['arrays'])
+    if not index['compress']:
+        for name in index['columns']:
+            result[name] = np.load(os.path.join(path, '%s.npy' % name),
+                                   mmap_mode=mmap_mode)
+        return result
+    columns = dict((name, []) for name in index['columns'])
+    for number in range(index['chunks']):
+        filename = os.path.join(path, 'chunk-%06d.npz' % number)
+        with np.load(filename) as chunk:
+            for name, values in columns.items():
+                values.append(chunk[name])
+    for name, column in index['columns'].items():
+        if columns[name]:
+            result[name] = np.concatenate(columns[name])
+        else:
+            result[name] = np.empty(
+                [0] + column['shape'], dtype=np.dtype(column['dtype']))
+    return result
+
+
+def write_solpos_range(path, location, start, end, freq, weather,
+                       num_threads=1, errors='raise', chunk_size=STREAM_CHUNK,
+                       compress=False):
+    """
+    Write SOLPOS calculation for a range of datetimes to a directory a chunk
+    at a time.
+
+    :param path: directory, see :class:`ChunkWriter`
+    :type path: str
+    :param location: [latitude, longitude, UTC-timezone]
+    :type location: float
+    :param start: first datetime
+    :type start: :class:`datetime.datetime`
+    :param end: end of the range, not included
+    :type end: :class:`datetime.datetime`
+    :param freq: step between datetimes, a whole number of seconds
+    :type freq: :class:`datetime.timedelta`
+    :param weather: [ambient-pressure (mB), ambient-temperature (C)]
+    :type weather: float
+    :param num_threads: number of native threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param errors: ``'raise'`` or ``'mask'`` rows with SOLPOS errors
+    :type errors: str
+    :param chunk_size: number of rows per chunk
+    :type chunk_size: int
+    :param compress: save compressed chunks
+    :type compress: bool
+    :returns: number of rows written
+    :rtype: int
+    :raises: :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    Writes columns ``datetimes``, ``angles``, ``airmass`` and, with
+    ``errors='mask'``, ``err_code``, see
+    :func:`~solar_utils.stream.stream_solpos_range`.
+
+    **Example:**
+
+    >>> for n, site in enumerate(sites):
+    ...     write_solpos_range('/data/solpos/%d' % n, site['location'],
+    ...                        '2010-01-01', '2020-01-01', '1min',
+    ...                        site['weather'], compress=True)
+    """
+    names = ('datetimes', 'angles', 'airmass', 'err_code')
+    with ChunkWriter(path, compress) as writer:
+        for result in stream_solpos_range(
+                location, start, end, freq, weather, num_threads, errors,
+                chunk_size):
+            writer.write(**dict(zip(names, result)))
+    return writer.rows
+
+
+def write_spectrl2_range(path, units, location, start, end, freq, weather,
+                         orientation, atmospheric_conditions, albedo,
+                         num_threads=1, skip_night=False, window=None,
+                         chunk_size=STREAM_CHUNK // 16, compress=False):
+    """
+    Write SPECTRL2 spectra for a range of datetimes to a directory a chunk at
+    a time.
+
+    :param path: directory, see :class:`ChunkWriter`
+    :type path: str
+    :param units: set ``units`` = 1 for W/m\\ :sup:`2`/micron
+    :type units: int
+    :param location: latitude, longitude and UTC-timezone
+    :type location: float
+    :param start: first datetime
+    :type start: :class:`datetime.datetime`
+    :param end: end of the range, not included
+    :type end: :class:`datetime.datetime`
+    :param freq: step between datetimes, a whole number of seconds
+    :type freq: :class:`datetime.timedelta`
+    :param weather: ambient-pressure [mB] and ambient-temperature [C]
+    :type weather: float
+    :param orientation: tilt and aspect [degrees]
+    :type orientation: float
+    :param atmospheric_conditions: alpha, assym, ozone, tau500 and watvap
+    :type atmospheric_conditions: float
+    :param albedo: 6 wavelengths and 6 reflectivities
+    :type albedo: float
+    :param num_threads: number of threads, ``None`` to use every CPU
+    :type num_threads: int
+    :param skip_night: don't calculate rows at night
+    :type skip_night: bool
+    :param window: minimum and maximum wavelength [microns] calculated,
+        ``None`` for all 122
+    :type window: float
+    :param chunk_size: number of rows per chunk
+    :type chunk_size: int
+    :param compress: save compressed chunks
+    :type compress: bool
+    :returns: number of rows written
+    :rtype: int
+    :raises: :exc:`~solar_utils.exceptions.SPECTRL2_Error`,
+        :exc:`~solar_utils.exceptions.SOLPOS_Error`
+
+    Writes columns ``datetimes``, ``specdif``, ``specdir``, ``specetr`` and
+    ``specglo`` and the array ``specx``, see
+    :func:`~solar_utils.core.get_spectrl2`. The default chunks are smaller
+    than for solar position because each row has hundreds of values.
+    """
+    start, freq = _as_datetime64(start), _as_timedelta64(freq)
+    count = max(0, -(-(_as_datetime64(end) - start) // freq))
+    names = ('specdif', 'specdir', 'specetr', 'specglo')
+    with ChunkWriter(path, compress) as writer:
+        for datetimes in _range_chunks(start, count, freq, chunk_size):
+            result = get_spectrl2(
+                units, location, datetimes, weather, orientation,
+                atmospheric_conditions, albedo, num_threads=num_threads,
+                skip_night=skip_night, window=window)
+            if not writer.chunks:
+                writer.save('specx', result[4])
+            columns = dict(zip(names, result[:4]))
+            writer.write(datetimes=datetimes, **columns)
+    return writer.rows